@@ -15,6 +15,16 @@ class Settings(BaseModel):
     
     # Google API
     google_api_key: str = os.getenv("GOOGLE_API_KEY", "")
+
+    # Problem/quiz generation client: "gemini" or "stub" (offline, generators use their fallbacks)
+    llm_backend: str = os.getenv("LLM_BACKEND", "gemini")
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    llm_requests_per_second: float = float(os.getenv("LLM_REQUESTS_PER_SECOND", "2"))
+    llm_timeout_seconds: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    # Consecutive failed calls that open the generation circuit, and how long it stays open
+    llm_breaker_failures: int = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+    llm_breaker_cooldown_seconds: float = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "60"))
     
     # AWS Configuration
     aws_region: str = os.getenv("AWS_REGION", "eu-north-1")
@@ -22,6 +32,19 @@ class Settings(BaseModel):
     aws_secret_access_key: str = os.getenv("AWS_SECRET_ACCESS_KEY", "")
     aws_lambda_function_name: str = os.getenv("AWS_LAMBDA_FUNCTION_NAME", "python-code-executor")
 
+    # Match/lobby event bus: "memory" (single process) or "mongo" (capped collection shared by all nodes)
+    event_bus_backend: str = os.getenv("EVENT_BUS_BACKEND", "memory")
+
+    # Keep active matches in memory on the node holding their lease, persisted by write-behind
+    hot_match_store: bool = os.getenv("HOT_MATCH_STORE", "false").lower() == "true"
+    match_journal_dir: str = os.getenv("MATCH_JOURNAL_DIR", ".match_journal")
+
+    # Completed matches and finished lobbies move to the *_archive collections after this many hours
+    match_archive_after_hours: float = float(os.getenv("MATCH_ARCHIVE_AFTER_HOURS", "24"))
+
+    # Pre-generated problems kept per (difficulty, competitive mode) for lobby creation
+    problem_pool_target: int = int(os.getenv("PROBLEM_POOL_TARGET", "15"))
+
     @property
     def cors_origins(self) -> list[str]:
         raw = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://127.0.0.1:5173")
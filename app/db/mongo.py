@@ -19,10 +19,69 @@ async def connect_to_mongo():
         # Test the connection
         await client.admin.command('ping')
         print(f"✅ Successfully connected to MongoDB!")
+        
+        await ensure_indexes()
     except Exception as e:
         print(f"❌ Failed to connect to MongoDB: {e}")
         raise
 
+async def ensure_indexes():
+    """Create the indexes hot competitive queries rely on (no-op when they exist)"""
+    # Lobby polling and version checks look lobbies up by their game code
+    await db.lobbies.create_index("game_id")
+    # Game codes are unique among open lobbies; expired and finished lobbies free theirs.
+    # Duplicates left by the old random codes fail the build: start without it.
+    try:
+        await db.lobbies.create_index(
+            [("game_id", 1)],
+            name="open_game_id_unique",
+            unique=True,
+            partialFilterExpression={"status": {"$in": ["waiting", "active"]}}
+        )
+    except Exception as e:
+        print(f"⚠️ Could not create the unique game code index: {e}")
+    # Timer polling claims the earliest due timer; run_at doubles as the lease expiry
+    await db.timers.create_index("run_at")
+    # Waiting lobbies: listing by age and expiry sweeps; expired and finished lobbies stay out of both
+    await db.lobbies.create_index(
+        [("created_at", -1)],
+        name="waiting_created_at",
+        partialFilterExpression={"status": "waiting"}
+    )
+    await db.lobbies.create_index(
+        [("expires_at", 1)],
+        name="waiting_expires_at",
+        partialFilterExpression={"status": "waiting"}
+    )
+    # Deadline sweeps only look at active matches, so only they are indexed
+    await db.matches.create_index(
+        [("deadline_at", 1)],
+        name="active_deadline_at",
+        partialFilterExpression={"status": "active"}
+    )
+    # Archival sweeps: only finished documents are indexed by their finish time
+    await db.matches.create_index(
+        [("completed_at", 1)],
+        name="completed_completed_at",
+        partialFilterExpression={"status": "completed"}
+    )
+    await db.lobbies.create_index(
+        [("expired_at", 1)],
+        name="expired_expired_at",
+        partialFilterExpression={"status": "expired"}
+    )
+    await db.lobbies.create_index(
+        [("started_at", 1)],
+        name="active_started_at",
+        partialFilterExpression={"status": "active"}
+    )
+    # Match history falls back to the archive per player
+    for slot in ("player1", "player2"):
+        await db.matches_archive.create_index([(f"{slot}.user_id", 1), ("created_at", -1)])
+    # Near-duplicate index: nodes reload signatures added since their last refresh
+    await db.similarity_index.create_index("indexed_at")
+    print("✅ Indexes ensured")
+
 async def close_mongo_connection():
     global client
     if client:
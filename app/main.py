@@ -8,6 +8,15 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from app.core.config import get_settings
 from app.db.mongo import connect_to_mongo, close_mongo_connection
 from app.routers import auth, users, problems, attempts, leaderboard, execute, competitive
+from app.services.event_bus import event_bus
+from app.services.match_store import match_store
+from app.services.matchmaking import matchmaker
+from app.services.scheduler import scheduler
+from app.services.match_expiry import deadline_sweeper
+from app.services.lobby_lifecycle import lobby_lifecycle
+from app.services.match_archive import match_archive
+from app.services.problem_pool import problem_pool
+from app.services.similarity_index import similarity_index
 
 settings = get_settings()
 
@@ -19,8 +28,32 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Warning: MongoDB connection failed: {e}")
         print("Continuing without database connection...")
+    try:
+        await event_bus.start()
+    except Exception as e:
+        print(f"Warning: Event bus failed to start: {e}")
+    try:
+        await match_store.start()
+    except Exception as e:
+        print(f"Warning: Hot match store failed to start: {e}")
+    await matchmaker.start()
+    await scheduler.start()
+    await deadline_sweeper.start()
+    await lobby_lifecycle.start()
+    await match_archive.start()
+    await similarity_index.start()
+    await problem_pool.start()
     yield
     # Shutdown
+    await problem_pool.stop()
+    await similarity_index.stop()
+    await match_archive.stop()
+    await lobby_lifecycle.stop()
+    await deadline_sweeper.stop()
+    await scheduler.stop()
+    await matchmaker.stop()
+    await match_store.stop()
+    await event_bus.stop()
     try:
         await close_mongo_connection()
     except Exception as e:
@@ -1,32 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query, Header, Response
 from pydantic import BaseModel
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional
-import asyncio
 import random
 import re
-import string
 
 from app.db.mongo import get_database
 from app.schemas.competitive import (
     MatchCreate, MatchPublic, MatchJoin, MatchSubmit, 
     MatchResult, MatchPlayerState, LobbyCreate, LobbyPublic, LobbyJoin
 )
-from app.security.auth import get_current_user
+from app.security.auth import get_current_user, get_user_from_token
+from app.services.bug_variants import select_buggy_code
 from app.services.code_executor import code_executor
-from app.services.problem_generator import generate_competitive_problem
+from app.services.mutation_tester import mutation_tester
+from app.services.verdict_cache import shuffle_verdict_cache, matches_reference_order
+from app.services.grading_context import grading_contexts
+from app.services.realtime import realtime_hub, match_channel, spectator_channel, lobby_channel
+from app.services.snapshot_cache import snapshot_cache, Snapshot
+from app.services.event_bus import event_bus
+from app.services.match_changes import log_change, changes_since
+from app.services.match_store import match_store
+from app.services.matchmaking import matchmaker, Ticket
+from app.services.scheduler import scheduler
+from app.services.match_expiry import EXPIRY_PROJECTION, deadline_sweeper, match_deadline
+from app.services.lobby_lifecycle import lobby_lifecycle, lobby_expiry
+from app.services.match_archive import match_archive
+from app.services.game_codes import game_codes, GameCodeUnavailable
+from app.services.problem_pool import problem_pool
+from app.services.match_repository import (
+    match_repository, duel_player_key,
+    DUEL_PLAYERS, PARTICIPANTS, QUIZ_PROGRESS, SUBMISSION, quiz_chunk
+)
+from app.services.match_finalization import (
+    completion_update, placement_reward_ops, duel_reward_ops, multiplayer_score_key, quiz_score_key,
+    expiry_update, duel_outcome
+)
+from app.services.llm_client import llm_client
 
 router = APIRouter(prefix="/competitive", tags=["competitive"])
 
-# Store for active websocket connections
-active_connections = {}
+# Longest a matchmaking request is held open waiting for an opponent
+MATCHMAKING_WAIT_SECONDS = 25
+# Lobbies nobody starts are closed after this long
+LOBBY_MAX_WAITING_SECONDS = 2 * 60 * 60
 
 class MatchmakingRequest(BaseModel):
     """Request body for matchmaking"""
     game_mode: str = "standard"
     problem_id: Optional[str] = None
-active_connections = {}
 
 def shuffle_code_lines(code: str) -> List[str]:
     """Shuffle code lines while maintaining logical structure"""
@@ -102,7 +125,7 @@ def calculate_code_shuffle_score(original: str, arranged: List[str]) -> int:
     return int((correct / len(original_lines)) * 100)
 
 def evaluate_test_cases(test_cases: List[dict], reference_code: str, language: str) -> int:
-    """Evaluate quality of user-created test cases"""
+    """Evaluate quality of user-created test cases heuristically (fallback when mutation scoring is unavailable)"""
     if not test_cases:
         return 0
     
@@ -133,137 +156,6 @@ def evaluate_test_cases(test_cases: List[dict], reference_code: str, language: s
     
     return min(score, 100)  # Cap at 100
 
-def generate_buggy_code(correct_code: str, language: str = "python") -> str:
-    """Generate buggy code by introducing common programming errors"""
-    if not correct_code:
-        return ""
-    
-    lines = correct_code.split('\n')
-    buggy_lines = lines.copy()
-    bugs_introduced = 0
-    non_empty_lines = len([l for l in lines if l.strip() and not l.strip().startswith('#')])
-    max_bugs = min(3, max(1, non_empty_lines // 3))  # Ensure at least 1 bug for short code
-    
-    print(f"🐛 Generating buggy code: {non_empty_lines} lines, target {max_bugs} bugs")
-    
-    # Common bug patterns for different languages
-    bug_types = []
-    
-    if language == "python":
-        bug_types = [
-            # Off-by-one error in range
-            lambda line: line.replace('range(len(', 'range(len(') if 'range(len(' in line else (
-                line.replace('range(', 'range(1, ', 1) if 'range(' in line and 'range(1,' not in line and 'range(0' not in line else line
-            ),
-            # Missing colon after control structures
-            lambda line: line.rstrip(':') if line.strip().endswith(':') and any(kw in line for kw in ['if ', 'for ', 'while ', 'def ', 'class ', 'elif ', 'else:', 'try:', 'except']) else line,
-            # Wrong comparison operator (== vs =)
-            lambda line: line.replace('==', '=', 1) if '==' in line and 'def ' not in line and '#' not in line else line,
-            # Wrong indentation - remove 4 spaces (1 indentation level) for indented lines
-            lambda line: line[4:] if line.startswith('    ') and line.strip() and not line.strip().startswith('#') and len(line.lstrip()) < len(line) - 4 else line,
-            # Missing return statement (comment it out)
-            lambda line: '# ' + line if 'return ' in line and not line.strip().startswith('#') else line,
-            # Wrong operator precedence (+ vs *)
-            lambda line: line.replace(' + ', ' * ', 1) if ' + ' in line and 'def ' not in line and '#' not in line else line,
-            # Wrong list indexing
-            lambda line: line.replace('[0]', '[1]', 1) if '[0]' in line else (
-                line.replace('[-1]', '[-2]', 1) if '[-1]' in line else line
-            ),
-            # Incorrect loop variable
-            lambda line: line.replace('for i in', 'for j in', 1) if 'for i in' in line and 'i]' in line else line,
-            # Wrong boolean operator
-            lambda line: line.replace(' and ', ' or ', 1) if ' and ' in line else (
-                line.replace(' or ', ' and ', 1) if ' or ' in line else line
-            ),
-            # Missing increment
-            lambda line: line.replace('i += 1', 'i += 2', 1) if 'i += 1' in line else (
-                line.replace('count += 1', 'count += 2', 1) if 'count += 1' in line else line
-            ),
-            # Wrong string method
-            lambda line: line.replace('.append(', '.extend(', 1) if '.append(' in line else line,
-            # Incorrect condition
-            lambda line: line.replace(' < ', ' <= ', 1) if ' < ' in line else (
-                line.replace(' > ', ' >= ', 1) if ' > ' in line else line
-            ),
-        ]
-    
-    elif language == "javascript":
-        bug_types = [
-            # Missing semicolon
-            lambda line: line.rstrip(';') if line.strip().endswith(';') and not line.strip().startswith('for') else line,
-            # Wrong comparison (== vs ===)
-            lambda line: line.replace('===', '==', 1) if '===' in line else line,
-            # Missing return
-            lambda line: '// ' + line if 'return ' in line and not line.strip().startswith('//') else line,
-            # Wrong array method
-            lambda line: line.replace('.push(', '.pop(', 1) if '.push(' in line else line,
-            # Off-by-one in loop
-            lambda line: line.replace('< length', '<= length', 1) if '< length' in line else line,
-            # Wrong operator
-            lambda line: line.replace(' + ', ' - ', 1) if ' + ' in line and '//' not in line else line,
-            # Missing var/let/const
-            lambda line: line.replace('let ', '', 1) if line.strip().startswith('let ') else (
-                line.replace('const ', '', 1) if line.strip().startswith('const ') else line
-            ),
-            # Wrong increment
-            lambda line: line.replace('++', '--', 1) if '++' in line else line,
-        ]
-    
-    # Try multiple passes to ensure we introduce bugs
-    max_attempts = 10
-    attempt = 0
-    
-    while bugs_introduced < max_bugs and attempt < max_attempts:
-        attempt += 1
-        available_indices = list(range(len(buggy_lines)))
-        random.shuffle(available_indices)
-        
-        for idx in available_indices:
-            if bugs_introduced >= max_bugs:
-                break
-            
-            line = buggy_lines[idx]
-            # Skip empty lines, comments
-            if not line.strip() or line.strip().startswith('#') or line.strip().startswith('//'):
-                continue
-            
-            # Try to apply a random bug
-            bug_func = random.choice(bug_types)
-            modified_line = bug_func(line)
-            
-            # Only apply if the line actually changed
-            if modified_line != line:
-                print(f"  🐛 Bug {bugs_introduced + 1}: Line {idx + 1}: '{line.strip()}' → '{modified_line.strip()}'")
-                buggy_lines[idx] = modified_line
-                bugs_introduced += 1
-    
-    if bugs_introduced == 0:
-        print(f"  ⚠️ Warning: No bugs introduced after {attempt} attempts!")
-    else:
-        print(f"  ✅ Successfully introduced {bugs_introduced} bug(s)")
-    
-    # Validate that the buggy code is syntactically valid (even if logically wrong)
-    buggy_code = '\n'.join(buggy_lines)
-    
-    if language == "python":
-        try:
-            compile(buggy_code, '<string>', 'exec')
-            print(f"  ✅ Buggy code syntax is valid")
-        except SyntaxError as e:
-            # If syntax is invalid, return the original correct code with bugs commented out
-            # This ensures the code at least compiles, even if it doesn't run correctly
-            print(f"  ⚠️ ERROR: Generated buggy code has syntax error: {str(e)}")
-            print(f"  ⚠️ Returning original code to avoid IndentationError in Bug Hunt")
-            # Apply only safe, non-structural bugs to the original code
-            safe_buggy = correct_code.split('\n')
-            for i, line in enumerate(safe_buggy):
-                if '==' in line and 'def ' not in line and '#' not in line:
-                    safe_buggy[i] = line.replace('==', '=', 1)
-                    break
-            return '\n'.join(safe_buggy)
-    
-    return buggy_code
-
 def calculate_rating_change(winner_rating: int, loser_rating: int, used_hints: bool = False) -> int:
     """Calculate ELO-style rating change"""
     k_factor = 32
@@ -294,20 +186,31 @@ def calculate_xp_bonus(time_elapsed: float, time_limit: int, used_hints: bool) -
     
     return base_xp + time_bonus + no_hints_bonus
 
-async def simulate_bot_completion(match_id: str, problem_id: str, bot_skill: int = 1200):
-    """Simulate bot completing the problem after a delay"""
-    db = get_database()
-    
+async def schedule_bot_completion(match_id: str, problem_id: str, bot_skill: int = 1200):
+    """Schedule the bot's (correct) submission as a durable timer"""
     # Bot completes in 3-10 minutes based on skill
     # Higher skill = faster completion
     base_time = 600  # 10 minutes
     skill_factor = max(0.3, 1 - (bot_skill - 1000) / 1000)  # 0.3 to 1.0
     completion_time = base_time * skill_factor * random.uniform(0.5, 1.0)
     
-    await asyncio.sleep(completion_time)
+    await scheduler.schedule_in(
+        "bot_completion",
+        completion_time,
+        {"match_id": match_id, "problem_id": problem_id, "bot_skill": bot_skill, "completion_time": completion_time},
+        key=match_id
+    )
+
+async def simulate_bot_completion(payload: dict):
+    """Timer handler: the bot submits its solution (scheduled by schedule_bot_completion)"""
+    db = get_database()
+    match_id = payload["match_id"]
+    problem_id = payload["problem_id"]
+    bot_skill = payload.get("bot_skill", 1200)
+    completion_time = payload["completion_time"]
     
     # Check if match still exists and is active
-    match = await db.matches.find_one({"_id": ObjectId(match_id)})
+    match = await match_store.find(ObjectId(match_id))
     if not match or match.get("status") == "completed":
         return  # Match already finished
     
@@ -320,9 +223,9 @@ async def simulate_bot_completion(match_id: str, problem_id: str, bot_skill: int
     test_cases = problem.get("testCases", [])
     
     # Update bot as completed
-    await db.matches.update_one(
-        {"_id": ObjectId(match_id)},
-        {
+    await match_store.update(
+        ObjectId(match_id),
+        versioned_match({
             "$set": {
                 "player2.completed": True,
                 "player2.time_elapsed": completion_time,
@@ -333,14 +236,17 @@ async def simulate_bot_completion(match_id: str, problem_id: str, bot_skill: int
                     "all_passed": True
                 }
             }
-        }
+        })
     )
     
     # Check if player1 has also completed to determine winner
-    updated_match = await db.matches.find_one({"_id": ObjectId(match_id)})
+    updated_match = await match_store.find(ObjectId(match_id))
     player1 = updated_match.get("player1", {})
     player2 = updated_match.get("player2", {})
     
+    if not (player1.get("completed") and player2.get("completed")):
+        await broadcast_match(match_id, "submission", updated_match)
+    
     if player1.get("completed") and player2.get("completed"):
         # Both completed - determine winner by time
         p1_time = player1.get("time_elapsed", float('inf'))
@@ -348,55 +254,339 @@ async def simulate_bot_completion(match_id: str, problem_id: str, bot_skill: int
         
         winner_id = "bot" if p2_time < p1_time else player1.get("user_id")
         
-        # Update match as completed
-        await db.matches.update_one(
-            {"_id": ObjectId(match_id)},
-            {
-                "$set": {
-                    "status": "completed",
-                    "winner_id": winner_id,
-                    "completed_at": datetime.utcnow()
-                }
-            }
-        )
-        
-        # Update player1 rating (don't update bot)
-        if winner_id != "bot":
-            # Player won against bot
-            player1_user = await db.users.find_one({"_id": ObjectId(player1["user_id"])})
-            if player1_user:
-                current_rating = player1_user.get("rating", 1200)
+        # Rating change for player1 (the bot is not rated)
+        player1_user = await db.users.find_one({"_id": ObjectId(player1["user_id"])}, {"rating": 1})
+        reward_ops = []
+        if player1_user:
+            current_rating = player1_user.get("rating", 1200)
+            if winner_id != "bot":
+                # Player won against bot
                 rating_change = calculate_rating_change(current_rating, bot_skill, player1.get("used_hints", False))
                 xp_bonus = calculate_xp_bonus(p1_time, updated_match.get("time_limit_seconds", 1800), player1.get("used_hints", False))
-                
-                await db.users.update_one(
-                    {"_id": ObjectId(player1["user_id"])},
-                    {
-                        "$inc": {
-                            "rating": rating_change,
-                            "xp": xp_bonus
-                        }
-                    }
-                )
-        else:
-            # Bot won - decrease player rating
-            player1_user = await db.users.find_one({"_id": ObjectId(player1["user_id"])})
-            if player1_user:
-                current_rating = player1_user.get("rating", 1200)
+                reward_ops = duel_reward_ops(player1["user_id"], None, rating_change, xp_bonus)
+            else:
+                # Bot won - decrease player rating
                 rating_change = calculate_rating_change(bot_skill, current_rating, False)
-                
-                await db.users.update_one(
-                    {"_id": ObjectId(player1["user_id"])},
-                    {
-                        "$inc": {
-                            "rating": -rating_change
-                        }
-                    }
+                reward_ops = duel_reward_ops(None, player1["user_id"], rating_change, 0)
+        
+        await finalize_match(
+            ObjectId(match_id),
+            {"$set": {"status": "completed", "winner_id": winner_id, "completed_at": datetime.utcnow()}},
+            reward_ops
+        )
+
+def release_match_resources(match_id: str):
+    """Free in-memory state held for a match once it is over"""
+    evicted = grading_contexts.evict_match(match_id)
+    if evicted:
+        print(f"🧹 Released {evicted} grading context(s) for match {match_id}")
+    match_store.release(match_id)
+
+async def finalize_match(match_oid: ObjectId, completion: dict, reward_ops: list, from_status: str = "active") -> bool:
+    """
+    Complete a match exactly once.
+    
+    ``completion`` (ranks, winners, status) is applied as one conditional
+    ``from_status`` -> completed transition; only the caller that wins it releases the
+    match, awards XP/rating in a single bulk_write and broadcasts. Returns
+    False when another request already finalized the match.
+    """
+    match_id = str(match_oid)
+    if not await match_store.transition(match_oid, {"status": from_status}, versioned_match(completion)):
+        print(f"ℹ️ Match {match_id} was already finalized")
+        return False
+    release_match_resources(match_id)
+    if reward_ops:
+        await get_database().users.bulk_write(reward_ops, ordered=False)
+    await broadcast_match(match_id, "match_completed")
+    return True
+
+async def expire_matches(matches: List[dict], now: datetime) -> int:
+    """
+    Deadline sweeper handler: end a batch of matches past their time limit.
+    
+    Every match is completed by one conditional active -> completed
+    transition, all in one batch; unfinished players get partial credit (see
+    expiry_update) and a 1v1 goes to whoever got further, a tie is a draw.
+    XP/rating for every match this call ended go out in one bulk_write.
+    Returns how many matches were ended.
+    
+    Each transition also requires the version ranking was computed from; a
+    match that changed meanwhile (a player just finished) is left for the
+    next sweep rather than completed with outdated standings.
+    """
+    db = get_database()
+    
+    # Ratings of every rated 1v1 player in the batch in one read
+    duel_user_ids = {
+        ObjectId(p["user_id"])
+        for match in matches if match.get("players") is None
+        for p in (match.get("player1") or {}, match.get("player2") or {})
+        if ObjectId.is_valid(p.get("user_id"))
+    }
+    ratings = {}
+    if duel_user_ids:
+        ratings = {
+            str(user["_id"]): user.get("rating", 1200)
+            async for user in db.users.find({"_id": {"$in": list(duel_user_ids)}}, {"rating": 1})
+        }
+    
+    transitions = []
+    rewards = {}
+    for match in matches:
+        # A match hot on this node may be ahead of what the sweeper read from Mongo
+        match = match_store.peek(match["_id"], EXPIRY_PROJECTION) or match
+        if match.get("players") is not None:
+            completion, ranked_players = expiry_update(match, now)
+            rewards[match["_id"]] = placement_reward_ops(ranked_players)
+        else:
+            outcome = duel_outcome(match)
+            completion = {"$set": {"status": "completed", "completed_at": now, "winner_id": None, "timed_out": True}}
+            rewards[match["_id"]] = []
+            if outcome:
+                winner, loser = outcome
+                completion["$set"]["winner_id"] = winner.get("user_id")
+                rating_change = calculate_rating_change(
+                    ratings.get(winner.get("user_id"), winner.get("bot_rating", 1200)),
+                    ratings.get(loser.get("user_id"), loser.get("bot_rating", 1200)),
+                    winner.get("used_hints", False)
                 )
+                rewards[match["_id"]] = duel_reward_ops(winner.get("user_id"), loser.get("user_id"), rating_change, 0)
+        transitions.append((match["_id"], {"status": "active", "version": match.get("version")}, versioned_match(completion)))
+    
+    ended = await match_store.transition_many(transitions)
+    
+    reward_ops = [op for match_oid in ended for op in rewards[match_oid]]
+    if reward_ops:
+        await db.users.bulk_write(reward_ops, ordered=False)
+    for match_oid in ended:
+        release_match_resources(str(match_oid))
+        await broadcast_match(str(match_oid), "match_completed")
+    return len(ended)
+
+async def schedule_lobby_cleanup(game_id: str):
+    await scheduler.schedule_in("lobby_cleanup", LOBBY_MAX_WAITING_SECONDS, {"game_id": game_id}, key=game_id)
+
+async def close_abandoned_lobby(payload: dict):
+    """Timer handler: expire a lobby still waiting long after it was created, heartbeats or not"""
+    await lobby_lifecycle.expire({
+        "game_id": payload["game_id"],
+        "created_at": {"$lte": datetime.utcnow() - timedelta(seconds=LOBBY_MAX_WAITING_SECONDS)}
+    })
+
+async def notify_expired_lobbies(game_ids: List[str]):
+    """Tell everyone still connected to an expired lobby"""
+    for game_id in game_ids:
+        await broadcast_lobby(game_id, "lobby_expired")
+
+scheduler.register("bot_completion", simulate_bot_completion)
+scheduler.register("lobby_cleanup", close_abandoned_lobby)
+deadline_sweeper.set_handler(expire_matches)
+lobby_lifecycle.set_expired_handler(notify_expired_lobbies)
+
+def versioned(update: dict) -> dict:
+    """
+    Add the version bump to a match or lobby update.
+    
+    Every mutation of a match or lobby goes through this, so ``version`` grows
+    monotonically and GET endpoints can answer pollers with ETag/304.
+    """
+    update.setdefault("$inc", {})["version"] = 1
+    return update
+
+def versioned_match(update: dict) -> dict:
+    """Version bump plus a change-log entry for a match update (see GET /matches/{id}/changes)"""
+    return log_change(versioned(update))
+
+def make_etag(version: int, *parts: str) -> str:
+    return '"' + "-".join([str(version), *parts]) + '"'
+
+def cache_headers(etag: str) -> dict:
+    # no-cache makes browsers revalidate every poll with If-None-Match instead of guessing freshness
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header lists ``etag`` (weak validators included)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def match_to_public(match: dict) -> MatchPublic:
+    """Build the public view of a match document (supports both 1v1 and multiplayer)"""
+    match = dict(match)
+    match["id"] = str(match["_id"])
+    
+    # Ensure backwards compatibility with legacy 1v1 matches
+    # If it's a multiplayer match, set player1 and player2 to None for schema compatibility
+    if match.get("players"):
+        if not match.get("player1"):
+            match["player1"] = None
+        if not match.get("player2"):
+            match["player2"] = None
+    
+    return MatchPublic(**match)
+
+def lobby_to_public(lobby: dict) -> LobbyPublic:
+    lobby = dict(lobby)
+    lobby["id"] = str(lobby["_id"])
+    return LobbyPublic(**lobby)
+
+# Spectators see progress and scores but never anyone's code or answers
+SPECTATOR_HIDDEN_PLAYER_FIELDS = {"code", "arranged_code", "shuffled_lines", "test_cases_created", "quiz_answers"}
+SPECTATOR_EXCLUDE = {
+    "buggy_code": True,
+    "quiz_questions": True,
+    "players": {"__all__": SPECTATOR_HIDDEN_PLAYER_FIELDS},
+    "player1": SPECTATOR_HIDDEN_PLAYER_FIELDS,
+    "player2": SPECTATOR_HIDDEN_PLAYER_FIELDS,
+}
+
+async def match_snapshot(match_oid: ObjectId, spectator: bool = False) -> Optional[Snapshot]:
+    """Shared serialized match view (player or spectator view), None if the match does not exist"""
+    async def load_version():
+        current = await match_store.find(match_oid, {"version": 1})
+        return current.get("version", 0) if current else None
+    
+    async def build():
+        # The change log is only served by /changes
+        match = await match_store.find(match_oid, {"changes": 0})
+        if not match:
+            return None
+        body = match_to_public(match).model_dump_json(exclude=SPECTATOR_EXCLUDE if spectator else None)
+        return Snapshot(match.get("version", 0), body.encode())
+    
+    key = ("match_spectator" if spectator else "match", str(match_oid))
+    return await snapshot_cache.get(key, load_version, build)
+
+async def lobby_snapshot(game_id: str) -> Optional[Snapshot]:
+    """Shared serialized lobby view, None if the lobby does not exist"""
+    db = get_database()
+    game_id = game_id.upper()
+    
+    async def load_version():
+        current = await db.lobbies.find_one({"game_id": game_id}, {"version": 1})
+        return current.get("version", 0) if current else None
+    
+    async def build():
+        lobby = await db.lobbies.find_one({"game_id": game_id})
+        if not lobby:
+            return None
+        return Snapshot(lobby.get("version", 0), lobby_to_public(lobby).model_dump_json().encode())
+    
+    return await snapshot_cache.get(("lobby", game_id), load_version, build)
+
+def snapshot_response(snapshot: Snapshot, if_none_match: Optional[str]) -> Response:
+    """Serve snapshot bytes as-is, or 304 when the client already has this version"""
+    etag = make_etag(snapshot.version)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return Response(content=snapshot.body, media_type="application/json", headers=cache_headers(etag))
+
+def invalidate_snapshots(channel: str, message: dict = None):
+    """Drop cached snapshots behind a match/lobby channel (runs on every node via the event bus)"""
+    kind, _, key = channel.partition(":")
+    if kind == "match":
+        match_id = key.split(":", 1)[0]
+        snapshot_cache.invalidate(("match", match_id))
+        snapshot_cache.invalidate(("match_spectator", match_id))
+    elif kind == "lobby":
+        snapshot_cache.invalidate(("lobby", key))
+
+event_bus.add_listener(invalidate_snapshots)
+
+async def broadcast_match(match_id: str, event: str, match: Optional[dict] = None):
+    """
+    Publish the current match state on the event bus for WebSocket subscribers.
+    
+    Pass the match document when the caller already has the fresh state;
+    otherwise it is read once here, and only if someone may be listening.
+    Every node fans the event out to its own subscribers and drops its cached
+    snapshots of the match. Spectators get the spectator view on their own channel.
+    """
+    channel = match_channel(match_id)
+    spectators = spectator_channel(match_id)
+    invalidate_snapshots(channel)
+    
+    players_listening = event_bus.has_listeners(channel)
+    spectators_listening = event_bus.has_listeners(spectators)
+    if not (players_listening or spectators_listening):
+        return
+    try:
+        if match is None:
+            match = await match_store.find(ObjectId(match_id), {"changes": 0})
+            if not match:
+                return
+        public = match_to_public(match)
+        if players_listening:
+            await event_bus.publish(channel, {"type": event, "match": public.model_dump(mode="json")})
+        if spectators_listening:
+            await event_bus.publish(spectators, {
+                "type": event,
+                "match": public.model_dump(mode="json", exclude=SPECTATOR_EXCLUDE)
+            })
+    except Exception as e:
+        print(f"⚠️ Failed to broadcast {event} for match {match_id}: {e}")
 
-def generate_game_id() -> str:
-    """Generate a unique 6-character game ID for lobby"""
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+async def broadcast_lobby(game_id: str, event: str, lobby: Optional[dict] = None):
+    """Publish the current lobby state on the event bus (see broadcast_match)"""
+    channel = lobby_channel(game_id)
+    invalidate_snapshots(channel)
+    if not event_bus.has_listeners(channel):
+        return
+    try:
+        if lobby is None:
+            lobby = await get_database().lobbies.find_one({"game_id": game_id.upper()})
+        # A deleted lobby closes the channel on every node
+        await event_bus.publish(channel, {
+            "type": event,
+            "lobby": lobby_to_public(lobby).model_dump(mode="json") if lobby else None
+        }, close=lobby is None)
+    except Exception as e:
+        print(f"⚠️ Failed to broadcast {event} for lobby {game_id}: {e}")
+
+async def serve_channel(websocket: WebSocket, channel: str, token: Optional[str], load_state):
+    """
+    Authenticate a WebSocket, subscribe it to ``channel`` and send the initial state.
+    
+    ``load_state`` returns the initial snapshot (already serialized), or None
+    when the match or lobby does not exist. Clients may send "ping" to keep the
+    connection alive.
+    """
+    await websocket.accept()
+    
+    user = await get_user_from_token(token) if token else None
+    if user is None:
+        await websocket.close(code=4401)
+        return
+    
+    # Subscribe before loading so no change between the read and the subscription is missed
+    realtime_hub.subscribe(channel, websocket)
+    try:
+        snapshot = await load_state()
+        if snapshot is None:
+            await websocket.close(code=4404)
+            return
+        
+        await websocket.send_text(snapshot)
+        
+        while True:
+            message = await websocket.receive_text()
+            if message == "ping":
+                await websocket.send_json({"type": "pong"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        realtime_hub.unsubscribe(channel, websocket)
+
+async def insert_lobby(lobby_doc: dict) -> str:
+    """Insert a new lobby under a freshly allocated game code; returns the code"""
+    try:
+        lobby_doc["id"] = str(await game_codes.insert_lobby(lobby_doc))
+    except GameCodeUnavailable:
+        raise HTTPException(status_code=500, detail="Failed to generate unique game ID")
+    return lobby_doc["game_id"]
 
 async def create_quiz_lobby(db, lobby_in: LobbyCreate, current_user):
     """Create a Code Quiz lobby with AI-generated questions"""
@@ -455,19 +645,6 @@ async def create_quiz_lobby(db, lobby_in: LobbyCreate, current_user):
             detail=f"Failed to generate quiz questions: {str(e)}"
         )
     
-    # Generate unique game ID
-    game_id = generate_game_id()
-    
-    # Ensure game_id is unique
-    max_attempts = 10
-    attempt = 0
-    while await db.lobbies.find_one({"game_id": game_id, "status": {"$ne": "completed"}}) and attempt < max_attempts:
-        game_id = generate_game_id()
-        attempt += 1
-    
-    if attempt >= max_attempts:
-        raise HTTPException(status_code=500, detail="Failed to generate unique game ID")
-    
     # Create host player state
     host_player = {
         "user_id": current_user["id"],
@@ -489,7 +666,7 @@ async def create_quiz_lobby(db, lobby_in: LobbyCreate, current_user):
     
     # Create lobby document
     lobby_doc = {
-        "game_id": game_id,
+        "game_id": None,  # Allocated on insert
         "lobby_name": lobby_in.lobby_name or f"{current_user['username']}'s Quiz",
         "host_id": current_user["id"],
         "host_username": current_user["username"],
@@ -504,14 +681,16 @@ async def create_quiz_lobby(db, lobby_in: LobbyCreate, current_user):
         "quiz_questions": cleaned_questions,
         "status": "waiting",
         "created_at": datetime.utcnow(),
+        "expires_at": lobby_expiry(),
         "started_at": None,
         "completed_at": None,
+        "version": 1,
         "winner_id": None,
         "winners": []
     }
     
-    result = await db.lobbies.insert_one(lobby_doc)
-    lobby_doc["id"] = str(result.inserted_id)
+    game_id = await insert_lobby(lobby_doc)
+    await schedule_lobby_cleanup(game_id)
     
     print(f"✅ Created Code Quiz lobby: {game_id}")
     
@@ -539,44 +718,9 @@ async def create_lobby(
     
     competitive_mode = mode_mapping.get(lobby_in.game_mode, "standard")
     
-    # Generate fresh AI problems for each competitive match
-    print(f"🤖 Generating fresh AI-powered hard problems for {lobby_in.game_mode} mode...")
-    
+    # Claim 5 pre-generated hard problems for this specific match
     try:
-        # Always generate fresh hard problems for competitive matches to ensure variety
-        selected_problem_ids = []
-        
-        # Generate 5 hard problems for this specific match
-        for i in range(1, 6):
-            print(f"   Generating problem {i}/5 (Hard difficulty)...")
-            problem_data = generate_competitive_problem("hard")
-            
-            # Capitalize difficulty
-            difficulty_capitalized = "Hard"
-            problem_doc = {
-                "title": problem_data["title"],
-                "description": problem_data["description"],
-                "difficulty": difficulty_capitalized,
-                "testCases": problem_data["testCases"],
-                "examples": problem_data.get("examples", []),
-                "hint": problem_data.get("hint", ""),
-                "starterCode": problem_data.get("starterCode", {}),
-                "topics": ["competitive", "ai-generated", "hard"],
-                "created_for_competitive": True,
-                "competitive_mode": competitive_mode,
-                "videoUrl": "",
-                "referenceCode": problem_data.get("referenceCode", {"python": "", "cpp": "", "java": ""}),
-                "buggyCode": {},
-                "explanations": {"approach": [], "complexity": []},
-                "sampleTests": [],
-                "match_type": "custom_match",  # Mark as custom match problem
-                "generated_at": datetime.utcnow()
-            }
-            
-            result = await db.problems.insert_one(problem_doc)
-            selected_problem_ids.append(str(result.inserted_id))
-            print(f"   ✅ Generated: {problem_data['title']} (ID: {selected_problem_ids[-1]})")
-            
+        selected_problem_ids = await problem_pool.claim("hard", competitive_mode)
     except Exception as gen_error:
         print(f"❌ Error selecting problems: {str(gen_error)}")
         raise HTTPException(
@@ -596,19 +740,6 @@ async def create_lobby(
     if lobby_in.max_players < 2 or lobby_in.max_players > 15:
         raise HTTPException(status_code=400, detail="Max players must be between 2 and 15")
     
-    # Generate unique game ID
-    game_id = generate_game_id()
-    
-    # Ensure game_id is unique
-    max_attempts = 10
-    attempt = 0
-    while await db.lobbies.find_one({"game_id": game_id, "status": {"$ne": "completed"}}) and attempt < max_attempts:
-        game_id = generate_game_id()
-        attempt += 1
-    
-    if attempt >= max_attempts:
-        raise HTTPException(status_code=500, detail="Failed to generate unique game ID")
-    
     # Prepare game mode specific data for host
     shuffled_lines = None
     buggy_code_content = None
@@ -620,17 +751,7 @@ async def create_lobby(
         else:
             raise HTTPException(status_code=400, detail="Problem doesn't have reference code for Code Shuffle mode")
     elif lobby_in.game_mode == "bug_hunt":
-        existing_buggy = problem.get("buggyCode", {}).get("python", "")
-        if existing_buggy:
-            buggy_code_content = existing_buggy
-        else:
-            reference_code = problem.get("referenceCode", {}).get("python", "")
-            if reference_code:
-                buggy_code_content = generate_buggy_code(reference_code, "python")
-            else:
-                starter_code = problem.get("starterCode", {}).get("python", "")
-                if starter_code:
-                    buggy_code_content = generate_buggy_code(starter_code, "python")
+        buggy_code_content = select_buggy_code(problem, "python")
     
     # Create host player state
     host_player = {
@@ -655,7 +776,7 @@ async def create_lobby(
     
     # Create lobby document
     lobby_doc = {
-        "game_id": game_id,
+        "game_id": None,  # Allocated on insert
         "lobby_name": lobby_in.lobby_name or f"{current_user['username']}'s Game",
         "host_id": current_user["id"],
         "host_username": current_user["username"],
@@ -668,16 +789,18 @@ async def create_lobby(
         "players": [host_player],
         "buggy_code": buggy_code_content,
         "shuffled_lines": shuffled_lines,  # Store at lobby level for consistency
-        "status": "waiting",  # waiting, starting, active, completed
+        "status": "waiting",  # waiting, starting, active, completed, expired
         "created_at": datetime.utcnow(),
+        "expires_at": lobby_expiry(),
         "started_at": None,
         "completed_at": None,
+        "version": 1,
         "winner_id": None,
         "winners": []
     }
     
-    result = await db.lobbies.insert_one(lobby_doc)
-    lobby_doc["id"] = str(result.inserted_id)
+    game_id = await insert_lobby(lobby_doc)
+    await schedule_lobby_cleanup(game_id)
     
     return LobbyPublic(**lobby_doc)
 
@@ -712,6 +835,8 @@ async def join_lobby(
                 raise HTTPException(status_code=400, detail="Game has already started. Cannot join.")
             elif status == "completed":
                 raise HTTPException(status_code=400, detail="Game has already ended. Cannot join.")
+            elif status == "expired":
+                raise HTTPException(status_code=400, detail="Lobby expired after nobody was active in it. Cannot join.")
             else:
                 raise HTTPException(status_code=400, detail=f"Lobby is not accepting players (status: {status})")
         else:
@@ -752,7 +877,7 @@ async def join_lobby(
             "status": "waiting",
             "$expr": {"$lt": [{"$size": "$players"}, "$max_players"]}
         },
-        {"$push": {"players": new_player}}
+        versioned({"$push": {"players": new_player}})
     )
 
     if result.modified_count == 0:
@@ -772,6 +897,8 @@ async def join_lobby(
     # Fetch updated lobby
     updated_lobby = await db.lobbies.find_one({"_id": lobby["_id"]})
     updated_lobby["id"] = str(updated_lobby["_id"])
+    await broadcast_lobby(join_req.game_id, "player_joined", updated_lobby)
+    await lobby_lifecycle.heartbeat(join_req.game_id)
     
     return {
         "message": f"Joined lobby: {updated_lobby['lobby_name']}",
@@ -809,22 +936,36 @@ async def list_lobbies(
 @router.get("/lobby/{game_id}", response_model=LobbyPublic)
 async def get_lobby(
     game_id: str,
+    if_none_match: Optional[str] = Header(None),
     current_user = Depends(get_current_user)
 ):
-    """Get details of a specific lobby by game ID"""
-    db = get_database()
-    
-    print(f"🔍 Fetching lobby: game_id={game_id}, user={current_user['username']}")
+    """
+    Get details of a specific lobby by game ID (and heartbeat it).
     
-    lobby = await db.lobbies.find_one({"game_id": game_id.upper()})
-    if not lobby:
+    All players polling a lobby share one cached serialized snapshot; responses
+    carry an ETag of the lobby version and If-None-Match gets a 304.
+    """
+    snapshot = await lobby_snapshot(game_id)
+    if snapshot is None:
         print(f"   ❌ Lobby not found: {game_id}")
         raise HTTPException(status_code=404, detail="Lobby not found")
     
-    print(f"   ✅ Lobby found: {lobby.get('lobby_name')}, status={lobby.get('status')}, players={len(lobby.get('players', []))}")
+    # Polling keeps a waiting lobby from expiring
+    await lobby_lifecycle.heartbeat(game_id)
+    return snapshot_response(snapshot, if_none_match)
+
+@router.websocket("/ws/lobby/{game_id}")
+async def lobby_updates(websocket: WebSocket, game_id: str, token: Optional[str] = Query(None)):
+    """
+    Push channel for a lobby: sends a snapshot on connect, then the full lobby
+    state when players join or leave, the host changes or the game starts.
+    A "lobby_closed" message with a null lobby is sent when the lobby is deleted.
+    """
+    async def load_state():
+        snapshot = await lobby_snapshot(game_id)
+        return f'{{"type": "snapshot", "lobby": {snapshot.body.decode()}}}' if snapshot else None
     
-    lobby["id"] = str(lobby["_id"])
-    return LobbyPublic(**lobby)
+    await serve_channel(websocket, lobby_channel(game_id), token, load_state)
 
 @router.post("/lobby/{game_id}/start")
 async def start_lobby(
@@ -865,17 +1006,22 @@ async def start_lobby(
         "winners": [],
         "created_at": lobby["created_at"],
         "started_at": datetime.utcnow(),
-        "completed_at": None
+        "completed_at": None,
+        "version": 1
     }
+    match_doc["deadline_at"] = match_deadline(match_doc["started_at"], match_doc["time_limit_seconds"])
     
     # Add quiz-specific fields if Code Quiz mode
     if lobby["game_mode"] == "code_quiz":
         match_doc["quiz_language"] = lobby.get("quiz_language")
         match_doc["quiz_question_count"] = lobby.get("quiz_question_count")
         match_doc["quiz_questions"] = lobby.get("quiz_questions", [])
+        # Stored so question chunks can be $slice'd without loading the whole list
+        match_doc["quiz_total_questions"] = len(match_doc["quiz_questions"])
     
     result = await db.matches.insert_one(match_doc)
-    match_id = str(result.inserted_id)
+    match_oid = result.inserted_id
+    match_id = str(match_oid)
     
     # Update lobby status atomically to prevent multiple starts
     result = await db.lobbies.update_one(
@@ -883,20 +1029,23 @@ async def start_lobby(
             "_id": lobby["_id"],
             "status": "waiting"  # Ensure it's still waiting
         },
-        {
+        versioned({
             "$set": {
                 "status": "active",
                 "started_at": datetime.utcnow(),
                 "match_id": match_id
             }
-        }
+        })
     )
     
     if result.modified_count == 0:
         # Rollback match creation if lobby update failed
-        await db.matches.delete_one({"_id": result.inserted_id})
+        await db.matches.delete_one({"_id": match_oid})
         raise HTTPException(status_code=400, detail="Failed to start game. It may have already started.")
     
+    await scheduler.cancel("lobby_cleanup", game_id.upper())
+    await broadcast_lobby(game_id, "match_started")
+    
     return {
         "message": "Game started!",
         "match_id": match_id,
@@ -941,23 +1090,25 @@ async def leave_lobby(
                     "host_id": user_id,
                     "players.user_id": user_id 
                 },
-                {
+                versioned({
                     "$set": {
                         "host_id": new_host["user_id"],
                         "host_username": new_host["username"],
                         "players": updated_players
                     }
-                }
+                })
             )
             
             if result.modified_count == 0:
                 # Retry fetch to see what happened
                 return await leave_lobby(game_id, current_user)
-                
+            
+            await broadcast_lobby(game_id, "player_left")
             return {"message": f"Left lobby. New host: {new_host['username']}"}
         else:
             # No players left, safe to delete
             await db.lobbies.delete_one({"_id": lobby["_id"]})
+            await broadcast_lobby(game_id, "lobby_closed")
             return {"message": "Lobby closed (no players remaining)"}
     else:
         # Regular player leaving
@@ -966,14 +1117,16 @@ async def leave_lobby(
                 "_id": lobby["_id"],
                 "players.user_id": user_id
             },
-            {
+            versioned({
                 "$set": {"players": updated_players}
-            }
+            })
         )
         
         if result.modified_count == 0:
             # Player might have already left
             pass
+        else:
+            await broadcast_lobby(game_id, "player_left")
             
         return {"message": "Left lobby"}
 
@@ -1012,24 +1165,10 @@ async def create_match(
         if reference_code:
             shuffled_lines = shuffle_code_lines(reference_code)
     elif match_in.game_mode == "bug_hunt":
-        # Generate buggy code if not already in problem, or use existing buggyCode
-        existing_buggy = problem.get("buggyCode", {}).get("python", "")
-        if existing_buggy:
-            buggy_code_content = existing_buggy
-            print(f"🐛 Using existing buggy code from problem (length: {len(existing_buggy)})")
-        else:
-            # Generate buggy code from reference code, or fall back to starter code
-            reference_code = problem.get("referenceCode", {}).get("python", "")
-            starter_code = problem.get("starterCode", {}).get("python", "")
-            
-            code_to_bug = reference_code if reference_code else starter_code
-            print(f"🐛 Generating buggy code from {'referenceCode' if reference_code else 'starterCode'}")
-            print(f"   Original code length: {len(code_to_bug)}")
-            if code_to_bug:
-                buggy_code_content = generate_buggy_code(code_to_bug, "python")
-                print(f"   Generated buggy code length: {len(buggy_code_content)}")
-            else:
-                print(f"   ⚠️ No code available to generate bugs from!")
+        # Prefer a verified buggy variant, fall back to stored or generated buggy code
+        buggy_code_content = select_buggy_code(problem, "python")
+        if not buggy_code_content:
+            print(f"   ⚠️ No code available to generate bugs from!")
     
     # Create match document
     match_doc = {
@@ -1067,7 +1206,8 @@ async def create_match(
         "winner_id": None,
         "created_at": datetime.utcnow(),
         "started_at": None,
-        "completed_at": None
+        "completed_at": None,
+        "version": 1
     }
     
     result = await db.matches.insert_one(match_doc)
@@ -1100,36 +1240,124 @@ async def list_matches(
         doc["id"] = str(doc["_id"])
         results.append(MatchPublic(**doc))
     
+    # Older history lives in the archive
+    if len(results) < 50 and status in (None, "completed"):
+        for doc in await match_archive.find_matches(query, 50 - len(results)):
+            doc["id"] = str(doc["_id"])
+            results.append(MatchPublic(**doc))
+    
     return results
 
 @router.get("/matches/{match_id}", response_model=MatchPublic)
 async def get_match(
     match_id: str,
+    if_none_match: Optional[str] = Header(None),
     current_user = Depends(get_current_user)
 ):
-    """Get details of a specific match (supports both 1v1 and multiplayer)"""
-    db = get_database()
+    """
+    Get details of a specific match (supports both 1v1 and multiplayer).
     
+    Served from a shared serialized snapshot of the latest version. Responses
+    carry an ETag of the match version; If-None-Match gets a 304. Matches moved
+    to the archive are served from there.
+    """
     try:
         match_oid = ObjectId(match_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid match id")
     
-    match = await db.matches.find_one({"_id": match_oid})
-    if not match:
+    snapshot = await match_snapshot(match_oid)
+    if snapshot is None:
+        archived = await match_archive.find_match(match_oid)
+        if archived is None:
+            raise HTTPException(status_code=404, detail="Match not found")
+        snapshot = Snapshot(archived.get("version", 0), match_to_public(archived).model_dump_json().encode())
+    
+    return snapshot_response(snapshot, if_none_match)
+
+@router.get("/matches/{match_id}/spectate")
+async def spectate_match(
+    match_id: str,
+    if_none_match: Optional[str] = Header(None),
+    current_user = Depends(get_current_user)
+):
+    """
+    Read-only spectator view of a match: players' progress, scores and ranks
+    without their code or answers. Every spectator shares one cached snapshot.
+    """
+    try:
+        match_oid = ObjectId(match_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid match id")
+    
+    snapshot = await match_snapshot(match_oid, spectator=True)
+    if snapshot is None:
         raise HTTPException(status_code=404, detail="Match not found")
     
-    match["id"] = str(match["_id"])
+    return snapshot_response(snapshot, if_none_match)
+
+@router.get("/matches/{match_id}/changes")
+async def get_match_changes(
+    match_id: str,
+    since: int = Query(..., ge=0),
+    current_user = Depends(get_current_user)
+):
+    """
+    Changes to a match since version ``since``.
+    
+    Returns {"version", "changes"} where each change lists the paths it set,
+    pushed or incremented (e.g. "players.3.completed") and the new values of
+    the small scalar ones (flags, scores, statuses); code, submissions and
+    answers are not included. When ``since`` is older
+    than the retained change log, returns {"version", "resync": true, "match"}
+    with the full match instead.
+    """
+    try:
+        match_oid = ObjectId(match_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid match id")
     
-    # Ensure backwards compatibility with legacy 1v1 matches
-    # If it's a multiplayer match, set player1 and player2 to None for schema compatibility
-    if match.get("players"):
-        if not match.get("player1"):
-            match["player1"] = None
-        if not match.get("player2"):
-            match["player2"] = None
+    log = await match_store.find(match_oid, {"version": 1, "changes": 1})
+    if not log:
+        raise HTTPException(status_code=404, detail="Match not found")
     
-    return MatchPublic(**match)
+    version = log.get("version", 0)
+    changes = changes_since(version, log.get("changes", []), since)
+    
+    if changes is None:
+        match = await match_store.find(match_oid, {"changes": 0})
+        if not match:
+            raise HTTPException(status_code=404, detail="Match not found")
+        return {"version": match.get("version", 0), "resync": True, "match": match_to_public(match)}
+    
+    return {"version": version, "changes": changes}
+
+@router.websocket("/ws/matches/{match_id}")
+async def match_updates(websocket: WebSocket, match_id: str, token: Optional[str] = Query(None)):
+    """
+    Push channel for a match: sends a snapshot on connect, then the full match
+    state on every join, leave, start, submission and completion.
+    """
+    async def load_state():
+        try:
+            snapshot = await match_snapshot(ObjectId(match_id))
+        except Exception:
+            return None
+        return f'{{"type": "snapshot", "match": {snapshot.body.decode()}}}' if snapshot else None
+    
+    await serve_channel(websocket, match_channel(match_id), token, load_state)
+
+@router.websocket("/ws/matches/{match_id}/spectate")
+async def spectator_updates(websocket: WebSocket, match_id: str, token: Optional[str] = Query(None)):
+    """Push channel for spectators: same events as the match channel, with the spectator view"""
+    async def load_state():
+        try:
+            snapshot = await match_snapshot(ObjectId(match_id), spectator=True)
+        except Exception:
+            return None
+        return f'{{"type": "snapshot", "match": {snapshot.body.decode()}}}' if snapshot else None
+    
+    await serve_channel(websocket, spectator_channel(match_id), token, load_state)
 
 @router.post("/matches/{match_id}/start")
 async def start_match(
@@ -1144,7 +1372,7 @@ async def start_match(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid match id")
     
-    match = await db.matches.find_one({"_id": match_oid})
+    match = await match_store.find(match_oid)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
@@ -1152,16 +1380,20 @@ async def start_match(
         raise HTTPException(status_code=400, detail="Match already started or completed")
     
     # Update match status
-    await db.matches.update_one(
-        {"_id": match_oid},
-        {
+    started_at = datetime.utcnow()
+    await match_store.update(
+        match_oid,
+        versioned_match({
             "$set": {
                 "status": "active",
-                "started_at": datetime.utcnow()
+                "started_at": started_at,
+                "deadline_at": match_deadline(started_at, match.get("time_limit_seconds"))
             }
-        }
+        })
     )
     
+    await broadcast_match(match_id, "match_started")
+    
     return {"message": "Match started", "match_id": match_id}
 
 @router.post("/matches/{match_id}/submit")
@@ -1178,27 +1410,20 @@ async def submit_solution(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid match id")
     
-    match = await db.matches.find_one({"_id": match_oid})
+    user_id = current_user["id"]
+    match, player_index = await match_repository.get_for_player(match_oid, user_id, SUBMISSION)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
     if match["status"] != "active":
         raise HTTPException(status_code=400, detail="Match is not active")
     
-    user_id = current_user["id"]
-    
     # Check if this is multiplayer match or 1v1
     is_multiplayer = match.get("players") is not None
     
     if is_multiplayer:
         # Multiplayer match
         players = match.get("players", [])
-        player_index = None
-        
-        for idx, player in enumerate(players):
-            if player.get("user_id") == user_id:
-                player_index = idx
-                break
         
         if player_index is None:
             raise HTTPException(status_code=403, detail="You are not a participant in this match")
@@ -1235,11 +1460,12 @@ async def submit_solution(
     if current_problem_index >= len(problem_ids):
         raise HTTPException(status_code=400, detail="All problems already completed")
     
-    # Get current problem
+    # Get grading context for the current problem (built once per match and problem)
     current_problem_id = problem_ids[current_problem_index]
-    problem = await db.problems.find_one({"_id": ObjectId(current_problem_id)})
-    if not problem:
+    grading = await grading_contexts.get(db, match, current_problem_id)
+    if not grading:
         raise HTTPException(status_code=404, detail="Problem not found")
+    problem = grading.problem
     
     game_mode = match.get("game_mode", "standard")
     
@@ -1249,10 +1475,7 @@ async def submit_solution(
     
     if game_mode == "bug_hunt":
         # Bug Hunt: Player must fix the buggy code and make it pass all test cases
-        test_cases = problem.get("testCases", [])
-        
-        # Filter out test cases with empty inputs to avoid EOF errors
-        valid_test_cases = [tc for tc in test_cases if tc.get("input", "").strip()]
+        valid_test_cases = grading.test_cases
         
         if not valid_test_cases:
             # If all test cases have empty inputs, we can't validate
@@ -1266,14 +1489,14 @@ async def submit_solution(
             print(f"[BUG_HUNT] Testing against {len(valid_test_cases)} valid test cases")
             
             for test_case in valid_test_cases:
-                test_input = test_case.get("input", "").strip()
                 result = await code_executor.execute_code(
                     submission.code,
                     submission.language,
-                    test_input
+                    test_case.input,
+                    grading.execution_timeout
                 )
                 
-                if not result["success"] or result["output"].strip() != test_case.get("expected", "").strip():
+                if not grading.passes(result, test_case):
                     all_passed = False
                     failed_test = test_case
                     break
@@ -1281,7 +1504,7 @@ async def submit_solution(
         if not all_passed and valid_test_cases:
             error_msg = "Code still has bugs! Fix them and try again."
             if failed_test:
-                error_msg += f" Failed on input: {failed_test.get('input', 'N/A')}"
+                error_msg += f" Failed on input: {failed_test.input or 'N/A'}"
             raise HTTPException(status_code=400, detail=error_msg)
         
         score = 100  # Full score for passing all tests
@@ -1291,27 +1514,36 @@ async def submit_solution(
         if not submission.arranged_lines:
             raise HTTPException(status_code=400, detail="No arranged lines provided")
         
-        reference_code = problem.get("referenceCode", {}).get(submission.language, "")
+        reference_code = grading.reference_code.get(submission.language, "")
         if not reference_code:
             raise HTTPException(status_code=400, detail="No reference code available")
         
         # Join arranged lines with indentation normalization
         arranged_code = normalize_code_indentation(submission.arranged_lines)
         
-        # Execute the arranged code against test cases
-        test_cases = problem.get("testCases", [])
-        
         # Validate that problem has test cases with inputs
-        if not test_cases:
+        if not grading.total_test_cases:
             raise HTTPException(status_code=400, detail="Problem has no test cases defined")
         
-        # Check if test cases have empty inputs (malformed test data)
-        valid_test_cases = [tc for tc in test_cases if tc.get("input", "").strip()]
+        # Test cases with empty inputs (malformed test data) are already filtered out
+        valid_test_cases = grading.test_cases
+        verdict_key = shuffle_verdict_cache.arrangement_key(submission.language, arranged_code)
+        cached_verdict = shuffle_verdict_cache.get(current_problem_id, verdict_key)
+        
         if not valid_test_cases:
             print(f"  ⚠️ WARNING: All test cases have empty inputs! Using arrangement anyway.")
             # If all test cases are empty, consider the arrangement valid (test data issue, not code issue)
             score = 100
             all_passed = True
+        elif matches_reference_order(reference_code, submission.arranged_lines):
+            # Identical to the reference solution - nothing to execute
+            print(f"🔀 Code Shuffle arrangement matches reference order, skipping execution")
+            all_passed = True
+        elif cached_verdict is not None:
+            print(f"🔀 Code Shuffle arrangement verdict served from cache")
+            all_passed = cached_verdict["all_passed"]
+            passed_count = cached_verdict["passed_count"]
+            failed_test = cached_verdict["failed_test"]
         else:
             all_passed = True
             passed_count = 0
@@ -1322,20 +1554,21 @@ async def submit_solution(
             print(f"  - Testing against {len(valid_test_cases)} valid test cases")
             
             for test_case in valid_test_cases:
-                test_input = test_case.get("input", "").strip()
+                test_input = test_case.input
                 
                 result = await code_executor.execute_code(
                     arranged_code,
                     submission.language,
-                    test_input
+                    test_input,
+                    grading.execution_timeout
                 )
                 
-                expected_output = test_case.get("expected", "").strip()
+                expected_output = test_case.expected
                 actual_output = result.get("output", "").strip()
                 
                 print(f"  - Test: input={test_input[:50]}{'...' if len(test_input) > 50 else ''}, expected={expected_output}, actual={actual_output}, success={result.get('success')}")
                 
-                if result["success"] and actual_output == expected_output:
+                if grading.passes(result, test_case):
                     passed_count += 1
                 else:
                     all_passed = False
@@ -1346,6 +1579,12 @@ async def submit_solution(
                             "actual": actual_output,
                             "error": result.get("error", "")
                         }
+            
+            shuffle_verdict_cache.put(current_problem_id, verdict_key, {
+                "all_passed": all_passed,
+                "passed_count": passed_count,
+                "failed_test": failed_test
+            })
         
         if not all_passed:
             error_msg = f"Arranged code doesn't pass all tests! ({passed_count}/{len(valid_test_cases)} passed)"
@@ -1370,21 +1609,36 @@ async def submit_solution(
         if not submission.test_cases:
             raise HTTPException(status_code=400, detail="No test cases provided")
         
-        reference_code = problem.get("referenceCode", {}).get(submission.language, "")
-        score = evaluate_test_cases(submission.test_cases, reference_code, submission.language)
+        reference_code = grading.reference_code.get(submission.language, "")
+        
+        # Score by mutation kill ratio; fall back to heuristics when mutants can't be run
+        mutation_result = await mutation_tester.score_test_cases(
+            current_problem_id,
+            reference_code,
+            submission.language,
+            submission.test_cases,
+            problem_tests=[{"input": tc.input, "expected": tc.expected} for tc in grading.test_cases]
+        )
+        if mutation_result is not None:
+            score = mutation_result["score"]
+        else:
+            score = evaluate_test_cases(submission.test_cases, reference_code, submission.language)
         
         # Require at least 60 points to pass
         if score < 60:
-            raise HTTPException(status_code=400, detail=f"Test cases quality too low: {score}/100. Need at least 60")
+            detail = f"Test cases quality too low: {score}/100. Need at least 60"
+            if mutation_result is not None:
+                detail += f" (caught {mutation_result['killed']}/{mutation_result['total_mutants']} bugs"
+                if mutation_result["invalid_tests"]:
+                    detail += f", {len(mutation_result['invalid_tests'])} test(s) don't match the correct solution"
+                detail += ")"
+            raise HTTPException(status_code=400, detail=detail)
         
         all_passed = True
     
     else:
-        # Standard mode: Execute code against test cases
-        test_cases = problem.get("testCases", [])
-        
-        # Filter out test cases with empty inputs to avoid EOF errors
-        valid_test_cases = [tc for tc in test_cases if tc.get("input", "").strip()]
+        # Standard mode: Execute code against test cases (empty inputs already filtered out)
+        valid_test_cases = grading.test_cases
         
         if not valid_test_cases:
             # If all test cases have empty inputs, we can't validate
@@ -1398,14 +1652,14 @@ async def submit_solution(
             print(f"[INFO] Standard mode: Testing against {len(valid_test_cases)} valid test cases")
             
             for test_case in valid_test_cases:
-                test_input = test_case.get("input", "").strip()
                 result = await code_executor.execute_code(
                     submission.code,
                     submission.language,
-                    test_input
+                    test_case.input,
+                    grading.execution_timeout
                 )
                 
-                if result["success"] and result["output"].strip() == test_case.get("expected", "").strip():
+                if grading.passes(result, test_case):
                     passed_count += 1
                 else:
                     all_passed = False
@@ -1419,7 +1673,7 @@ async def submit_solution(
     time_elapsed = (datetime.utcnow() - match["started_at"]).total_seconds()
     
     # Calculate final score with time bonus
-    time_limit = match.get("time_limit_seconds", 1800)
+    time_limit = grading.time_limit_seconds
     time_ratio = min(time_elapsed / time_limit, 1.0)
     time_bonus = int((1 - time_ratio) * 50)  # Up to 50 bonus points for speed
     final_score = score + time_bonus
@@ -1459,71 +1713,35 @@ async def submit_solution(
             update_data[f"players.{player_index}.test_cases_score"] = score
         
         # Add submission record to array
-        await db.matches.update_one(
-            {"_id": match_oid},
-            {
+        await match_store.update(
+            match_oid,
+            versioned_match({
                 "$set": update_data,
                 "$push": {f"players.{player_index}.submissions": submission_record}
-            }
+            })
         )
         
         # Check if all players completed
-        updated_match = await db.matches.find_one({"_id": match_oid})
+        updated_match = await match_store.find(match_oid)
         all_completed = all(p.get("completed", False) for p in updated_match.get("players", []))
         
+        if not all_completed:
+            await broadcast_match(match_id, "submission", updated_match)
+        
         if all_completed:
             # Rank players by score (higher is better), then by time (faster is better)
-            players_with_rank = sorted(
-                updated_match["players"],
-                key=lambda p: (-p.get("score", 0), p.get("time_elapsed", float('inf')))
-            )
+            players_with_rank = sorted(updated_match["players"], key=multiplayer_score_key)
             
-            # Assign ranks and update
-            for rank, player in enumerate(players_with_rank, 1):
-                await db.matches.update_one(
-                    {
-                        "_id": match_oid,
-                        "players.user_id": player["user_id"]
-                    },
-                    {"$set": {"players.$.rank": rank}}
-                )
-            
-            # Get top 3 winners
-            winners = [p["user_id"] for p in players_with_rank[:3]]
-            winner_id = winners[0] if winners else None
-            
-            # Mark match as completed
-            await db.matches.update_one(
-                {"_id": match_oid},
-                {
-                    "$set": {
-                        "status": "completed",
-                        "completed_at": datetime.utcnow(),
-                        "winner_id": winner_id,
-                        "winners": winners
-                    }
-                }
+            # Ranks, winners and status in one transition; a concurrent last submission finalizes nothing
+            await finalize_match(
+                match_oid,
+                completion_update(updated_match["players"], players_with_rank),
+                placement_reward_ops(players_with_rank)
             )
             
-            # Update player stats (XP, rating for top 3)
-            for rank, player in enumerate(players_with_rank[:3], 1):
-                if player["user_id"] != "bot":  # Don't update bots
-                    xp_gain = 100 if rank == 1 else (50 if rank == 2 else 25)
-                    rating_gain = 30 if rank == 1 else (15 if rank == 2 else 5)
-                    
-                    await db.users.update_one(
-                        {"_id": ObjectId(player["user_id"])},
-                        {
-                            "$inc": {
-                                "xp": xp_gain,
-                                "rating": rating_gain
-                            }
-                        }
-                    )
-            
             # Return complete player information for leaderboard
             # Fetch fresh match data to ensure all players are included
-            fresh_match = await db.matches.find_one({"_id": match_oid})
+            fresh_match = await match_store.find(match_oid)
             fresh_players = fresh_match.get("players", [])
             
             if fresh_players:
@@ -1567,11 +1785,11 @@ async def submit_solution(
             if new_problem_index < total_problems:
                 # Get next problem for this player
                 next_problem_id = problem_ids[new_problem_index]
-                next_problem = await db.problems.find_one({"_id": ObjectId(next_problem_id)})
+                next_grading = await grading_contexts.get(db, match, next_problem_id)
                 
-                if next_problem:
-                    # Convert ObjectId to string for JSON serialization
-                    next_problem["_id"] = str(next_problem["_id"])
+                if next_grading:
+                    # Copy with ObjectId converted to string for JSON serialization
+                    next_problem = next_grading.public_problem()
                     
                     return {
                         "message": f"Problem {new_problems_solved}/{total_problems} solved! Loading next problem...",
@@ -1631,16 +1849,19 @@ async def submit_solution(
             update_data[f"{player_key}.test_cases_score"] = score
         
         # Update with submission record
-        await db.matches.update_one(
-            {"_id": match_oid},
-            {
+        await match_store.update(
+            match_oid,
+            versioned_match({
                 "$set": update_data,
                 "$push": {f"{player_key}.submissions": submission_record}
-            }
+            })
         )
         
         # Check if match is complete (both players submitted or time limit exceeded)
-        match = await db.matches.find_one({"_id": match_oid})
+        match = await match_store.find(match_oid)
+        
+        if not (match["player1"]["completed"] and match["player2"]["completed"]):
+            await broadcast_match(match_id, "submission", match)
         
         if match["player1"]["completed"] and match["player2"]["completed"]:
             # Determine winner (fastest time wins)
@@ -1654,12 +1875,17 @@ async def submit_solution(
             winner = match[winner_key]
             loser = match[loser_key]
             
-            # Get current ratings
-            winner_user = await db.users.find_one({"_id": ObjectId(winner["user_id"])})
-            loser_user = await db.users.find_one({"_id": ObjectId(loser["user_id"])})
+            # Get current ratings of both players in one read
+            ratings = {
+                str(user["_id"]): user.get("rating", 1200)
+                async for user in db.users.find(
+                    {"_id": {"$in": [ObjectId(p["user_id"]) for p in (winner, loser) if ObjectId.is_valid(p["user_id"])]}},
+                    {"rating": 1}
+                )
+            }
             
-            winner_rating = winner_user.get("rating", 1200) if winner_user else 1200
-            loser_rating = loser_user.get("rating", 1200) if loser_user else 1200
+            winner_rating = ratings.get(winner["user_id"], 1200)
+            loser_rating = ratings.get(loser["user_id"], 1200)
             
             # Calculate rating changes
             rating_change = calculate_rating_change(
@@ -1673,38 +1899,16 @@ async def submit_solution(
                 winner["used_hints"]
             )
             
-            # Update ratings and XP
-            if winner_user:
-                await db.users.update_one(
-                    {"_id": ObjectId(winner["user_id"])},
-                    {
-                        "$inc": {
-                            "rating": rating_change,
-                            "xp": xp_bonus
-                        }
-                    }
+            # Complete the match and update ratings/XP exactly once
+            await finalize_match(
+                match_oid,
+                {"$set": {"status": "completed", "winner_id": winner["user_id"], "completed_at": datetime.utcnow()}},
+                duel_reward_ops(
+                    winner["user_id"] if winner["user_id"] in ratings else None,
+                    loser["user_id"] if loser["user_id"] in ratings else None,
+                    rating_change,
+                    xp_bonus
                 )
-            
-            if loser_user:
-                await db.users.update_one(
-                    {"_id": ObjectId(loser["user_id"])},
-                    {
-                        "$inc": {
-                            "rating": -rating_change
-                        }
-                    }
-                )
-            
-            # Update match as completed
-            await db.matches.update_one(
-                {"_id": match_oid},
-                {
-                    "$set": {
-                        "status": "completed",
-                        "winner_id": winner["user_id"],
-                        "completed_at": datetime.utcnow()
-                    }
-                }
             )
             
             return MatchResult(
@@ -1735,11 +1939,11 @@ async def submit_solution(
             if new_problem_index < total_problems:
                 # Get next problem
                 next_problem_id = problem_ids[new_problem_index]
-                next_problem = await db.problems.find_one({"_id": ObjectId(next_problem_id)})
+                next_grading = await grading_contexts.get(db, match, next_problem_id)
                 
-                if next_problem:
-                    # Convert ObjectId to string for JSON serialization
-                    next_problem["_id"] = str(next_problem["_id"])
+                if next_grading:
+                    # Copy with ObjectId converted to string for JSON serialization
+                    next_problem = next_grading.public_problem()
                     
                     return {
                         "message": f"Problem {new_problems_solved}/{total_problems} solved! Loading next problem...",
@@ -1775,22 +1979,17 @@ async def use_hint(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid match id")
     
-    match = await db.matches.find_one({"_id": match_oid})
+    match = await match_repository.get(match_oid, DUEL_PLAYERS)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
-    user_id = current_user["id"]
-    
-    if match["player1"]["user_id"] == user_id:
-        player_key = "player1"
-    elif match["player2"]["user_id"] == user_id:
-        player_key = "player2"
-    else:
+    player_key = duel_player_key(match, current_user["id"])
+    if player_key is None:
         raise HTTPException(status_code=403, detail="You are not a participant in this match")
     
-    await db.matches.update_one(
-        {"_id": match_oid},
-        {"$set": {f"{player_key}.used_hints": True}}
+    await match_store.update(
+        match_oid,
+        versioned_match({"$set": {f"{player_key}.used_hints": True}})
     )
     
     return {"message": "Hint used (XP bonus reduced)"}
@@ -1804,28 +2003,22 @@ async def leave_match(match_id: str, current_user: dict = Depends(get_current_us
     except:
         raise HTTPException(status_code=400, detail="Invalid match id")
     
-    match = await db.matches.find_one({"_id": match_oid})
+    user_id = current_user["id"]
+    match, player_index = await match_repository.get_for_player(match_oid, user_id, PARTICIPANTS)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
     if match.get("status") == "completed":
         raise HTTPException(status_code=400, detail="Match is already completed")
     
-    user_id = current_user["id"]
     is_multiplayer = match.get("players") is not None
     
     if is_multiplayer:
-        players = match.get("players", [])
-        player_index = None
-        for idx, player in enumerate(players):
-            if player["user_id"] == user_id:
-                player_index = idx
-                break
-        
         if player_index is None:
             raise HTTPException(status_code=403, detail="Not a participant")
         
-        await db.matches.update_one({"_id": match_oid}, {"$set": {f"players.{player_index}.completed": True}})
+        await match_store.update(match_oid, versioned_match({"$set": {f"players.{player_index}.completed": True}}))
+        await broadcast_match(match_id, "player_left")
     else:
         player1_id = match.get("player1", {}).get("user_id")
         player2_id = match.get("player2", {}).get("user_id")
@@ -1837,269 +2030,206 @@ async def leave_match(match_id: str, current_user: dict = Depends(get_current_us
         else:
             raise HTTPException(status_code=403, detail="Not a participant")
         
-        await db.matches.update_one(
-            {"_id": match_oid},
-            {"$set": {
-                "status": "completed",
-                "winner_id": winner_id,
-                "completed_at": datetime.utcnow()
-            }}
+        await finalize_match(
+            match_oid,
+            {"$set": {"status": "completed", "winner_id": winner_id, "completed_at": datetime.utcnow()}},
+            [],
+            from_status=match.get("status", "active")
         )
     
     return {"message": "Left match successfully"}
 
+async def select_matchmaking_problems(db, game_mode: str) -> List[str]:
+    """Pick up to 5 pool problems for a matchmade match (AI generation when the pool is empty)"""
+    # Map game modes to competitive_mode
+    mode_mapping = {
+        "standard": "standard",
+        "bug_hunt": "bug_hunt",
+        "code_shuffle": "code_shuffle",
+        "test_master": "standard"
+    }
+    
+    competitive_mode = mode_mapping.get(game_mode, "standard")
+    print(f"🎲 Selecting random problem for {game_mode} mode (matchmaking)...")
+    
+    # Find all problems for this game mode
+    cursor = db.problems.find({
+        "created_for_competitive": True,
+        "competitive_mode": competitive_mode
+    })
+    
+    problems = await cursor.to_list(length=None)
+    
+    if not problems:
+        # Fallback to AI generation (validated like every pooled problem)
+        print(f"⚠️ No problems in pool, falling back to AI generation...")
+        difficulty = random.choice(["easy", "medium", "hard"])
+        selected_problem_ids = await problem_pool.claim(difficulty, competitive_mode, count=1)
+        print(f"✅ Generated 1 problem (ID: {selected_problem_ids[0]})")
+    else:
+        # Randomly select 5 problems from pool (or all available if <5)
+        num_problems = min(5, len(problems))
+        selected_problems = random.sample(problems, num_problems)
+        selected_problem_ids = [str(p["_id"]) for p in selected_problems]
+        print(f"✅ Selected {num_problems} problems for matchmaking:")
+        for i, p in enumerate(selected_problems, 1):
+            print(f"   {i}. {p['title']} ({p.get('difficulty', 'Unknown')})")
+    
+    return selected_problem_ids
+
+def duel_player(user_id: str, username: str, shuffled_lines: Optional[List[str]] = None, **extra) -> dict:
+    """A player slot of a legacy 1v1 match"""
+    return {
+        "user_id": user_id,
+        "username": username,
+        "code": "",
+        "completed": False,
+        "time_elapsed": 0.0,
+        "used_hints": False,
+        "submission_time": None,
+        "shuffled_lines": shuffled_lines,
+        "arranged_code": None,
+        "test_cases_created": None,
+        "test_cases_score": None,
+        # Multi-problem race fields
+        "current_problem_index": 0,
+        "problems_solved": 0,
+        "submissions": [],
+        **extra
+    }
+
+async def create_matchmade_match(ticket: Ticket, opponent: Optional[Ticket]) -> str:
+    """
+    Create the active 1v1 match for a pair claimed by the matchmaker, or
+    against a bot when ``opponent`` is None. Returns the match id.
+    """
+    db = get_database()
+    game_mode = ticket.game_mode
+    
+    if ticket.problem_id:
+        selected_problem_ids = [ticket.problem_id]
+    else:
+        selected_problem_ids = await select_matchmaking_problems(db, game_mode)
+    problem_id = selected_problem_ids[0]  # First problem ID for legacy compatibility
+    
+    # Prepare game mode specific data
+    problem = await db.problems.find_one({"_id": ObjectId(problem_id)})
+    shuffled_lines = None
+    buggy_code_content = None
+    
+    if game_mode == "code_shuffle" and problem:
+        reference_code = problem.get("referenceCode", {}).get("python", "")
+        if not reference_code:
+            raise ValueError("Selected problem doesn't have reference code for Code Shuffle mode")
+        shuffled_lines = shuffle_code_lines(reference_code)
+        print(f"🔀 Code Shuffle: {len(shuffled_lines)} shuffled lines for problem {problem_id}")
+    elif game_mode == "bug_hunt" and problem:
+        buggy_code_content = select_buggy_code(problem, "python")
+    
+    if opponent is not None:
+        player2 = duel_player(opponent.user_id, opponent.username, shuffled_lines)
+    else:
+        # Nobody within range in time - play against a bot of similar rating
+        bot_rating = ticket.rating + random.randint(-100, 100)
+        bot_names = ["CodeBot", "AlgoMaster", "PyThonBot", "JavaJedi", "CppNinja", "RustRacer", "GoGopher"]
+        player2 = duel_player("bot", random.choice(bot_names), shuffled_lines, is_bot=True, bot_rating=bot_rating)
+    
+    now = datetime.utcnow()
+    match_doc = {
+        "problem_id": problem_id,  # Legacy field (first problem)
+        "problem_ids": selected_problem_ids,  # Array of all problems
+        "total_problems": len(selected_problem_ids),
+        "game_mode": game_mode,
+        "buggy_code": buggy_code_content,
+        "player1": duel_player(ticket.user_id, ticket.username, shuffled_lines),
+        "player2": player2,
+        "time_limit_seconds": 900,
+        "status": "active",
+        "winner_id": None,
+        "created_at": now,
+        "started_at": now,
+        "completed_at": None,
+        "matchmaking": {"ratings": [ticket.rating, opponent.rating if opponent else player2["bot_rating"]]},
+        "version": 1
+    }
+    match_doc["deadline_at"] = match_deadline(now, match_doc["time_limit_seconds"])
+    
+    result = await db.matches.insert_one(match_doc)
+    match_id = str(result.inserted_id)
+    
+    if opponent is None:
+        # Bot submission runs as a durable timer on whichever node picks it up
+        await schedule_bot_completion(match_id, problem_id, player2["bot_rating"])
+    
+    return match_id
+
+matchmaker.set_match_factory(create_matchmade_match)
+
+def matchmaking_response(ticket: Ticket) -> dict:
+    result = ticket.to_public()
+    if ticket.status == "matched":
+        if ticket.opponent == "bot":
+            result["message"] = "Matched with bot opponent"
+            result["action"] = "bot_matched"
+        else:
+            result["message"] = f"Matched with {ticket.opponent}"
+            result["action"] = "matched"
+    elif ticket.status == "failed":
+        result["message"] = "Matchmaking failed, please try again"
+        result["action"] = "failed"
+    elif ticket.status == "cancelled":
+        result["message"] = "Matchmaking cancelled"
+        result["action"] = "cancelled"
+    else:
+        result["message"] = "Searching for an opponent"
+        result["action"] = "queued"
+    return result
+
 @router.post("/matchmaking")
 async def find_match(
     request: MatchmakingRequest,
+    wait: float = Query(MATCHMAKING_WAIT_SECONDS, ge=0, le=MATCHMAKING_WAIT_SECONDS),
     current_user = Depends(get_current_user)
 ):
-    """Find or create a competitive match (matchmaking) with specified game mode"""
-    try:
-        db = get_database()
-        user_id = current_user["id"]
-        user_rating = current_user.get("rating", 1200)
-        
-        game_mode = request.game_mode
-        problem_id = request.problem_id
-        
-        print(f"🎮 Matchmaking request: game_mode={game_mode}, user={current_user['username']}")
-        
-        # Find waiting matches within rating range (+/- 200)
-        query = {
-            "status": "waiting",
-            "game_mode": game_mode,
-            "$or": [
-                {"player1.user_id": {"$ne": user_id}},
-                {"player2.user_id": {"$ne": user_id}}
-            ]
-        }
-        
-        if problem_id:
-            query["problem_id"] = problem_id
-        
-        waiting_match = await db.matches.find_one(query)
-    except Exception as e:
-        print(f"❌ Error in matchmaking (query): {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    """
+    Join the matchmaking queue for a game mode.
     
-    if waiting_match:
-        # Join existing match
-        match_id = str(waiting_match["_id"])
-        
-        # Update player2 and auto-start the match
-        if not waiting_match.get("player2"):
-            await db.matches.update_one(
-                {"_id": waiting_match["_id"]},
-                {
-                    "$set": {
-                        "player2": {
-                            "user_id": user_id,
-                            "username": current_user["username"],
-                            "code": "",
-                            "completed": False,
-                            "time_elapsed": 0.0,
-                            "used_hints": False,
-                            "submission_time": None,
-                            # Multi-problem race fields
-                            "current_problem_index": 0,
-                            "problems_solved": 0,
-                            "submissions": []
-                        },
-                        "status": "active",
-                        "started_at": datetime.utcnow()
-                    }
-                }
-            )
-        
-        return {"message": "Match found", "match_id": match_id, "action": "joined"}
-    else:
-        # Create new match and wait for opponent
-        # Select problem from pool instead of AI generation
-        try:
-            # Map game modes to competitive_mode
-            mode_mapping = {
-                "standard": "standard",
-                "bug_hunt": "bug_hunt",
-                "code_shuffle": "code_shuffle",
-                "test_master": "standard"
-            }
-            
-            competitive_mode = mode_mapping.get(game_mode, "standard")
-            print(f"🎲 Selecting random problem for {game_mode} mode (matchmaking)...")
-            
-            try:
-                # Find all problems for this game mode
-                cursor = db.problems.find({
-                    "created_for_competitive": True,
-                    "competitive_mode": competitive_mode
-                })
-                
-                problems = await cursor.to_list(length=None)
-                
-                if not problems:
-                    # Fallback to AI generation
-                    print(f"⚠️ No problems in pool, falling back to AI generation...")
-                    difficulty = random.choice(["easy", "medium", "hard"])
-                    problem_data = generate_competitive_problem(difficulty)
-                    
-                    difficulty_capitalized = difficulty.capitalize()
-                    problem_doc = {
-                        "title": problem_data["title"],
-                        "description": problem_data["description"],
-                        "difficulty": difficulty_capitalized,
-                        "testCases": problem_data["testCases"],
-                        "examples": problem_data.get("examples", []),
-                        "hint": problem_data.get("hint", ""),
-                        "starterCode": problem_data.get("starterCode", {}),
-                        "topics": ["competitive", "ai-generated"],
-                        "created_for_competitive": True,
-                        "videoUrl": "",
-                        "referenceCode": problem_data.get("referenceCode", {"python": "", "cpp": "", "java": ""}),
-                        "buggyCode": {},
-                        "explanations": {"approach": [], "complexity": []},
-                        "sampleTests": []
-                    }
-                    
-                    result = await db.problems.insert_one(problem_doc)
-                    selected_problem_ids = [str(result.inserted_id)]
-                    print(f"✅ Generated 1 problem: {problem_data['title']} (ID: {selected_problem_ids[0]})")
-                else:
-                    # Randomly select 5 problems from pool (or all available if <5)
-                    num_problems = min(5, len(problems))
-                    selected_problems = random.sample(problems, num_problems)
-                    selected_problem_ids = [str(p["_id"]) for p in selected_problems]
-                    print(f"✅ Selected {num_problems} problems for matchmaking:")
-                    for i, p in enumerate(selected_problems, 1):
-                        print(f"   {i}. {p['title']} ({p.get('difficulty', 'Unknown')})")
-                    
-                problem_id = selected_problem_ids[0]  # First problem ID for legacy compatibility
-            except Exception as gen_error:
-                print(f"❌ Error selecting problem: {str(gen_error)}")
-                raise HTTPException(
-                    status_code=500, 
-                    detail=f"Failed to select problem: {str(gen_error)}"
-                )
-        except HTTPException:
-            raise
-        except Exception as e:
-            print(f"❌ Error in problem selection: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Problem selection error: {str(e)}")
-        
-        try:
-            # Prepare game mode specific data
-            problem = await db.problems.find_one({"_id": ObjectId(problem_id)})
-            shuffled_lines = None
-            buggy_code_content = None
-            
-            if game_mode == "code_shuffle" and problem:
-                reference_code = problem.get("referenceCode", {}).get("python", "")
-                print(f"🔀 Code Shuffle Mode:")
-                print(f"  - Problem ID: {problem_id}")
-                print(f"  - Problem title: {problem.get('title', 'N/A')}")
-                print(f"  - Problem has referenceCode: {bool(reference_code)}")
-                if reference_code:
-                    print(f"  - Reference code length: {len(reference_code)} chars")
-                    shuffled_lines = shuffle_code_lines(reference_code)
-                    print(f"  - Generated {len(shuffled_lines) if shuffled_lines else 0} shuffled lines")
-                else:
-                    print(f"  - ❌ No reference code found for problem!")
-                    # This shouldn't happen if our query is correct, but handle it gracefully
-                    raise HTTPException(
-                        status_code=400, 
-                        detail="Selected problem doesn't have reference code for Code Shuffle mode. Please try again or contact administrator."
-                    )
-            elif game_mode == "bug_hunt" and problem:
-                # Generate buggy code if not already in problem
-                existing_buggy = problem.get("buggyCode", {}).get("python", "")
-                if existing_buggy:
-                    buggy_code_content = existing_buggy
-                else:
-                    reference_code = problem.get("referenceCode", {}).get("python", "")
-                    if reference_code:
-                        buggy_code_content = generate_buggy_code(reference_code, "python")
-            
-            match_doc = {
-                "problem_id": problem_id,  # Legacy field (first problem)
-                "problem_ids": selected_problem_ids,  # Array of all problems
-                "total_problems": len(selected_problem_ids),
-                "game_mode": game_mode,
-                "buggy_code": buggy_code_content,
-                "player1": {
-                    "user_id": user_id,
-                    "username": current_user["username"],
-                    "code": "",
-                    "completed": False,
-                    "time_elapsed": 0.0,
-                    "used_hints": False,
-                    "submission_time": None,
-                    "shuffled_lines": shuffled_lines,
-                    "arranged_code": None,
-                    "test_cases_created": None,
-                    "test_cases_score": None,
-                    # Multi-problem race fields
-                    "current_problem_index": 0,
-                    "problems_solved": 0,
-                    "submissions": []
-                },
-                "player2": None,  # Will be filled when opponent joins
-                "time_limit_seconds": 900,
-                "status": "waiting",
-                "winner_id": None,
-                "created_at": datetime.utcnow(),
-                "started_at": None,
-                "completed_at": None
-            }
-            
-            result = await db.matches.insert_one(match_doc)
-            match_id = str(result.inserted_id)
-            
-            # Check for waiting opponent with a short timeout (2 seconds)
-            # If no opponent found, create a bot opponent
-            await asyncio.sleep(2)
-            
-            # Refresh match to check if someone joined
-            updated_match = await db.matches.find_one({"_id": result.inserted_id})
-            
-            if not updated_match.get("player2"):
-                # No opponent found - create a bot opponent
-                bot_rating = user_rating + random.randint(-100, 100)
-                bot_names = ["CodeBot", "AlgoMaster", "PyThonBot", "JavaJedi", "CppNinja", "RustRacer", "GoGopher"]
-                bot_name = random.choice(bot_names)
-                
-                await db.matches.update_one(
-                    {"_id": result.inserted_id},
-                    {
-                        "$set": {
-                            "player2": {
-                                "user_id": "bot",
-                                "username": bot_name,
-                                "code": "",
-                                "completed": False,
-                                "time_elapsed": 0.0,
-                                "used_hints": False,
-                                "submission_time": None,
-                                "is_bot": True,
-                                "bot_rating": bot_rating,
-                                "shuffled_lines": shuffled_lines,
-                                "arranged_code": None,
-                                "test_cases_created": None,
-                                "test_cases_score": None
-                            },
-                            "status": "active",
-                            "started_at": datetime.utcnow()
-                        }
-                    }
-                )
-                
-                # Start bot simulation in background
-                asyncio.create_task(simulate_bot_completion(match_id, problem_id, bot_rating))
-                
-                return {"message": f"Matched with bot opponent: {bot_name}", "match_id": match_id, "action": "bot_matched"}
-        except Exception as e:
-            print(f"❌ Error creating match: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Match creation error: {str(e)}")
-        
-        return {"message": "Match created, waiting for opponent", "match_id": match_id, "action": "created"}
+    Players are paired with the closest rating inside a window that widens
+    the longer they wait; after a while without an opponent they get a bot.
+    The request long-polls up to ``wait`` seconds: the response either has the
+    ``match_id`` or ``action: "queued"`` with a ``ticket_id`` to keep polling
+    at GET /matchmaking/{ticket_id}.
+    """
+    print(f"🎮 Matchmaking request: game_mode={request.game_mode}, user={current_user['username']}")
+    
+    ticket = matchmaker.enqueue(
+        current_user["id"],
+        current_user["username"],
+        current_user.get("rating", 1200),
+        request.game_mode,
+        request.problem_id
+    )
+    await ticket.wait(wait)
+    return matchmaking_response(ticket)
+
+@router.get("/matchmaking/{ticket_id}")
+async def poll_matchmaking(
+    ticket_id: str,
+    wait: float = Query(MATCHMAKING_WAIT_SECONDS, ge=0, le=MATCHMAKING_WAIT_SECONDS),
+    current_user = Depends(get_current_user)
+):
+    """Long-poll a matchmaking ticket until a match is found or ``wait`` seconds pass"""
+    ticket = matchmaker.get(ticket_id)
+    if ticket is None or ticket.user_id != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Matchmaking ticket not found")
+    
+    await ticket.wait(wait)
+    return matchmaking_response(ticket)
+
+@router.delete("/matchmaking")
+async def cancel_matchmaking(current_user = Depends(get_current_user)):
+    """Leave the matchmaking queue"""
+    return {"cancelled": matchmaker.cancel(current_user["id"])}
 
 @router.get("/leaderboard")
 async def get_competitive_leaderboard(
@@ -2125,6 +2255,14 @@ async def get_competitive_leaderboard(
     
     return leaderboard
 
+@router.get("/generation/metrics")
+async def generation_metrics(current_user = Depends(get_current_user)):
+    """Generation client health: circuit breaker state, call counters and fallback rates (requires admin)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return llm_client.stats()
+
 @router.post("/generate-problem")
 async def generate_random_problem(
     difficulty: str = "easy",
@@ -2138,33 +2276,15 @@ async def generate_random_problem(
     
     db = get_database()
     
-    # Generate problem
-    problem_data = generate_competitive_problem(difficulty)
-    
-    # Capitalize difficulty for schema validation
-    difficulty_capitalized = difficulty.capitalize() if difficulty in ["easy", "medium", "hard"] else "Easy"
-    
-    # Insert into database
-    problem_doc = {
-        "title": problem_data["title"],
-        "description": problem_data["description"],
-        "difficulty": difficulty_capitalized,
-        "testCases": problem_data["testCases"],
-        "examples": problem_data.get("examples", []),
-        "hint": problem_data.get("hint", ""),
-        "starterCode": problem_data.get("starterCode", {}),
-        "topics": ["competitive"],
-        "created_for_competitive": True,
-        # Required fields for ProblemPublic schema
-        "videoUrl": "",
-        "referenceCode": {"python": "", "cpp": "", "java": ""},
-        "buggyCode": {},
-        "explanations": {"approach": [], "complexity": []},
-        "sampleTests": []
-    }
+    # Generate, validate and store the problem the same way as pooled problems
+    difficulty = difficulty if difficulty in ["easy", "medium", "hard"] else "easy"
+    try:
+        problem_id = await problem_pool.generate(difficulty, "standard")
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
     
-    result = await db.problems.insert_one(problem_doc)
-    problem_doc["id"] = str(result.inserted_id)
+    problem_doc = await db.problems.find_one({"_id": ObjectId(problem_id)})
+    problem_doc["id"] = str(problem_doc.pop("_id"))
     
     return {
         "message": "Problem generated successfully",
@@ -2199,7 +2319,7 @@ async def submit_quiz(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid match id")
     
-    match = await db.matches.find_one({"_id": match_oid})
+    match = await match_store.find(match_oid)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
@@ -2263,52 +2383,31 @@ async def submit_quiz(
         f"players.{player_index}.score": score_data["score"]
     }
     
-    await db.matches.update_one(
-        {"_id": match_oid},
-        {"$set": update_data}
+    await match_store.update(
+        match_oid,
+        versioned_match({"$set": update_data})
     )
     
     # Check if all players completed or time expired
-    updated_match = await db.matches.find_one({"_id": match_oid})
+    updated_match = await match_store.find(match_oid)
     all_players = updated_match.get("players", [])
     completed_players = [p for p in all_players if p.get("completed")]
     
     show_leaderboard = len(completed_players) == len(all_players)
+    if not show_leaderboard:
+        await broadcast_match(match_id, "submission", updated_match)
     
     # If all completed, calculate final rankings
     leaderboard = None
     if show_leaderboard:
         # Sort by score (descending), then by time (ascending)
-        ranked_players = sorted(
-            all_players,
-            key=lambda p: (-p.get("quiz_score", 0), p.get("quiz_time_taken", float('inf')))
-        )
+        ranked_players = sorted(all_players, key=quiz_score_key)
         
-        # Assign ranks
-        for rank, player in enumerate(ranked_players, 1):
-            await db.matches.update_one(
-                {
-                    "_id": match_oid,
-                    "players.user_id": player["user_id"]
-                },
-                {"$set": {"players.$.rank": rank}}
-            )
-        
-        # Get top 3 winners
-        winners = [p["user_id"] for p in ranked_players[:3]]
-        winner_id = winners[0] if winners else None
-        
-        # Mark match as completed
-        await db.matches.update_one(
-            {"_id": match_oid},
-            {
-                "$set": {
-                    "status": "completed",
-                    "completed_at": datetime.utcnow(),
-                    "winner_id": winner_id,
-                    "winners": winners
-                }
-            }
+        # Ranks, winners, status and XP/rating exactly once, even if two last answers race
+        await finalize_match(
+            match_oid,
+            completion_update(all_players, ranked_players),
+            placement_reward_ops(ranked_players)
         )
         
         # Build leaderboard
@@ -2323,22 +2422,6 @@ async def submit_quiz(
             }
             for rank, p in enumerate(ranked_players, 1)
         ]
-        
-        # Update player stats (XP, rating for top 3)
-        for rank, player in enumerate(ranked_players[:3], 1):
-            if player["user_id"] != "bot":
-                xp_gain = 100 if rank == 1 else (50 if rank == 2 else 25)
-                rating_gain = 30 if rank == 1 else (15 if rank == 2 else 5)
-                
-                await db.users.update_one(
-                    {"_id": ObjectId(player["user_id"])},
-                    {
-                        "$inc": {
-                            "xp": xp_gain,
-                            "rating": rating_gain
-                        }
-                    }
-                )
     
     return QuizSubmitResponse(
         score=score_data["score"],
@@ -2346,7 +2429,7 @@ async def submit_quiz(
         total=score_data["total"],
         time_bonus=score_data["time_bonus"],
         rank=None if not show_leaderboard else next(
-            (i + 1 for i, p in enumerate(sorted(all_players, key=lambda x: (-x.get("quiz_score", 0), x.get("quiz_time_taken", float('inf'))))) 
+            (i + 1 for i, p in enumerate(sorted(all_players, key=quiz_score_key)) 
              if p["user_id"] == user_id),
             None
         ),
@@ -2360,9 +2443,11 @@ async def submit_quiz(
 @router.get("/matches/{match_id}/quiz-results")
 async def get_quiz_results(
     match_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user = Depends(get_current_user)
 ):
-    """Get detailed quiz results with correct answers and explanations"""
+    """Get detailed quiz results with correct answers and explanations (ETag/304 like get_match)"""
     db = get_database()
     
     try:
@@ -2370,7 +2455,15 @@ async def get_quiz_results(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid match id")
     
-    match = await db.matches.find_one({"_id": match_oid})
+    # Results are per player, so the ETag includes the user
+    if if_none_match:
+        current = await match_store.find(match_oid, {"version": 1})
+        if current:
+            etag = make_etag(current.get("version", 0), current_user["id"])
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=cache_headers(etag))
+    
+    match = await match_store.find(match_oid)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
@@ -2444,6 +2537,7 @@ async def get_quiz_results(
         if is_correct:
             score_breakdown["by_type"][question_type]["correct"] += 1
     
+    response.headers.update(cache_headers(make_etag(match.get("version", 0), user_id)))
     return {
         "questions": results,
         "score_breakdown": score_breakdown
@@ -2464,7 +2558,7 @@ async def save_quiz_progress(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid match id")
     
-    match = await db.matches.find_one({"_id": match_oid})
+    match, player_index = await match_repository.get_for_player(match_oid, current_user["id"], QUIZ_PROGRESS)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
@@ -2474,22 +2568,11 @@ async def save_quiz_progress(
     if match["status"] != "active":
         raise HTTPException(status_code=400, detail="Match is not active")
     
-    user_id = current_user["id"]
-    
-    # Find player
-    players = match.get("players", [])
-    player_index = None
-    
-    for idx, player in enumerate(players):
-        if player.get("user_id") == user_id:
-            player_index = idx
-            break
-    
     if player_index is None:
         raise HTTPException(status_code=403, detail="You are not a participant in this match")
     
     # Check if already completed
-    if players[player_index].get("completed"):
+    if match["players"][player_index].get("completed"):
         return {"message": "Quiz already submitted", "saved": False}
     
     # Save progress (answers and current question)
@@ -2499,9 +2582,9 @@ async def save_quiz_progress(
         f"players.{player_index}.last_saved_at": datetime.utcnow()
     }
     
-    await db.matches.update_one(
-        {"_id": match_oid},
-        {"$set": update_data}
+    await match_store.update(
+        match_oid,
+        versioned_match({"$set": update_data})
     )
     
     return {
@@ -2527,25 +2610,26 @@ async def get_quiz_questions_chunk(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid match id")
     
-    match = await db.matches.find_one({"_id": match_oid})
+    # Only the requested questions are loaded ($slice)
+    match, player_index = await match_repository.get_for_player(
+        match_oid, current_user["id"], quiz_chunk(start, max(end - start, 1))
+    )
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
     if match.get("game_mode") != "code_quiz":
         raise HTTPException(status_code=400, detail="This endpoint is only for Code Quiz mode")
     
-    user_id = current_user["id"]
-    
     # Verify player is in match
-    players = match.get("players", [])
-    is_participant = any(p.get("user_id") == user_id for p in players)
-    
-    if not is_participant:
+    if player_index is None:
         raise HTTPException(status_code=403, detail="You are not a participant in this match")
     
-    # Get quiz questions
-    quiz_questions = match.get("quiz_questions", [])
-    total_questions = len(quiz_questions)
+    chunk = match.get("quiz_questions", [])
+    total_questions = match.get("quiz_total_questions")
+    if total_questions is None:
+        # Matches created before the count was stored: count the questions once
+        full = await match_repository.get(match_oid, {"quiz_questions": 1})
+        total_questions = len(full.get("quiz_questions", []))
     
     # Validate range
     if start >= total_questions:
@@ -2559,9 +2643,7 @@ async def get_quiz_questions_chunk(
     
     # Clamp end to total questions
     end = min(end, total_questions)
-    
-    # Get chunk
-    chunk = quiz_questions[start:end]
+    chunk = chunk[:max(end - start, 0)]
     
     # Remove correct answers from response (don't reveal during quiz)
     safe_chunk = []
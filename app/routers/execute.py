@@ -16,6 +16,7 @@ class TestCaseExecutionRequest(BaseModel):
     code: str
     language: str
     test_cases: List[Dict[str, Any]]
+    comparator: Optional[Any] = None  # exact | token | float | unordered, or {"mode": ..., options}
 
 # Optional authentication - allows both authenticated and anonymous users
 async def get_optional_user(current_user = Depends(get_current_user)):
@@ -54,7 +55,8 @@ async def run_test_cases(
     result = await code_executor.run_test_cases(
         code=request.code,
         language=request.language,
-        test_cases=request.test_cases
+        test_cases=request.test_cases,
+        comparator=request.comparator
     )
     return result
 
@@ -54,10 +54,11 @@ class LobbyPublic(BaseModel):
     time_limit_seconds: int
     max_players: int
     players: List[MatchPlayerState]
-    status: str  # waiting, starting, active, completed
+    status: str  # waiting, starting, active, completed, expired
     match_id: Optional[str] = None  # Match ID when game starts
     created_at: datetime
     started_at: Optional[datetime] = None
+    version: int = 0  # Bumped on every mutation (ETag of GET /lobby/{game_id})
     # Quiz-specific fields
     quiz_language: Optional[str] = None
     quiz_question_count: Optional[int] = None
@@ -91,6 +92,7 @@ class MatchBase(BaseModel):
     created_at: datetime
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    version: int = 0  # Bumped on every mutation (ETag of GET /matches/{id})
     # Quiz-specific fields
     quiz_language: Optional[str] = None
     quiz_question_count: Optional[int] = None
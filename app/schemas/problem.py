@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Union
 
 class SampleTest(BaseModel):
     id: int
@@ -23,6 +23,7 @@ class ProblemBase(BaseModel):
     videoUrl: str
     referenceCode: Dict[str, str]  # python, cpp, java
     buggyCode: Dict[str, str] = {}  # Code with intentional bugs for R2
+    buggyCodeVariants: Dict[str, List[str]] = {}  # Verified buggy variants for Bug Hunt, per language
     explanations: Dict[str, List[str]]
     sampleTests: List[SampleTest]
     # Additional fields for competitive problems
@@ -30,6 +31,9 @@ class ProblemBase(BaseModel):
     testCases: Optional[List[TestCase]] = []
     starterCode: Optional[Dict[str, str]] = {}
     hint: Optional[str] = ""
+    # Output comparison: "exact" (default), "token", "float", "unordered",
+    # or a dict such as {"mode": "float", "abs_tol": 1e-4}
+    comparator: Optional[Union[str, Dict[str, Any]]] = None
 
 class ProblemCreate(ProblemBase):
     pass
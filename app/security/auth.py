@@ -42,22 +42,29 @@ async def get_user_by_id(user_id: str):
     user["id"] = str(user["_id"])
     return user
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def get_user_from_token(token: str):
+    """Resolve a bearer token to its user, or None when it is invalid"""
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            return None
         token_data = TokenData(user_id=user_id)
     except JWTError:
-        raise credentials_exception
+        return None
 
-    user = await get_user_by_id(token_data.user_id)
+    try:
+        return await get_user_by_id(token_data.user_id)
+    except Exception:
+        return None
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    user = await get_user_from_token(token)
     if user is None:
         raise credentials_exception
     return user
@@ -0,0 +1,192 @@
+import random
+import zlib
+from typing import Dict, List, Callable, Optional
+
+# Mutation operators shared by Bug Hunt code generation and Test Master
+# mutation scoring. Each operator takes a single source line and returns the
+# mutated line (or the unchanged line when the pattern does not apply).
+MUTATION_OPERATORS: Dict[str, List[Callable[[str], str]]] = {
+    "python": [
+        # Off-by-one error in range
+        lambda line: line.replace('range(len(', 'range(len(') if 'range(len(' in line else (
+            line.replace('range(', 'range(1, ', 1) if 'range(' in line and 'range(1,' not in line and 'range(0' not in line else line
+        ),
+        # Missing colon after control structures
+        lambda line: line.rstrip(':') if line.strip().endswith(':') and any(kw in line for kw in ['if ', 'for ', 'while ', 'def ', 'class ', 'elif ', 'else:', 'try:', 'except']) else line,
+        # Wrong comparison operator (== vs =)
+        lambda line: line.replace('==', '=', 1) if '==' in line and 'def ' not in line and '#' not in line else line,
+        # Wrong indentation - remove 4 spaces (1 indentation level) for indented lines
+        lambda line: line[4:] if line.startswith('    ') and line.strip() and not line.strip().startswith('#') and len(line.lstrip()) < len(line) - 4 else line,
+        # Missing return statement (comment it out)
+        lambda line: '# ' + line if 'return ' in line and not line.strip().startswith('#') else line,
+        # Wrong operator precedence (+ vs *)
+        lambda line: line.replace(' + ', ' * ', 1) if ' + ' in line and 'def ' not in line and '#' not in line else line,
+        # Wrong list indexing
+        lambda line: line.replace('[0]', '[1]', 1) if '[0]' in line else (
+            line.replace('[-1]', '[-2]', 1) if '[-1]' in line else line
+        ),
+        # Incorrect loop variable
+        lambda line: line.replace('for i in', 'for j in', 1) if 'for i in' in line and 'i]' in line else line,
+        # Wrong boolean operator
+        lambda line: line.replace(' and ', ' or ', 1) if ' and ' in line else (
+            line.replace(' or ', ' and ', 1) if ' or ' in line else line
+        ),
+        # Missing increment
+        lambda line: line.replace('i += 1', 'i += 2', 1) if 'i += 1' in line else (
+            line.replace('count += 1', 'count += 2', 1) if 'count += 1' in line else line
+        ),
+        # Wrong string method
+        lambda line: line.replace('.append(', '.extend(', 1) if '.append(' in line else line,
+        # Incorrect condition
+        lambda line: line.replace(' < ', ' <= ', 1) if ' < ' in line else (
+            line.replace(' > ', ' >= ', 1) if ' > ' in line else line
+        ),
+    ],
+    "javascript": [
+        # Missing semicolon
+        lambda line: line.rstrip(';') if line.strip().endswith(';') and not line.strip().startswith('for') else line,
+        # Wrong comparison (== vs ===)
+        lambda line: line.replace('===', '==', 1) if '===' in line else line,
+        # Missing return
+        lambda line: '// ' + line if 'return ' in line and not line.strip().startswith('//') else line,
+        # Wrong array method
+        lambda line: line.replace('.push(', '.pop(', 1) if '.push(' in line else line,
+        # Off-by-one in loop
+        lambda line: line.replace('< length', '<= length', 1) if '< length' in line else line,
+        # Wrong operator
+        lambda line: line.replace(' + ', ' - ', 1) if ' + ' in line and '//' not in line else line,
+        # Missing var/let/const
+        lambda line: line.replace('let ', '', 1) if line.strip().startswith('let ') else (
+            line.replace('const ', '', 1) if line.strip().startswith('const ') else line
+        ),
+        # Wrong increment
+        lambda line: line.replace('++', '--', 1) if '++' in line else line,
+    ],
+}
+
+
+def generate_buggy_code(correct_code: str, language: str = "python") -> str:
+    """Generate buggy code by introducing common programming errors"""
+    if not correct_code:
+        return ""
+    
+    lines = correct_code.split('\n')
+    buggy_lines = lines.copy()
+    bugs_introduced = 0
+    non_empty_lines = len([l for l in lines if l.strip() and not l.strip().startswith('#')])
+    max_bugs = min(3, max(1, non_empty_lines // 3))  # Ensure at least 1 bug for short code
+    
+    print(f"🐛 Generating buggy code: {non_empty_lines} lines, target {max_bugs} bugs")
+    
+    # Common bug patterns for different languages
+    bug_types = list(MUTATION_OPERATORS.get(language, []))
+    
+    # Try multiple passes to ensure we introduce bugs
+    max_attempts = 10
+    attempt = 0
+    
+    while bugs_introduced < max_bugs and attempt < max_attempts:
+        attempt += 1
+        available_indices = list(range(len(buggy_lines)))
+        random.shuffle(available_indices)
+        
+        for idx in available_indices:
+            if bugs_introduced >= max_bugs:
+                break
+            
+            line = buggy_lines[idx]
+            # Skip empty lines, comments
+            if not line.strip() or line.strip().startswith('#') or line.strip().startswith('//'):
+                continue
+            
+            # Try to apply a random bug
+            bug_func = random.choice(bug_types)
+            modified_line = bug_func(line)
+            
+            # Only apply if the line actually changed
+            if modified_line != line:
+                print(f"  🐛 Bug {bugs_introduced + 1}: Line {idx + 1}: '{line.strip()}' → '{modified_line.strip()}'")
+                buggy_lines[idx] = modified_line
+                bugs_introduced += 1
+    
+    if bugs_introduced == 0:
+        print(f"  ⚠️ Warning: No bugs introduced after {attempt} attempts!")
+    else:
+        print(f"  ✅ Successfully introduced {bugs_introduced} bug(s)")
+    
+    # Validate that the buggy code is syntactically valid (even if logically wrong)
+    buggy_code = '\n'.join(buggy_lines)
+    
+    if language == "python":
+        try:
+            compile(buggy_code, '<string>', 'exec')
+            print(f"  ✅ Buggy code syntax is valid")
+        except SyntaxError as e:
+            # If syntax is invalid, return the original correct code with bugs commented out
+            # This ensures the code at least compiles, even if it doesn't run correctly
+            print(f"  ⚠️ ERROR: Generated buggy code has syntax error: {str(e)}")
+            print(f"  ⚠️ Returning original code to avoid IndentationError in Bug Hunt")
+            # Apply only safe, non-structural bugs to the original code
+            safe_buggy = correct_code.split('\n')
+            for i, line in enumerate(safe_buggy):
+                if '==' in line and 'def ' not in line and '#' not in line:
+                    safe_buggy[i] = line.replace('==', '=', 1)
+                    break
+            return '\n'.join(safe_buggy)
+    
+    return buggy_code
+
+
+def generate_mutants(
+    code: str,
+    language: str = "python",
+    max_mutants: int = 12,
+    seed: Optional[int] = None
+) -> List[str]:
+    """
+    Generate distinct single-point mutants of ``code``.
+
+    Every mutant applies exactly one mutation operator to exactly one line,
+    which keeps mutants small and makes a killed mutant a precise signal that
+    a test exercises that behaviour. Mutants that do not compile are dropped.
+    Selection is seeded by the source so the same code always yields the same
+    mutant set (which is what makes per-problem caching worthwhile).
+    """
+    if not code:
+        return []
+    
+    # Handle escaped newlines from seed data
+    if "\\n" in code:
+        code = code.replace("\\n", "\n")
+    
+    operators = MUTATION_OPERATORS.get(language, [])
+    lines = code.split('\n')
+    seen = set()
+    candidates = []
+    
+    for idx, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#') or stripped.startswith('//'):
+            continue
+        
+        for operator in operators:
+            mutated_line = operator(line)
+            if mutated_line == line:
+                continue
+            
+            mutant = '\n'.join(lines[:idx] + [mutated_line] + lines[idx + 1:])
+            if mutant in seen:
+                continue
+            seen.add(mutant)
+            
+            if language == "python":
+                try:
+                    compile(mutant, '<mutant>', 'exec')
+                except SyntaxError:
+                    continue
+            
+            candidates.append(mutant)
+    
+    rng = random.Random(seed if seed is not None else zlib.crc32(code.encode('utf-8')))
+    rng.shuffle(candidates)
+    return candidates[:max_mutants]
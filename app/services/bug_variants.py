@@ -0,0 +1,125 @@
+import asyncio
+import random
+import re
+from typing import Dict, Any, List, Optional
+
+from app.services.bug_generator import generate_buggy_code
+from app.services.code_executor import code_executor
+from app.services.output_comparator import OutputComparator, get_comparator
+
+
+def _unescape(code: str) -> str:
+    # Handle escaped newlines from seed data
+    return code.replace("\\n", "\n") if "\\n" in code else code
+
+
+SYNTAX_ERROR = re.compile(r"\b(SyntaxError|IndentationError|TabError)\b")
+
+
+def _compiles(code: str, language: str) -> bool:
+    """Python candidates are compiled locally; other languages are left to the executor"""
+    if language != "python":
+        return True
+    try:
+        compile(code, "<variant>", "exec")
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+async def _first_failure(code: str, language: str, test_cases: List[Dict[str, Any]], executor) -> Optional[Dict[str, Any]]:
+    """Run tests in order and return the result of the first failing one (None if all pass)"""
+    for test_case in test_cases:
+        result = await executor.execute_code(code, language, test_case["input"])
+        if not test_case["comparator"].passes(result, test_case["normalized"]):
+            return result
+    return None
+
+
+def _is_logic_bug(failure: Optional[Dict[str, Any]]) -> bool:
+    """A failure that is not the program failing to parse"""
+    return failure is not None and not SYNTAX_ERROR.search(failure.get("error") or "")
+
+
+def _prepare_test_cases(problem: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Strip inputs and pre-normalize expected outputs once for all candidates"""
+    comparator: OutputComparator = get_comparator(problem.get("comparator"))
+    return [
+        {
+            "input": tc.get("input", "").strip(),
+            "normalized": comparator.normalize(tc.get("expected", "")),
+            "comparator": comparator
+        }
+        for tc in problem.get("testCases", [])
+        if tc.get("input", "").strip()
+    ]
+
+
+async def build_verified_variants(
+    problem: Dict[str, Any],
+    k: int = 8,
+    language: str = "python",
+    concurrency: int = 4,
+    executor=code_executor
+) -> List[str]:
+    """
+    Generate up to ``k`` candidate buggy variants and keep the ones that fail a test.
+
+    Candidates must compile: a variant that fails only because it does not
+    parse is not a logic bug to hunt. The rest are verified in parallel
+    through the code executor. Returns an
+    empty list when the reference solution itself does not pass the problem's
+    tests, because then a failing variant proves nothing.
+    """
+    reference_code = _unescape(problem.get("referenceCode", {}).get(language, ""))
+    test_cases = _prepare_test_cases(problem)
+    if not reference_code or not test_cases:
+        return []
+
+    if await _first_failure(reference_code, language, test_cases, executor) is not None:
+        print(f"⚠️ Reference solution for '{problem.get('title', 'N/A')}' fails its own tests, skipping")
+        return []
+
+    candidates = []
+    for _ in range(k):
+        candidate = generate_buggy_code(reference_code, language)
+        if (candidate and candidate != reference_code and candidate not in candidates
+                and _compiles(candidate, language)):
+            candidates.append(candidate)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def verify(candidate: str) -> bool:
+        async with semaphore:
+            return _is_logic_bug(await _first_failure(candidate, language, test_cases, executor))
+
+    verdicts = await asyncio.gather(*(verify(c) for c in candidates))
+    verified = [c for c, fails in zip(candidates, verdicts) if fails]
+
+    print(f"🐛 '{problem.get('title', 'N/A')}': {len(verified)}/{len(candidates)} candidate variants verified buggy")
+    return verified
+
+
+def select_buggy_code(problem: Dict[str, Any], language: str = "python") -> Optional[str]:
+    """
+    Pick the buggy code for a Bug Hunt match.
+
+    Prefers a precomputed, verified variant (O(1) pick), then the problem's
+    stored buggyCode, and only generates unverified bugs at request time as a
+    last resort for problems the offline pipeline hasn't processed yet.
+    """
+    variants = problem.get("buggyCodeVariants", {}).get(language) or []
+    if variants:
+        return random.choice(variants)
+
+    existing_buggy = problem.get("buggyCode", {}).get(language, "")
+    if existing_buggy:
+        return existing_buggy
+
+    code_to_bug = (problem.get("referenceCode", {}).get(language, "")
+                   or problem.get("starterCode", {}).get(language, ""))
+    if code_to_bug:
+        print(f"⚠️ No verified buggy variants for '{problem.get('title', 'N/A')}', generating at request time")
+        return generate_buggy_code(code_to_bug, language)
+
+    return None
@@ -0,0 +1,79 @@
+import time
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The breaker is open: the call was not attempted"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed, every call goes through. ``failure_threshold`` failures in a row
+    open it: for ``cooldown_seconds`` calls are refused without touching the
+    backend. After the cool-down one call at a time is let through as a
+    probe (half-open); a successful probe closes the breaker, a failed one
+    re-opens it for another cool-down.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, cooldown_seconds: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_call(self, now: Optional[float] = None):
+        """Raise CircuitOpenError unless a call may go out now"""
+        now = now if now is not None else time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.cooldown_seconds:
+            self.state = HALF_OPEN
+        if self.state == OPEN or (self.state == HALF_OPEN and self._probing):
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        if self.state == HALF_OPEN:
+            self._probing = True
+
+    def record_success(self):
+        if self.state != CLOSED:
+            print(f"✅ {self.name} recovered, closing circuit")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def abandon(self):
+        """The admitted call ended without an outcome (cancelled): free the probe slot"""
+        self._probing = False
+
+    def record_failure(self, now: Optional[float] = None):
+        self.consecutive_failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+                print(f"🔌 {self.name} circuit opened after {self.consecutive_failures} failure(s), "
+                      f"cooling down for {self.cooldown_seconds:.0f}s")
+            self.state = OPEN
+            self.opened_at = now if now is not None else time.monotonic()
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = now if now is not None else time.monotonic()
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, self.cooldown_seconds - (now - self.opened_at)), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected,
+            "probe_in": retry_in
+        }
@@ -0,0 +1,156 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+from app.core.config import get_settings
+from app.services.realtime import realtime_hub
+
+settings = get_settings()
+
+
+class InProcessEventBus:
+    """
+    Event bus for a single process: events go straight to the local RealtimeHub.
+
+    Routers publish every match/lobby event through the bus exactly once; each
+    backend decides which nodes' hubs get to fan it out to their WebSockets.
+    """
+
+    distributed = False
+
+    def __init__(self, hub=realtime_hub):
+        self.hub = hub
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """Call ``listener(channel, message)`` for every event this node delivers (e.g. cache invalidation)"""
+        self._listeners.append(listener)
+
+    def has_listeners(self, channel: str) -> bool:
+        """False only when it is certain nobody anywhere is subscribed to ``channel``"""
+        return self.hub.has_subscribers(channel)
+
+    async def publish(self, channel: str, message: Dict[str, Any], close: bool = False):
+        await self.deliver(channel, message, close)
+
+    async def deliver(self, channel: str, message: Dict[str, Any], close: bool = False):
+        """Hand an event to this node's listeners and subscribers; ``close`` ends the channel afterwards"""
+        for listener in self._listeners:
+            try:
+                listener(channel, message)
+            except Exception as e:
+                print(f"⚠️ Event listener failed on {channel}: {e}")
+        await self.hub.publish(channel, message)
+        if close:
+            await self.hub.close_channel(channel)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class MongoEventBus(InProcessEventBus):
+    """
+    Event bus shared by every node through a capped MongoDB collection.
+
+    Publishing inserts the event once; every node tails the collection with a
+    tailable-await cursor and delivers the events to its local subscribers.
+    Events published by this node are delivered locally right away and skipped
+    when they come back through the tail. The capped size bounds storage and
+    the bus needs nothing beyond the database the app already uses.
+    """
+
+    distributed = True
+
+    def __init__(self, collection_name: str = "match_events", size_bytes: int = 16 * 1024 * 1024,
+                 hub=realtime_hub):
+        super().__init__(hub)
+        self.collection_name = collection_name
+        self.size_bytes = size_bytes
+        self.node_id = uuid.uuid4().hex
+        self._collection = None
+        self._tail_task: Optional[asyncio.Task] = None
+
+    def has_listeners(self, channel: str) -> bool:
+        # Subscribers may be connected to other nodes
+        return True
+
+    async def _ensure_collection(self, db):
+        try:
+            await db.create_collection(self.collection_name, capped=True, size=self.size_bytes)
+            # A tailable cursor on an empty capped collection dies immediately
+            await db[self.collection_name].insert_one({"channel": None, "created_at": datetime.utcnow()})
+            print(f"📢 Created capped event collection '{self.collection_name}'")
+        except CollectionInvalid:
+            pass
+        return db[self.collection_name]
+
+    async def publish(self, channel: str, message: Dict[str, Any], close: bool = False):
+        await self.deliver(channel, message, close)
+        if self._collection is None:
+            return
+        try:
+            await self._collection.insert_one({
+                "channel": channel,
+                "message": message,
+                "close": close,
+                "origin": self.node_id,
+                "created_at": datetime.utcnow()
+            })
+        except Exception as e:
+            print(f"⚠️ Failed to publish event on {channel}: {e}")
+
+    async def _tail(self):
+        # Start after the newest event so a (re)started node does not replay history
+        last = await self._collection.find_one({}, sort=[("$natural", -1)])
+        last_id = last["_id"] if last else None
+
+        while True:
+            try:
+                query = {"_id": {"$gt": last_id}} if last_id else {}
+                cursor = self._collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for event in cursor:
+                        last_id = event["_id"]
+                        if event.get("channel") is None or event.get("origin") == self.node_id:
+                            continue
+                        await self.deliver(event["channel"], event.get("message", {}), event.get("close", False))
+                    await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Event bus tail interrupted: {e}, retrying")
+            await asyncio.sleep(1)
+
+    async def start(self):
+        from app.db.mongo import get_database
+
+        self._collection = await self._ensure_collection(get_database())
+        self._tail_task = asyncio.create_task(self._tail())
+        print(f"📢 Mongo event bus started (node {self.node_id[:8]})")
+
+    async def stop(self):
+        if self._tail_task:
+            self._tail_task.cancel()
+            try:
+                await self._tail_task
+            except asyncio.CancelledError:
+                pass
+            self._tail_task = None
+
+
+def create_event_bus(backend: str) -> InProcessEventBus:
+    if backend == "mongo":
+        return MongoEventBus()
+    if backend != "memory":
+        print(f"⚠️ Unknown event bus backend '{backend}', using in-process bus")
+    return InProcessEventBus()
+
+
+event_bus = create_event_bus(settings.event_bus_backend)
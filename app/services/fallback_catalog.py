@@ -0,0 +1,104 @@
+import copy
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DIFFICULTIES = ("easy", "medium", "hard")
+COMPETITIVE_MODES = ("standard", "bug_hunt", "code_shuffle")
+# Anything other than easy or medium has always been served a hard problem
+DEFAULT_DIFFICULTY = "hard"
+DEFAULT_MODE = "standard"
+
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'fallback_problems.json')
+
+
+def _eligible(problem: Dict[str, Any], competitive_mode: str) -> bool:
+    """Bug Hunt and Code Shuffle are built from the python reference solution"""
+    if competitive_mode in ("bug_hunt", "code_shuffle"):
+        return bool((problem.get("referenceCode") or {}).get("python"))
+    return True
+
+
+class ShuffleBag:
+    """
+    Draws every item once, in random order, before any repeats.
+
+    Items are drawn off the end of a shuffled list (O(1) per draw), so each
+    item comes up exactly once per pass. An empty bag is refilled with a
+    fresh shuffle whose first draw is never the item drawn last: that only
+    rules out back-to-back repeats, an item can still return early in the
+    next pass after coming up late in this one.
+    """
+
+    def __init__(self, size: int, rng: Optional[random.Random] = None):
+        self.size = size
+        self.rng = rng or random.Random()
+        self._bag: List[int] = []
+        self._last: Optional[int] = None
+
+    def _refill(self):
+        self._bag = list(range(self.size))
+        self.rng.shuffle(self._bag)
+        if self.size > 1 and self._bag[-1] == self._last:
+            self._bag[0], self._bag[-1] = self._bag[-1], self._bag[0]
+
+    def draw(self) -> int:
+        if not self._bag:
+            self._refill()
+        self._last = self._bag.pop()
+        return self._last
+
+
+class FallbackCatalog:
+    """
+    Local problems served when generation is unavailable or fails.
+
+    The corpus is read once from data/fallback_problems.json into tuples
+    indexed by (difficulty, competitive mode), each with its own shuffle bag.
+    ``sample`` hands out deep copies, so callers that repair or store a
+    problem never alter the catalog.
+    """
+
+    def __init__(self, problems: Dict[str, Sequence[Dict[str, Any]]], rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+        self.index: Dict[Tuple[str, str], Tuple[Dict[str, Any], ...]] = {}
+        self.bags: Dict[Tuple[str, str], ShuffleBag] = {}
+        for difficulty in DIFFICULTIES:
+            for competitive_mode in COMPETITIVE_MODES:
+                entries = tuple(p for p in problems.get(difficulty, ()) if _eligible(p, competitive_mode))
+                if entries:
+                    self.index[(difficulty, competitive_mode)] = entries
+                    self.bags[(difficulty, competitive_mode)] = ShuffleBag(len(entries), self.rng)
+
+    @classmethod
+    def load(cls, path: str = CATALOG_PATH) -> "FallbackCatalog":
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                problems = json.load(f)
+            print(f"✅ Loaded fallback problem catalog ({sum(len(v) for v in problems.values())} problems)")
+        except Exception as e:
+            print(f"⚠️ Failed to load fallback problems: {e}")
+            problems = {}
+        return cls(problems)
+
+    def problems(self, difficulty: str, competitive_mode: str = DEFAULT_MODE) -> Tuple[Dict[str, Any], ...]:
+        return self.index.get(self._key(difficulty, competitive_mode), ())
+
+    def _key(self, difficulty: str, competitive_mode: str) -> Tuple[str, str]:
+        difficulty = (difficulty or "").lower()
+        if difficulty not in DIFFICULTIES:
+            difficulty = DEFAULT_DIFFICULTY
+        if competitive_mode not in COMPETITIVE_MODES:
+            competitive_mode = DEFAULT_MODE
+        return difficulty, competitive_mode
+
+    def sample(self, difficulty: str, competitive_mode: str = DEFAULT_MODE) -> Dict[str, Any]:
+        """A copy of the next problem from this (difficulty, mode)'s shuffle bag"""
+        key = self._key(difficulty, competitive_mode)
+        if key not in self.bags:
+            raise LookupError(f"no fallback problems for {key[0]} {key[1]}")
+        return copy.deepcopy(self.index[key][self.bags[key].draw()])
+
+
+fallback_catalog = FallbackCatalog.load()
@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import get_settings
+from app.db.mongo import get_database
+
+CODE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+CODE_LENGTH = 6
+CODE_SPACE = len(CODE_ALPHABET) ** CODE_LENGTH  # ~2.2 billion codes
+
+# Counter values reserved per round trip to the counters collection
+CODE_BLOCK_SIZE = 64
+# Collisions only happen with codes issued before the allocator (or under a
+# different secret); each retry takes the next counter value
+MAX_INSERT_ATTEMPTS = 5
+
+# A 32-bit, 4-round Feistel network; values outside the code space are
+# re-encrypted (cycle walking), which keeps the result a permutation of it
+FEISTEL_ROUNDS = 4
+HALF_BITS = 16
+HALF_MASK = (1 << HALF_BITS) - 1
+
+
+class GameCodeUnavailable(Exception):
+    """No free game code after MAX_INSERT_ATTEMPTS inserts"""
+
+
+def _round(key: bytes, round_index: int, half: int) -> int:
+    digest = hashlib.blake2b(half.to_bytes(2, "big"), digest_size=2, key=key, salt=round_index.to_bytes(16, "big")).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _feistel(key: bytes, value: int) -> int:
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for round_index in range(FEISTEL_ROUNDS):
+        left, right = right, left ^ _round(key, round_index, right)
+    return (left << HALF_BITS) | right
+
+
+def permute(key: bytes, value: int) -> int:
+    """Keyed bijection of [0, CODE_SPACE): distinct counters give distinct, unguessable codes"""
+    if not 0 <= value < CODE_SPACE:
+        raise ValueError("counter outside the game code space")
+    value = _feistel(key, value)
+    while value >= CODE_SPACE:
+        value = _feistel(key, value)
+    return value
+
+
+def encode(value: int) -> str:
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, len(CODE_ALPHABET))
+        chars.append(CODE_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+class GameCodeAllocator:
+    """
+    Lobby game codes without find-then-insert loops.
+
+    Codes are a keyed Feistel permutation of a counter in the ``counters``
+    collection, so every code is issued once (until the 2.2 billion code
+    space wraps) and consecutive codes look random. Each node reserves
+    CODE_BLOCK_SIZE counter values per ``$inc``. A unique index on
+    ``game_id`` over waiting and active lobbies is the backstop:
+    ``insert_lobby`` retries with the next code on a duplicate key.
+    """
+
+    def __init__(self, counter_id: str = "game_code", key: Optional[bytes] = None):
+        self.counter_id = counter_id
+        self.key = key or hashlib.blake2b(get_settings().jwt_secret.encode(), digest_size=32).digest()
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def _reserve_block(self):
+        counter = await get_database().counters.find_one_and_update(
+            {"_id": self.counter_id},
+            {"$inc": {"seq": CODE_BLOCK_SIZE}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._end = counter["seq"]
+        self._next = self._end - CODE_BLOCK_SIZE
+
+    async def next_code(self) -> str:
+        async with self._lock:
+            if self._next >= self._end:
+                await self._reserve_block()
+            value = self._next
+            self._next += 1
+        return encode(permute(self.key, value % CODE_SPACE))
+
+    async def insert_lobby(self, lobby_doc: Dict[str, Any]) -> Any:
+        """Give ``lobby_doc`` a fresh game_id and insert it; returns the inserted id"""
+        for _ in range(MAX_INSERT_ATTEMPTS):
+            lobby_doc["game_id"] = await self.next_code()
+            lobby_doc.pop("_id", None)
+            try:
+                result = await get_database().lobbies.insert_one(lobby_doc)
+                return result.inserted_id
+            except DuplicateKeyError:
+                print(f"⚠️ Game code {lobby_doc['game_id']} is taken, allocating another")
+        raise GameCodeUnavailable(f"no free game code after {MAX_INSERT_ATTEMPTS} attempts")
+
+
+game_codes = GameCodeAllocator()
@@ -0,0 +1,147 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.services.code_executor import code_executor
+from app.services.output_comparator import OutputComparator, get_comparator
+
+DEFAULT_EXECUTION_TIMEOUT = 10  # seconds per test run, same as CodeExecutor
+
+
+class GradingTestCase:
+    """A test case with its input and expected output normalized once"""
+
+    __slots__ = ("input", "expected", "normalized")
+
+    def __init__(self, test_input: str, expected: str, comparator: OutputComparator):
+        self.input = test_input
+        self.expected = expected
+        # Expected output in the comparator's form, so grading never re-normalizes it
+        self.normalized = comparator.normalize(expected)
+
+
+class GradingContext:
+    """
+    Everything needed to grade submissions for one problem in one match.
+
+    All players of a lobby solve the same problems, so the problem document,
+    the filtered test cases, their normalized expected outputs, the execution
+    harnesses and the time limits are derived once and shared by every
+    submission for that (match, problem).
+    """
+
+    def __init__(self, match_id: str, problem: Dict[str, Any], match: Dict[str, Any]):
+        self.match_id = match_id
+        self.problem_id = str(problem["_id"])
+        self.problem = problem
+
+        self.comparator = get_comparator(problem.get("comparator"))
+
+        raw_test_cases = problem.get("testCases", []) or []
+        self.total_test_cases = len(raw_test_cases)
+        # Test cases with empty inputs are skipped to avoid EOF errors
+        self.test_cases: Tuple[GradingTestCase, ...] = tuple(
+            GradingTestCase(tc.get("input", "").strip(), tc.get("expected", "").strip(), self.comparator)
+            for tc in raw_test_cases
+            if tc.get("input", "").strip()
+        )
+
+        self.reference_code: Dict[str, str] = problem.get("referenceCode", {}) or {}
+        self.time_limit_seconds: int = match.get("time_limit_seconds", 1800)
+        self.started_at: Optional[datetime] = match.get("started_at")
+        self.execution_timeout: int = problem.get("execution_timeout", DEFAULT_EXECUTION_TIMEOUT)
+
+        # Warm the executor's harness cache for the expected signature so
+        # submissions that keep the starter signature only do a cache lookup
+        self.harness_signature = None
+        for source in (problem.get("starterCode", {}) or {}, self.reference_code):
+            signature = code_executor.detect_function_signature(source.get("python", "") or "")
+            if signature:
+                self.harness_signature = signature
+                for tc in self.test_cases:
+                    code_executor.build_harness(signature[0], signature[1], tc.input)
+                break
+
+    def passes(self, result: Dict[str, Any], test_case: GradingTestCase) -> bool:
+        """True when an execution result passes ``test_case`` under the problem's comparator"""
+        return self.comparator.passes(result, test_case.normalized)
+
+    def public_problem(self) -> Dict[str, Any]:
+        """Copy of the problem document that is safe to JSON-serialize"""
+        problem = dict(self.problem)
+        problem["_id"] = str(problem["_id"])
+        return problem
+
+
+class GradingContextCache:
+    """
+    Grading contexts per (match, problem), kept for the lifetime of the match.
+
+    Concurrent submissions for a context that is not built yet share a single
+    build instead of each fetching the problem. Contexts are evicted when the
+    match completes; the LRU bound only protects against matches that never do.
+    """
+
+    def __init__(self, max_contexts: int = 512):
+        self.max_contexts = max_contexts
+        self._contexts: "OrderedDict[Tuple[str, str], GradingContext]" = OrderedDict()
+        self._building: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def get(self, db, match: Dict[str, Any], problem_id: str) -> Optional[GradingContext]:
+        """Return the context for (match, problem), building it on first use"""
+        match_id = str(match["_id"])
+        key = (match_id, problem_id)
+
+        context = self._contexts.get(key)
+        if context is not None:
+            self._contexts.move_to_end(key)
+            return context
+
+        while True:
+            pending = self._building.get(key)
+            if pending is None:
+                break
+            try:
+                # Shielded: a waiter being cancelled must not cancel everyone's build
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The building request was cancelled; build here instead
+
+        future = asyncio.get_running_loop().create_future()
+        self._building[key] = future
+        try:
+            problem = await db.problems.find_one({"_id": ObjectId(problem_id)})
+            context = GradingContext(match_id, problem, match) if problem else None
+            if context is not None:
+                self._contexts[key] = context
+                while len(self._contexts) > self.max_contexts:
+                    self._contexts.popitem(last=False)
+            future.set_result(context)
+            return context
+        except asyncio.CancelledError:
+            future.cancel()  # Waiters retry the build rather than wait forever
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved in case no other submission is waiting
+            raise
+        finally:
+            self._building.pop(key, None)
+
+    def evict_match(self, match_id: str) -> int:
+        """Drop every context of a match; returns how many were evicted"""
+        keys = [key for key in self._contexts if key[0] == match_id]
+        for key in keys:
+            del self._contexts[key]
+        return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+
+grading_contexts = GradingContextCache()
@@ -0,0 +1,104 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from app.db.mongo import get_database
+
+
+class LeaderLease:
+    """
+    Single-leader election for background jobs through ``leader_leases``.
+
+    The leader is whoever holds the unexpired lease document named after the
+    job. Calling ``acquire`` every run renews the lease for its holder and
+    lets another node take over once the holder stops renewing it (crash,
+    deploy) for ``ttl_seconds``.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.node_id = uuid.uuid4().hex
+        self.is_leader = False
+
+    async def acquire(self) -> bool:
+        """Become or stay leader; returns whether this node leads"""
+        now = datetime.utcnow()
+        try:
+            await get_database().leader_leases.find_one_and_update(
+                {"_id": self.name, "$or": [{"owner": self.node_id}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.node_id, "expires_at": now + timedelta(seconds=self.ttl_seconds)}},
+                upsert=True
+            )
+            leader = True
+        except DuplicateKeyError:
+            # Another node holds an unexpired lease
+            leader = False
+        if leader and not self.is_leader:
+            print(f"👑 Node {self.node_id[:8]} is now leader for {self.name}")
+        self.is_leader = leader
+        return leader
+
+    async def release(self):
+        if self.is_leader:
+            await get_database().leader_leases.delete_one({"_id": self.name, "owner": self.node_id})
+            self.is_leader = False
+
+
+class LeaderLoop:
+    """
+    Background task of a leader-elected job.
+
+    ``step`` runs on every node every ``interval_seconds`` (sooner after
+    ``wake``) and acquires ``lease`` itself before any leader-only work, so
+    it can also do per-node work first. A failing step is logged as
+    ``failure_message`` and retried next round; ``stop`` cancels the task and
+    hands the lease over by releasing it.
+    """
+
+    def __init__(self, lease: LeaderLease, interval_seconds: float,
+                 step: Callable[[], Awaitable[None]], failure_message: str):
+        self.lease = lease
+        self.interval_seconds = interval_seconds
+        self.step = step
+        self.failure_message = failure_message
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def wake(self):
+        """Run the next step now instead of at the end of the interval"""
+        self._wake.set()
+
+    async def _loop(self):
+        while True:
+            # A wake during the step schedules another one right away
+            self._wake.clear()
+            try:
+                await self.step()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ {self.failure_message}: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.lease.release()
+        except Exception:
+            pass
@@ -0,0 +1,232 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import google.generativeai as genai
+
+from app.core.config import get_settings
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Backoff before retry n is uniform in [0, min(cap, base * 2**n)] ("full jitter")
+RETRY_BASE_SECONDS = 1.0
+RETRY_CAP_SECONDS = 10.0
+
+
+class LLMError(Exception):
+    """A generation call failed on every attempt"""
+
+
+class TokenBucket:
+    """Allows ``rate`` calls per second on average, in bursts of up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Wait for a token; waiters are served in arrival order"""
+        async with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill(time.monotonic())
+            self.tokens -= 1
+
+
+class GeminiBackend:
+    """Blocking Gemini calls (run in worker threads by LLMClient)"""
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        if api_key:
+            genai.configure(api_key=api_key)
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def generate(self, model: str, prompt: str, **options) -> str:
+        response = genai.GenerativeModel(model).generate_content(prompt, **options)
+        return response.text
+
+
+StubResponse = Union[str, Exception]
+
+
+class StubBackend:
+    """
+    Local backend for tests and offline development.
+
+    Answers from a ``responder(model, prompt)`` callable, or pops scripted
+    responses in order (an Exception in the script is raised instead);
+    every call is recorded in ``calls``. With nothing scripted it answers
+    "{}", which the generators reject and replace with their local fallbacks.
+    """
+
+    available = True
+
+    def __init__(self, responses: Optional[List[StubResponse]] = None,
+                 responder: Optional[Callable[[str, str], str]] = None, delay: float = 0.0):
+        self.responses = list(responses or [])
+        self.responder = responder
+        self.delay = delay
+        self.calls: List[Dict[str, Any]] = []
+
+    def generate(self, model: str, prompt: str, **options) -> str:
+        self.calls.append({"model": model, "prompt": prompt, **options})
+        if self.delay:
+            time.sleep(self.delay)
+        if self.responder is not None:
+            return self.responder(model, prompt)
+        if not self.responses:
+            return "{}"
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class LLMClient:
+    """
+    Shared async client for problem and quiz generation.
+
+    Backend calls block, so each runs in a worker thread. At most
+    ``max_concurrency`` run at once, a token bucket caps the request rate,
+    every attempt has a timeout and failed attempts are retried with jittered
+    exponential backoff. A timed-out call's thread is abandoned, not
+    interrupted; its result is discarded.
+
+    A circuit breaker counts calls that failed every attempt: while it is
+    open, calls fail immediately (CircuitOpenError) and callers go straight
+    to their fallbacks instead of waiting out a dead or over-quota backend.
+    Callers report whether they used the generated text or a fallback, and
+    ``stats`` exposes breaker state, call counters and fallback rates.
+    """
+
+    def __init__(
+        self,
+        backend,
+        max_concurrency: int = 4,
+        requests_per_second: float = 2.0,
+        burst: int = 4,
+        timeout_seconds: float = 30.0,
+        max_retries: int = 2,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.backend = backend
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.breaker = breaker or CircuitBreaker("generation")
+        self.counters: Counter = Counter()
+        self.outcomes: Dict[str, Counter] = {}
+
+    @property
+    def available(self) -> bool:
+        return self.backend.available
+
+    # ----- Metrics -----
+
+    def record_generated(self, kind: str):
+        """A caller used generated content for a ``kind`` (e.g. "problem")"""
+        self.outcomes.setdefault(kind, Counter())["generated"] += 1
+
+    def record_fallback(self, kind: str):
+        """A caller served its local fallback for a ``kind`` instead"""
+        self.outcomes.setdefault(kind, Counter())["fallback"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        outcomes = {}
+        for kind, counts in self.outcomes.items():
+            total = counts["generated"] + counts["fallback"]
+            outcomes[kind] = {
+                "generated": counts["generated"],
+                "fallback": counts["fallback"],
+                "fallback_rate": round(counts["fallback"] / total, 3) if total else 0.0
+            }
+        return {
+            "backend": type(self.backend).__name__,
+            "available": self.available,
+            "breaker": self.breaker.stats(),
+            "calls": dict(self.counters),
+            "outcomes": outcomes
+        }
+
+    async def _attempt(self, model: str, prompt: str, timeout: float, options: Dict[str, Any]) -> str:
+        await self.bucket.acquire()
+        async with self.semaphore:
+            return await asyncio.wait_for(asyncio.to_thread(self.backend.generate, model, prompt, **options), timeout)
+
+    async def generate(self, prompt: str, model: str, timeout: Optional[float] = None, **options) -> str:
+        """
+        Text the backend generates for ``prompt``. Raises LLMError once retries
+        are exhausted, CircuitOpenError without calling while the breaker is open.
+        """
+        timeout = timeout or self.timeout_seconds
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self.counters["short_circuited"] += 1
+            raise
+        self.counters["calls"] += 1
+        try:
+            text = await self._generate(prompt, model, timeout, options)
+        except LLMError:
+            self.counters["failed"] += 1
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        self.counters["succeeded"] += 1
+        self.breaker.record_success()
+        return text
+
+    async def _generate(self, prompt: str, model: str, timeout: float, options: Dict[str, Any]) -> str:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._attempt(model, prompt, timeout, options)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                self.counters["timeouts" if timed_out else "errors"] += 1
+                error = "timed out" if timed_out else str(e)
+                if attempt == self.max_retries:
+                    raise LLMError(f"{model} failed after {attempt + 1} attempt(s): {error}") from e
+                self.counters["retries"] += 1
+                backoff = random.uniform(0, min(RETRY_CAP_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+                print(f"⚠️ {model} call failed ({error}), retrying in {backoff:.1f}s")
+                await asyncio.sleep(backoff)
+        raise LLMError(f"{model} was not called")
+
+
+def create_llm_client() -> LLMClient:
+    settings = get_settings()
+    backend = StubBackend() if settings.llm_backend == "stub" else GeminiBackend(settings.google_api_key)
+    return LLMClient(
+        backend,
+        max_concurrency=settings.llm_max_concurrency,
+        requests_per_second=settings.llm_requests_per_second,
+        burst=settings.llm_max_concurrency,
+        timeout_seconds=settings.llm_timeout_seconds,
+        max_retries=settings.llm_max_retries,
+        breaker=CircuitBreaker(
+            "generation",
+            failure_threshold=settings.llm_breaker_failures,
+            cooldown_seconds=settings.llm_breaker_cooldown_seconds
+        )
+    )
+
+
+llm_client = create_llm_client()
@@ -0,0 +1,117 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.db.mongo import get_database
+from app.services.leader import LeaderLease, LeaderLoop
+from app.services.realtime import realtime_hub
+
+# A waiting lobby nobody has looked at for this long is expired
+LOBBY_TTL_SECONDS = 5 * 60
+# Heartbeats extend expires_at at most this often per lobby and node
+HEARTBEAT_WRITE_SECONDS = 60
+LOBBY_SWEEP_SECONDS = 30
+
+ExpiredHandler = Callable[[List[str]], Awaitable[None]]
+
+
+def lobby_expiry(now: Optional[datetime] = None) -> datetime:
+    """``expires_at`` for a waiting lobby that was just seen"""
+    return (now or datetime.utcnow()) + timedelta(seconds=LOBBY_TTL_SECONDS)
+
+
+class LobbyLifecycle:
+    """
+    Heartbeat-driven expiry of waiting lobbies.
+
+    Waiting lobbies carry ``expires_at``. Lobby polls and open lobby
+    WebSockets heartbeat it forward (written at most once a minute per lobby
+    and node, without a version bump, so pollers' ETags stay valid). The
+    leader node sweeps lobbies past ``expires_at`` through a partial index
+    that only holds waiting lobbies: they become ``expired`` and lose their
+    embedded quiz questions, so the waiting set only contains live lobbies.
+    """
+
+    def __init__(self):
+        self.lease = LeaderLease("lobby_expiry_sweeper", ttl_seconds=LOBBY_SWEEP_SECONDS * 3)
+        self._last_beat: Dict[str, float] = {}
+        self._on_expired: Optional[ExpiredHandler] = None
+        self.worker = LeaderLoop(self.lease, LOBBY_SWEEP_SECONDS, self._step, "Lobby expiry sweep failed")
+        self._backfilled = False
+
+    def set_expired_handler(self, handler: ExpiredHandler):
+        """``handler(game_ids)`` is called with the lobbies each expiry pass expired"""
+        self._on_expired = handler
+
+    async def heartbeat(self, game_id: str):
+        """Someone is still looking at this lobby: push its expiry forward"""
+        game_id = game_id.upper()
+        now = time.monotonic()
+        if now - self._last_beat.get(game_id, float("-inf")) < HEARTBEAT_WRITE_SECONDS:
+            return
+        self._last_beat[game_id] = now
+        await get_database().lobbies.update_one(
+            {"game_id": game_id, "status": "waiting"},
+            {"$set": {"expires_at": lobby_expiry()}}
+        )
+
+    async def _presence_heartbeats(self):
+        """Lobbies with WebSocket subscribers on this node are alive"""
+        for channel in realtime_hub.channels("lobby:"):
+            await self.heartbeat(channel.split(":", 1)[1])
+
+    async def expire(self, query: Dict[str, Any], now: Optional[datetime] = None) -> List[str]:
+        """Expire the waiting lobbies matching ``query``; returns their game ids"""
+        now = now or datetime.utcnow()
+        token = uuid.uuid4().hex
+        lobbies = get_database().lobbies
+        result = await lobbies.update_many(
+            {**query, "status": "waiting"},
+            {
+                "$set": {"status": "expired", "expired_at": now, "expiry_token": token},
+                "$unset": {"quiz_questions": ""},
+                "$inc": {"version": 1}
+            }
+        )
+        if not result.modified_count:
+            return []
+        game_ids = [doc["game_id"] async for doc in lobbies.find({"expiry_token": token}, {"game_id": 1})]
+        for game_id in game_ids:
+            self._last_beat.pop(game_id, None)
+        print(f"🧹 Expired {len(game_ids)} abandoned lobbies")
+        if self._on_expired is not None:
+            await self._on_expired(game_ids)
+        return game_ids
+
+    async def backfill(self):
+        """Give waiting lobbies created before heartbeats an expiry"""
+        await get_database().lobbies.update_many(
+            {"status": "waiting", "expires_at": {"$exists": False}},
+            {"$set": {"expires_at": lobby_expiry()}}
+        )
+
+    async def sweep_once(self, now: Optional[datetime] = None) -> List[str]:
+        now = now or datetime.utcnow()
+        return await self.expire({"expires_at": {"$lte": now}}, now)
+
+    async def _step(self):
+        # Forget throttle entries of lobbies nobody heartbeats any more
+        cutoff = time.monotonic() - LOBBY_TTL_SECONDS
+        self._last_beat = {g: t for g, t in self._last_beat.items() if t > cutoff}
+        await self._presence_heartbeats()
+        if not await self.lease.acquire():
+            return
+        if not self._backfilled:
+            await self.backfill()
+            self._backfilled = True
+        await self.sweep_once()
+
+    async def start(self):
+        await self.worker.start()
+
+    async def stop(self):
+        await self.worker.stop()
+
+
+lobby_lifecycle = LobbyLifecycle()
@@ -0,0 +1,200 @@
+import copy
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import get_settings
+from app.db.mongo import get_database
+from app.services.leader import LeaderLease, LeaderLoop
+
+ARCHIVE_SWEEP_SECONDS = 10 * 60
+ARCHIVE_BATCH_SIZE = 500
+DUPLICATE_KEY = 11000
+
+PLAYER_SLOTS = ("players", "player1", "player2")
+# Per-player code fields stored once in code_blobs and referenced by digest
+BLOB_FIELDS = ("code", "arranged_code")
+# Question copies and scratch state the history view never shows
+STRIPPED_FIELDS = ("quiz_questions", "changes", "transition_token", "expiry_token")
+STRIPPED_PLAYER_FIELDS = ("shuffled_lines",)
+
+
+def code_digest(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+def _slot_players(doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+    players = list(doc.get("players") or [])
+    players.extend(doc[slot] for slot in ("player1", "player2") if doc.get(slot))
+    return players
+
+
+def compact(doc: Dict[str, Any], archived_at: Optional[datetime] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Archive form of a finished match or lobby, plus the code blobs it refers to.
+
+    Question copies and the change log are dropped (quiz_total_questions keeps
+    the count); non-empty code fields become ``{field}_sha`` digests into
+    ``code_blobs``, so code shared across players and matches is stored once.
+    """
+    doc = copy.deepcopy(doc)
+    for field in STRIPPED_FIELDS:
+        doc.pop(field, None)
+    doc["archived_at"] = archived_at or datetime.utcnow()
+
+    blobs: Dict[str, str] = {}
+    for player in _slot_players(doc):
+        for field in STRIPPED_PLAYER_FIELDS:
+            player.pop(field, None)
+        for field in BLOB_FIELDS:
+            code = player.get(field)
+            if isinstance(code, str) and code:
+                digest = code_digest(code)
+                blobs[digest] = code
+                del player[field]
+                player[f"{field}_sha"] = digest
+    return doc, blobs
+
+
+def blob_digests(doc: Dict[str, Any]) -> List[str]:
+    return [player[f"{field}_sha"] for player in _slot_players(doc) for field in BLOB_FIELDS if f"{field}_sha" in player]
+
+
+def restore(doc: Dict[str, Any], blobs: Dict[str, str]) -> Dict[str, Any]:
+    """Inverse of ``compact`` for reads: code digests are swapped back for the code"""
+    doc = copy.deepcopy(doc)
+    for player in _slot_players(doc):
+        for field in BLOB_FIELDS:
+            digest = player.pop(f"{field}_sha", None)
+            if digest is not None:
+                player[field] = blobs.get(digest, "")
+    return doc
+
+
+class MatchArchiver:
+    """
+    Hot/cold split of competitive data.
+
+    Matches completed more than ``match_archive_after_hours`` ago, and lobbies
+    that expired or started that long ago, move to ``matches_archive`` /
+    ``lobbies_archive`` in their compact form. The leader node moves one
+    batch at a time, in a restartable order: code blobs are upserted, archive
+    documents inserted (same ``_id``, so a rerun after a crash only hits
+    duplicate keys), and only then are the originals deleted. Partial indexes
+    that hold only finished documents keep the sweep off the live working set.
+    """
+
+    def __init__(self, after_hours: Optional[float] = None):
+        self.after_hours = after_hours if after_hours is not None else get_settings().match_archive_after_hours
+        self.lease = LeaderLease("match_archiver", ttl_seconds=ARCHIVE_SWEEP_SECONDS * 3)
+        self.worker = LeaderLoop(self.lease, ARCHIVE_SWEEP_SECONDS, self._step, "Match archival failed")
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        return (now or datetime.utcnow()) - timedelta(hours=self.after_hours)
+
+    # ----- Moving -----
+
+    async def _move(self, source: str, target: str, docs: List[Dict[str, Any]], now: datetime) -> int:
+        if not docs:
+            return 0
+        db = get_database()
+        archived: List[Dict[str, Any]] = []
+        blobs: Dict[str, str] = {}
+        for doc in docs:
+            compacted, doc_blobs = compact(doc, now)
+            archived.append(compacted)
+            blobs.update(doc_blobs)
+
+        if blobs:
+            await db.code_blobs.bulk_write(
+                [
+                    UpdateOne({"_id": digest}, {"$setOnInsert": {"code": code, "created_at": now}}, upsert=True)
+                    for digest, code in blobs.items()
+                ],
+                ordered=False
+            )
+        try:
+            await db[target].insert_many(archived, ordered=False)
+        except BulkWriteError as e:
+            # Already archived by an interrupted earlier pass
+            if any(error.get("code") != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+                raise
+        result = await db[source].delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        return result.deleted_count
+
+    async def archive_matches(self, now: Optional[datetime] = None) -> int:
+        """Move one batch of old completed matches; returns how many were moved"""
+        now = now or datetime.utcnow()
+        cursor = get_database().matches.find(
+            {"status": "completed", "completed_at": {"$lte": self.cutoff(now)}}
+        ).sort("completed_at", 1).limit(ARCHIVE_BATCH_SIZE)
+        return await self._move("matches", "matches_archive", await cursor.to_list(length=ARCHIVE_BATCH_SIZE), now)
+
+    async def archive_lobbies(self, now: Optional[datetime] = None) -> int:
+        """Move one batch of lobbies that expired or started long ago"""
+        now = now or datetime.utcnow()
+        cutoff = self.cutoff(now)
+        lobbies = get_database().lobbies
+        docs = await lobbies.find(
+            {"status": "expired", "expired_at": {"$lte": cutoff}}
+        ).sort("expired_at", 1).limit(ARCHIVE_BATCH_SIZE).to_list(length=ARCHIVE_BATCH_SIZE)
+        if len(docs) < ARCHIVE_BATCH_SIZE:
+            remaining = ARCHIVE_BATCH_SIZE - len(docs)
+            docs += await lobbies.find(
+                {"status": "active", "started_at": {"$lte": cutoff}}
+            ).sort("started_at", 1).limit(remaining).to_list(length=remaining)
+        return await self._move("lobbies", "lobbies_archive", docs, now)
+
+    async def archive_once(self, now: Optional[datetime] = None) -> int:
+        moved_matches = await self.archive_matches(now)
+        moved_lobbies = await self.archive_lobbies(now)
+        if moved_matches or moved_lobbies:
+            print(f"🗄️ Archived {moved_matches} match(es) and {moved_lobbies} lobby(ies)")
+        return moved_matches + moved_lobbies
+
+    # ----- Reading -----
+
+    async def _restore_all(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        digests = {digest for doc in docs for digest in blob_digests(doc)}
+        blobs: Dict[str, str] = {}
+        if digests:
+            async for blob in get_database().code_blobs.find({"_id": {"$in": list(digests)}}):
+                blobs[blob["_id"]] = blob["code"]
+        return [restore(doc, blobs) for doc in docs]
+
+    async def find_match(self, match_oid: ObjectId) -> Optional[Dict[str, Any]]:
+        """An archived match with its code restored, None if it is not archived"""
+        doc = await get_database().matches_archive.find_one({"_id": match_oid})
+        if doc is None:
+            return None
+        return (await self._restore_all([doc]))[0]
+
+    async def find_matches(self, query: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """Newest archived matches matching ``query``, code restored"""
+        if limit <= 0:
+            return []
+        cursor = get_database().matches_archive.find(query).sort("created_at", -1).limit(limit)
+        return await self._restore_all(await cursor.to_list(length=limit))
+
+    # ----- Lifecycle -----
+
+    async def _step(self):
+        if not await self.lease.acquire():
+            return
+        # A full batch means more are due: keep going while this node still leads
+        while await self.archive_once() >= ARCHIVE_BATCH_SIZE:
+            if not await self.lease.acquire():
+                break
+
+    async def start(self):
+        await self.worker.start()
+
+    async def stop(self):
+        await self.worker.stop()
+
+
+match_archive = MatchArchiver()
@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Change entries kept per match; pollers further behind than this get a full resync
+MATCH_CHANGE_LOG_SIZE = 64
+
+# Match fields never reported as changes (the log itself and the version counter)
+UNTRACKED_PATHS = ("changes", "version")
+
+
+# Fields whose values are never copied into the log, however short (clients refetch them)
+BLOB_FIELDS = ("code", "quiz_answers", "submissions", "test_results")
+# Longer strings are treated as blobs too
+MAX_LOGGED_STRING = 64
+
+
+def _tracked(path: str) -> bool:
+    return path.split(".", 1)[0] not in UNTRACKED_PATHS
+
+
+def _loggable(path: str, value: Any) -> bool:
+    """Small scalar values (flags, scores, ranks, statuses, timestamps) go into the log"""
+    if path.rsplit(".", 1)[-1] in BLOB_FIELDS:
+        return False
+    if isinstance(value, str):
+        return len(value) <= MAX_LOGGED_STRING
+    return value is None or isinstance(value, (bool, int, float, datetime))
+
+
+def log_change(update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Append a change entry describing ``update`` to the match's change log.
+
+    The entry lists every path the update sets, pushes or increments under
+    ``paths`` and the new values of the small scalar ones under ``set``; code,
+    submissions, answers and other blobs are left out, clients refetch the
+    match for those. It is pushed by the same atomic update that bumps
+    ``version``, so the newest entry always describes the current version and
+    the entries before it describe the preceding versions, one each.
+    ``$slice`` bounds the log to the last MATCH_CHANGE_LOG_SIZE versions.
+    """
+    paths: List[str] = []
+    values: Dict[str, Any] = {}
+    for operator in ("$set", "$push", "$inc"):
+        for path, value in update.get(operator, {}).items():
+            if not _tracked(path):
+                continue
+            paths.append(path)
+            if operator == "$set" and _loggable(path, value):
+                values[path] = value
+
+    entry: Dict[str, Any] = {"paths": paths}
+    if values:
+        entry["set"] = values
+
+    update.setdefault("$push", {})["changes"] = {
+        "$each": [entry],
+        "$slice": -MATCH_CHANGE_LOG_SIZE
+    }
+    return update
+
+
+def log_change_stage(fields: List[str]) -> Dict[str, Any]:
+    """
+    ``log_change`` plus the version bump for pipeline updates: a ``$set``
+    stage to put after the stages that set the top-level scalar ``fields``,
+    which logs them with their new values.
+    """
+    entry = {"paths": list(fields), "set": {field: f"${field}" for field in fields}}
+    return {"$set": {
+        "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+        "changes": {"$slice": [
+            {"$concatArrays": [{"$ifNull": ["$changes", []]}, [entry]]},
+            -MATCH_CHANGE_LOG_SIZE
+        ]}
+    }}
+
+
+def changes_since(version: int, changes: List[Dict[str, Any]], since: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Change entries newer than ``since``, each tagged with the version it produced.
+
+    Returns None when the log no longer reaches back to ``since`` (or the match
+    predates the log) and the caller has to resync from the full document.
+    """
+    if since >= version:
+        return []
+
+    oldest_logged = version - len(changes) + 1
+    if since + 1 < oldest_logged:
+        return None
+
+    first = since + 1 - oldest_logged
+    return [
+        {"version": oldest_logged + index, **entry}
+        for index, entry in enumerate(changes[first:], start=first)
+    ]
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.db.mongo import get_database
+from app.services.leader import LeaderLease, LeaderLoop
+from app.services.match_changes import log_change_stage
+
+DEADLINE_SWEEP_SECONDS = 15
+# Slack after a match's time limit before the server ends it (late submissions in flight)
+DEADLINE_GRACE_SECONDS = 10
+DEADLINE_BATCH_SIZE = 200
+
+# What expiry reads: everything ranking needs, not code or submission history
+EXPIRY_PROJECTION = {
+    "changes": 0,
+    **{f"{slot}.{field}": 0 for slot in ("players", "player1", "player2") for field in ("submissions", "code", "arranged_code")}
+}
+
+ExpiryHandler = Callable[[List[Dict[str, Any]], datetime], Awaitable[int]]
+
+
+def match_deadline(started_at: datetime, time_limit_seconds: Optional[int]) -> Optional[datetime]:
+    """``deadline_at`` stored on an active match; None for untimed matches"""
+    if not started_at or not time_limit_seconds:
+        return None
+    return started_at + timedelta(seconds=time_limit_seconds)
+
+
+class MatchDeadlineSweeper:
+    """
+    Ends active matches that are past their time limit.
+
+    Active matches carry ``deadline_at``; a partial index on it that only
+    holds active matches keeps the lookup proportional to live matches. One
+    node at a time (the leader) sweeps, in batches of DEADLINE_BATCH_SIZE,
+    handing each batch to the registered handler that ranks and finalizes.
+    """
+
+    def __init__(self):
+        self.lease = LeaderLease("match_deadline_sweeper", ttl_seconds=DEADLINE_SWEEP_SECONDS * 3)
+        self._handler: Optional[ExpiryHandler] = None
+        self.worker = LeaderLoop(self.lease, DEADLINE_SWEEP_SECONDS, self._step, "Match deadline sweep failed")
+        self._backfilled = False
+
+    def set_handler(self, handler: ExpiryHandler):
+        """``handler(matches, now)`` finalizes a batch and returns how many it ended"""
+        self._handler = handler
+
+    async def backfill(self):
+        """
+        Give active matches started before deadlines were stored a deadline_at,
+        bumping their version so hot copies and cached snapshots see the write
+        """
+        result = await get_database().matches.update_many(
+            {
+                "status": "active",
+                "deadline_at": {"$exists": False},
+                "started_at": {"$type": "date"},
+                "time_limit_seconds": {"$gt": 0}
+            },
+            [
+                {"$set": {"deadline_at": {"$add": ["$started_at", {"$multiply": ["$time_limit_seconds", 1000]}]}}},
+                log_change_stage(["deadline_at"])
+            ]
+        )
+        if result.modified_count:
+            print(f"⌛ Backfilled deadlines of {result.modified_count} active match(es)")
+
+    async def sweep_once(self, now: Optional[datetime] = None) -> int:
+        """Expire one batch of overdue matches; returns how many it ended"""
+        now = now or datetime.utcnow()
+        cursor = get_database().matches.find(
+            {"status": "active", "deadline_at": {"$lte": now - timedelta(seconds=DEADLINE_GRACE_SECONDS)}},
+            EXPIRY_PROJECTION
+        ).sort("deadline_at", 1).limit(DEADLINE_BATCH_SIZE)
+        matches = await cursor.to_list(length=DEADLINE_BATCH_SIZE)
+        if not matches or self._handler is None:
+            return 0
+        ended = await self._handler(matches, now)
+        print(f"⌛ Ended {ended}/{len(matches)} match(es) past their time limit")
+        return ended
+
+    async def _step(self):
+        if not await self.lease.acquire():
+            return
+        if not self._backfilled:
+            await self.backfill()
+            self._backfilled = True
+        # Keep going while passes end matches; one whose whole batch conflicted
+        # would only reread the same matches, so it waits for the next round
+        while await self.sweep_once() > 0:
+            if not await self.lease.acquire():
+                break
+
+    async def start(self):
+        await self.worker.start()
+
+    async def stop(self):
+        await self.worker.stop()
+
+
+deadline_sweeper = MatchDeadlineSweeper()
@@ -0,0 +1,136 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# (xp, rating) awarded to the top three places of a multiplayer match
+PLACEMENT_REWARDS = [(100, 30), (50, 15), (25, 5)]
+
+
+def completion_update(
+    players: List[Dict[str, Any]],
+    ranked_players: List[Dict[str, Any]],
+    now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    The single update that completes a multiplayer match: every rank, the
+    status, the winners and the completion time together.
+
+    Ranks address players by array index so the change log has concrete paths.
+    """
+    player_indexes = {p["user_id"]: i for i, p in enumerate(players)}
+    winners = [p["user_id"] for p in ranked_players[:3]]
+    fields: Dict[str, Any] = {
+        f"players.{player_indexes[player['user_id']]}.rank": rank
+        for rank, player in enumerate(ranked_players, 1)
+    }
+    fields.update({
+        "status": "completed",
+        "completed_at": now or datetime.utcnow(),
+        "winner_id": winners[0] if winners else None,
+        "winners": winners
+    })
+    return {"$set": fields}
+
+
+def user_increment(user_id: str, amounts: Dict[str, int]) -> Optional[UpdateOne]:
+    """$inc on a user's stats as a bulk operation; None for bots and other non-user ids"""
+    if not ObjectId.is_valid(user_id) or not any(amounts.values()):
+        return None
+    return UpdateOne({"_id": ObjectId(user_id)}, {"$inc": amounts})
+
+
+def placement_reward_ops(ranked_players: List[Dict[str, Any]]) -> List[UpdateOne]:
+    """XP and rating increments for the podium of a multiplayer match"""
+    operations = []
+    for player, (xp_gain, rating_gain) in zip(ranked_players, PLACEMENT_REWARDS):
+        operation = user_increment(player["user_id"], {"xp": xp_gain, "rating": rating_gain})
+        if operation is not None:
+            operations.append(operation)
+    return operations
+
+
+def duel_reward_ops(
+    winner_id: Optional[str],
+    loser_id: Optional[str],
+    rating_change: int,
+    xp_bonus: int
+) -> List[UpdateOne]:
+    """Rating and XP increments for both sides of a 1v1 match (None skips a side)"""
+    operations = []
+    if winner_id:
+        operations.append(user_increment(winner_id, {"rating": rating_change, "xp": xp_bonus}))
+    if loser_id:
+        operations.append(user_increment(loser_id, {"rating": -rating_change}))
+    return [operation for operation in operations if operation is not None]
+
+
+def multiplayer_score_key(player: Dict[str, Any]) -> Tuple[float, float]:
+    """Higher score first, then faster completion"""
+    return (-player.get("score", 0), player.get("time_elapsed", float('inf')))
+
+
+def quiz_score_key(player: Dict[str, Any]) -> Tuple[float, float]:
+    """Higher quiz score first, then less time taken"""
+    return (-player.get("quiz_score", 0), player.get("quiz_time_taken", float('inf')))
+
+
+def timed_out_key(player: Dict[str, Any]) -> Tuple[float, float, float]:
+    """Ranking when time ran out: problems solved, then score, then time"""
+    return (-player.get("problems_solved", 0), -player.get("score", 0), player.get("time_elapsed", float('inf')))
+
+
+def expiry_update(match: Dict[str, Any], now: Optional[datetime] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Completion update for a multiplayer match whose time ran out, plus the
+    ranked players.
+
+    Players who never finished get partial credit: quiz players are scored on
+    their auto-saved answers (no time bonus), coders keep the problems they
+    solved and are charged the full time limit.
+    """
+    from app.services.quiz_generator import calculate_quiz_score
+
+    time_limit = match.get("time_limit_seconds") or 0
+    is_quiz = match.get("game_mode") == "code_quiz"
+    players = []
+    partial: Dict[str, Any] = {}
+    for index, player in enumerate(match.get("players", [])):
+        player = dict(player)
+        if not player.get("completed"):
+            if is_quiz:
+                answers = {int(k): v for k, v in (player.get("quiz_answers") or {}).items()}
+                result = calculate_quiz_score(answers, match.get("quiz_questions", []), time_limit, time_limit or 1)
+                player.update({
+                    "quiz_score": result["score"],
+                    "quiz_correct_count": result["correct"],
+                    "quiz_time_taken": time_limit,
+                    "score": result["score"]
+                })
+                fields = ("quiz_score", "quiz_correct_count", "quiz_time_taken", "score")
+            else:
+                player["time_elapsed"] = time_limit
+                fields = ("time_elapsed",)
+            player["timed_out"] = True
+            for field in (*fields, "timed_out"):
+                partial[f"players.{index}.{field}"] = player[field]
+        players.append(player)
+
+    ranked_players = sorted(players, key=quiz_score_key if is_quiz else timed_out_key)
+    update = completion_update(players, ranked_players, now)
+    update["$set"].update(partial)
+    update["$set"]["timed_out"] = True
+    return update, ranked_players
+
+
+def duel_outcome(match: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """(winner, loser) of a 1v1 whose time ran out: more problems solved, then faster; None for a draw"""
+    player1, player2 = match.get("player1") or {}, match.get("player2") or {}
+
+    def progress(player: Dict[str, Any]) -> Tuple[float, float]:
+        return (player.get("problems_solved", 0), -player.get("time_elapsed", 0.0))
+
+    if progress(player1) == progress(player2):
+        return None
+    return (player1, player2) if progress(player1) > progress(player2) else (player2, player1)
@@ -0,0 +1,85 @@
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+
+from app.services.match_store import match_store
+
+# Named projections: each endpoint loads only the fields it reads, so quiz
+# questions, code and submission histories stay in the database.
+
+# Legacy 1v1 participant check (hints)
+DUEL_PLAYERS = {"status": 1, "player1.user_id": 1, "player2.user_id": 1}
+
+# Participant check for both match shapes (leave)
+PARTICIPANTS = {"status": 1, "players.user_id": 1, "player1.user_id": 1, "player2.user_id": 1}
+
+# Quiz auto-save: status plus each player's id and completion flag
+QUIZ_PROGRESS = {"status": 1, "game_mode": 1, "players.user_id": 1, "players.completed": 1}
+
+# Submissions: all match metadata and player progress, minus the heavy fields
+# grading never reads
+SUBMISSION = {
+    "quiz_questions": 0,
+    "changes": 0,
+    **{
+        f"{slot}.{field}": 0
+        for slot in ("players", "player1", "player2")
+        for field in ("submissions", "code", "arranged_code", "test_cases_created", "quiz_answers")
+    }
+}
+
+
+def quiz_chunk(start: int, count: int) -> Dict[str, Any]:
+    """Quiz questions [start, start + count) via $slice, plus what the chunk endpoint checks"""
+    return {
+        "game_mode": 1,
+        "quiz_total_questions": 1,
+        "players.user_id": 1,
+        "quiz_questions": {"$slice": [start, count]}
+    }
+
+
+def player_index(match: Dict[str, Any], user_id: str) -> Optional[int]:
+    """Position of ``user_id`` in a multiplayer match's ``players`` (needs players.user_id)"""
+    return next((i for i, p in enumerate(match.get("players") or []) if p.get("user_id") == user_id), None)
+
+
+def duel_player_key(match: Dict[str, Any], user_id: str) -> Optional[str]:
+    """"player1"/"player2" for a legacy 1v1 participant (needs player1/2.user_id)"""
+    for key in ("player1", "player2"):
+        if (match.get(key) or {}).get("user_id") == user_id:
+            return key
+    return None
+
+
+class MatchRepository:
+    """
+    Match reads by named projection.
+
+    Reads go through the hot match store, so an owned match is projected in
+    memory and any other match with a Mongo projection. Players are located
+    by ``players.user_id`` in the projected document: the array position is
+    what updates address (``players.{i}.field``), which keeps change-log
+    paths concrete.
+    """
+
+    def __init__(self, store=match_store):
+        self.store = store
+
+    async def get(self, match_oid: ObjectId, projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return await self.store.find(match_oid, projection)
+
+    async def get_for_player(
+        self,
+        match_oid: ObjectId,
+        user_id: str,
+        projection: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """Load a multiplayer match for one player: (match, that player's index or None)"""
+        match = await self.store.find(match_oid, projection)
+        if match is None:
+            return None, None
+        return match, player_index(match, user_id)
+
+
+match_repository = MatchRepository()
@@ -0,0 +1,629 @@
+import asyncio
+import copy
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import get_settings
+from app.db.mongo import get_database
+
+settings = get_settings()
+
+FLUSH_INTERVAL_SECONDS = 0.2
+LEASE_TTL_SECONDS = 30
+LEASE_RENEW_SECONDS = 10
+
+
+def store_channel(match_id: str) -> str:
+    """Event-bus channel announcing writes made without the hot copy (no WebSocket subscribers)"""
+    return f"store:{match_id}"
+
+
+def _container(doc: Dict[str, Any], path: str, create: bool = True):
+    """Return (parent, key) for a dotted path; numeric parts index into lists"""
+    parts = path.split(".")
+    current: Any = doc
+    for part in parts[:-1]:
+        if isinstance(current, list):
+            current = current[int(part)]
+        else:
+            if current.get(part) is None:
+                if not create:
+                    return None, None
+                current[part] = {}
+            current = current[part]
+    last = parts[-1]
+    return current, (int(last) if isinstance(current, list) else last)
+
+
+def apply_update(doc: Dict[str, Any], update: Dict[str, Any]):
+    """
+    Apply a Mongo update document to ``doc`` in place.
+
+    Supports the operators the competitive router uses: $set, $unset, $inc and
+    $push (including $each/$slice), with dotted paths and numeric array indexes.
+    """
+    for path, value in update.get("$set", {}).items():
+        parent, key = _container(doc, path)
+        parent[key] = copy.deepcopy(value)
+
+    for path in update.get("$unset", {}):
+        parent, key = _container(doc, path, create=False)
+        if isinstance(parent, dict):
+            parent.pop(key, None)
+
+    for path, amount in update.get("$inc", {}).items():
+        parent, key = _container(doc, path)
+        current = parent[key] if isinstance(parent, list) else parent.get(key, 0)
+        parent[key] = (current or 0) + amount
+
+    for path, value in update.get("$push", {}).items():
+        parent, key = _container(doc, path)
+        if isinstance(parent, dict) and parent.get(key) is None:
+            parent[key] = []
+        items = parent[key]
+        if isinstance(value, dict) and "$each" in value:
+            items.extend(copy.deepcopy(value["$each"]))
+            limit = value.get("$slice")
+            if limit is not None:
+                items[:] = items[limit:] if limit < 0 else items[:limit]
+        else:
+            items.append(copy.deepcopy(value))
+
+
+def _is_slice(spec: Any) -> bool:
+    return isinstance(spec, dict) and "$slice" in spec
+
+
+def _slice(items: List[Any], spec: Any) -> List[Any]:
+    if isinstance(spec, list):
+        skip, limit = spec
+        if skip < 0:
+            skip = max(len(items) + skip, 0)
+        return items[skip:skip + limit]
+    return items[:spec] if spec >= 0 else items[spec:]
+
+
+def _projection_tree(projection: Dict[str, Any]) -> Dict[str, Any]:
+    """{"players.user_id": 1} -> {"players": {"user_id": 1}}"""
+    tree: Dict[str, Any] = {}
+    for path, spec in projection.items():
+        node = tree
+        parts = path.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = spec
+    return tree
+
+
+def _apply_projection(doc: Dict[str, Any], tree: Dict[str, Any], include: bool, top: bool = False) -> Dict[str, Any]:
+    projected = {}
+    for key, value in doc.items():
+        spec = tree.get(key)
+        if spec is None:
+            if not include or (top and key == "_id"):
+                projected[key] = copy.deepcopy(value)
+        elif _is_slice(spec):
+            projected[key] = copy.deepcopy(_slice(value, spec["$slice"]) if isinstance(value, list) else value)
+        elif isinstance(spec, dict):
+            if isinstance(value, dict):
+                projected[key] = _apply_projection(value, spec, include)
+            elif isinstance(value, list):
+                projected[key] = [
+                    _apply_projection(item, spec, include) if isinstance(item, dict) else copy.deepcopy(item)
+                    for item in value
+                    if isinstance(item, dict) or not include
+                ]
+            elif not include:
+                projected[key] = copy.deepcopy(value)
+        elif spec:
+            projected[key] = copy.deepcopy(value)
+    return projected
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Copy of ``doc`` with a Mongo find projection applied: inclusion or
+    exclusion of (dotted) paths, through arrays of subdocuments, and $slice.
+    """
+    if not projection:
+        return copy.deepcopy(doc)
+    include = any(spec for path, spec in projection.items() if path != "_id" and not _is_slice(spec))
+    return _apply_projection(doc, _projection_tree(projection), include, top=True)
+
+
+class HotMatch:
+    """In-memory authoritative copy of an active match plus its not-yet-persisted updates"""
+
+    def __init__(self, match_id: str, doc: Dict[str, Any]):
+        self.match_id = match_id
+        self.doc = doc
+        # (version the update produced, update) in application order
+        self.pending: List[Tuple[int, Dict[str, Any]]] = []
+        self.stale = False  # Someone wrote to Mongo directly; reload before next use
+        self.releasing = False  # Flush, then drop the copy and the lease
+
+
+class HotMatchStore:
+    """
+    Hot state for active matches, owned by one node at a time.
+
+    The node holding a match's lease (``match_leases`` collection) keeps the
+    match document in memory. Reads are served from memory and updates are
+    applied in memory, appended to a local journal file (fsynced before the
+    request returns) and persisted by a background flush that writes every
+    pending update of every hot match in one ordered bulk_write. Submit, save
+    and hint requests therefore no longer wait on Mongo round trips.
+
+    Every update bumps ``version`` by one and is flushed only on top of the
+    version it was applied after, so a node that stalled past its lease can
+    never write over the new owner's state: a lease that is not renewed, or a
+    flush that finds another version in Mongo while the lease has moved on,
+    drops the hot copy. Nodes that do not hold the lease write to Mongo
+    directly and announce it on the event bus so the owner reloads; owner
+    updates that raced such a write are applied on top of it.
+
+    Each node journals into its own subdirectory. Journals of a node that is
+    gone (its lease on the match expired or was taken over) are replayed
+    with the same version condition at startup, periodically, and whenever
+    this node takes over one of its matches.
+
+    Disabled by default (HOT_MATCH_STORE); when disabled every call is a plain
+    Mongo read or write.
+    """
+
+    def __init__(self, enabled: bool = False, journal_dir: str = ".match_journal"):
+        self.enabled = enabled
+        self.journal_dir = journal_dir
+        self.node_id = uuid.uuid4().hex
+        self.node_journal_dir = os.path.join(journal_dir, self.node_id)
+        self._hot: Dict[str, HotMatch] = {}
+        self._acquire_locks: Dict[str, asyncio.Lock] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()  # Keeps bulk writes in application order
+        self._last_renewal = datetime.min
+        self._last_recovery = datetime.min
+
+    # ----- Reads and writes used by the router -----
+
+    async def find(self, match_oid: ObjectId, projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        """find_one by _id, served from memory when this node holds the match"""
+        if self.enabled:
+            hot = await self._get_hot(str(match_oid))
+            if hot is not None:
+                return _project(hot.doc, projection)
+        return await get_database().matches.find_one({"_id": match_oid}, projection)
+
+    def peek(self, match_oid: ObjectId, projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        """The in-memory copy of a match hot on this node, without loading or acquiring it"""
+        hot = self._hot.get(str(match_oid)) if self.enabled else None
+        if hot is None or hot.stale:
+            return None
+        return _project(hot.doc, projection)
+
+    async def update(self, match_oid: ObjectId, update: Dict[str, Any]):
+        """update_one by _id, applied in memory and written behind when this node holds the match"""
+        await self.transition(match_oid, {}, update)
+
+    async def transition(self, match_oid: ObjectId, expected: Dict[str, Any], update: Dict[str, Any]) -> bool:
+        """
+        Conditional update_one: apply ``update`` only if the match's top-level
+        fields equal ``expected`` (e.g. {"status": "active"}). Returns whether
+        it was applied, so exactly one of several concurrent callers wins.
+        """
+        match_id = str(match_oid)
+        if self.enabled:
+            hot = await self._get_hot(match_id, acquire=True)
+            if hot is not None:
+                # No await between checking, applying and journaling: atomic for this node
+                if any(hot.doc.get(field) != value for field, value in expected.items()):
+                    return False
+                apply_update(hot.doc, update)
+                version = hot.doc.get("version", 0)
+                hot.pending.append((version, update))
+                self._journal_append(match_id, version, update)
+                return True
+
+        result = await get_database().matches.update_one({**expected, "_id": match_oid}, update)
+        if self.enabled and result.modified_count:
+            from app.services.event_bus import event_bus
+            await event_bus.publish(store_channel(match_id), {"type": "external_write"})
+        return bool(result.matched_count)
+
+    async def transition_many(self, transitions: List[Tuple[ObjectId, Dict[str, Any], Dict[str, Any]]]) -> List[ObjectId]:
+        """
+        Several conditional transitions (see ``transition``) at once; returns
+        the ids they were applied to. Matches held in memory transition there,
+        all others in one unordered bulk_write. A per-call token set by the
+        bulk updates tells which of them matched.
+        """
+        applied: List[ObjectId] = []
+        direct = []
+        for match_oid, expected, update in transitions:
+            hot = self._hot.get(str(match_oid)) if self.enabled else None
+            if hot is not None and not hot.stale:
+                if await self.transition(match_oid, expected, update):
+                    applied.append(match_oid)
+            else:
+                direct.append((match_oid, expected, update))
+        if not direct:
+            return applied
+
+        token = uuid.uuid4().hex
+        matches = get_database().matches
+        await matches.bulk_write([
+            UpdateOne(
+                {**expected, "_id": match_oid},
+                {**update, "$set": {**update.get("$set", {}), "transition_token": token}}
+            )
+            for match_oid, expected, update in direct
+        ], ordered=False)
+        changed = [
+            doc["_id"] async for doc in matches.find(
+                {"_id": {"$in": [match_oid for match_oid, _, _ in direct]}, "transition_token": token},
+                {"_id": 1}
+            )
+        ]
+        if self.enabled:
+            from app.services.event_bus import event_bus
+            for match_oid in changed:
+                await event_bus.publish(store_channel(str(match_oid)), {"type": "external_write"})
+        return applied + changed
+
+    def release(self, match_id: str):
+        """Persist and drop a match's hot copy (e.g. once it completes)"""
+        hot = self._hot.get(match_id)
+        if hot is not None:
+            hot.releasing = True
+
+    def on_event(self, channel: str, message: Dict[str, Any]):
+        """Event-bus listener: another node wrote to a match we hold, reload it before next use"""
+        if channel.startswith("store:"):
+            hot = self._hot.get(channel.split(":", 1)[1])
+            if hot is not None:
+                hot.stale = True
+
+    # ----- Ownership -----
+
+    async def _get_hot(self, match_id: str, acquire: bool = False) -> Optional[HotMatch]:
+        hot = self._hot.get(match_id)
+        if hot is not None and not hot.stale:
+            return hot
+        if hot is None and not acquire:
+            return None
+
+        lock = self._acquire_locks.setdefault(match_id, asyncio.Lock())
+        async with lock:
+            hot = self._hot.get(match_id)
+            if hot is not None and hot.stale:
+                await self._flush([hot])
+                if self._hot.get(match_id) is not hot:
+                    return None  # Dropped while flushing: another node owns it now
+                doc = await get_database().matches.find_one({"_id": ObjectId(match_id)})
+                if doc is None:
+                    del self._hot[match_id]
+                    return None
+                hot.doc = doc
+                hot.stale = False
+                return hot
+            if hot is not None:
+                return hot
+
+            doc = await get_database().matches.find_one({"_id": ObjectId(match_id)})
+            if not doc or doc.get("status") != "active" or not await self._acquire_lease(match_id):
+                return None
+            if await self.recover(match_id):
+                # A previous owner's journal was just replayed on top of what we read
+                doc = await get_database().matches.find_one({"_id": ObjectId(match_id)})
+                if not doc or doc.get("status") != "active":
+                    await get_database().match_leases.delete_one({"_id": match_id, "owner": self.node_id})
+                    return None
+            hot = HotMatch(match_id, doc)
+            self._hot[match_id] = hot
+            print(f"🔥 Match {match_id} is now hot on node {self.node_id[:8]}")
+            return hot
+
+    async def _acquire_lease(self, match_id: str) -> bool:
+        now = datetime.utcnow()
+        try:
+            await get_database().match_leases.find_one_and_update(
+                {"_id": match_id, "$or": [{"owner": self.node_id}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.node_id, "expires_at": now + timedelta(seconds=LEASE_TTL_SECONDS)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return True
+        except DuplicateKeyError:
+            # Another node holds an unexpired lease
+            return False
+
+    async def _renew_leases(self):
+        """Extend the leases of every hot match; drop the hot copy of any another node took over"""
+        now = datetime.utcnow()
+        if not self._hot or (now - self._last_renewal).total_seconds() < LEASE_RENEW_SECONDS:
+            return
+        self._last_renewal = now
+        match_ids = list(self._hot)
+        leases = get_database().match_leases
+        result = await leases.update_many(
+            {"_id": {"$in": match_ids}, "owner": self.node_id},
+            {"$set": {"expires_at": now + timedelta(seconds=LEASE_TTL_SECONDS)}}
+        )
+        if result.matched_count == len(match_ids):
+            return
+        owned = {lease["_id"] async for lease in leases.find({"_id": {"$in": match_ids}, "owner": self.node_id}, {"_id": 1})}
+        for match_id in match_ids:
+            hot = self._hot.get(match_id)
+            if hot is not None and match_id not in owned:
+                self._drop(hot, "lease lost")
+
+    def _drop(self, hot: HotMatch, reason: str, unpersisted: int = 0):
+        """Forget a hot copy this node no longer owns, unpersisted updates included"""
+        if self._hot.get(hot.match_id) is hot:
+            del self._hot[hot.match_id]
+            self._acquire_locks.pop(hot.match_id, None)
+        unpersisted += len(hot.pending)
+        hot.pending = []
+        self._journal_remove(hot.match_id)
+        print(f"⚠️ Match {hot.match_id} dropped from node {self.node_id[:8]} ({reason}), "
+              f"{unpersisted} unpersisted update(s) discarded")
+
+    # ----- Write-behind -----
+
+    async def _flush(self, hot_matches: List[HotMatch]):
+        async with self._flush_lock:
+            batch = [(hot, hot.pending) for hot in hot_matches if hot.pending]
+            if not batch:
+                return
+            for hot, _ in batch:
+                hot.pending = []
+
+            # Each update only applies on top of the version it was applied after in memory,
+            # and after this flush's previous update of the match: a flush stops at its first miss
+            operations = [
+                UpdateOne(self._flush_filter(hot, updates, i), self._marked(update, version))
+                for hot, updates in batch
+                for i, (version, update) in enumerate(updates)
+            ]
+            try:
+                result = await get_database().matches.bulk_write(operations, ordered=True)
+            except Exception:
+                await self._requeue_unapplied(batch)
+                raise
+            if result.matched_count < len(operations):
+                await self._resolve_conflicts(batch)
+
+            for hot, _ in batch:
+                if self._hot.get(hot.match_id) is hot:
+                    self._journal_rewrite(hot)
+
+    def _flush_filter(self, hot: HotMatch, updates: List[Tuple[int, Dict[str, Any]]], i: int) -> Dict[str, Any]:
+        query = {"_id": ObjectId(hot.match_id), "version": updates[i][0] - 1}
+        if i:
+            query["write_mark"] = f"{self.node_id}:{updates[i - 1][0]}"
+        return query
+
+    def _marked(self, update: Dict[str, Any], version: int) -> Dict[str, Any]:
+        """``update`` plus a write mark telling which of this node's updates was the last one applied"""
+        return {**update, "$set": {**update.get("$set", {}), "write_mark": f"{self.node_id}:{version}"}}
+
+    async def _applied_count(self, hot: HotMatch, updates: List[Tuple[int, Dict[str, Any]]]) -> int:
+        """How many of ``updates`` (one flush, applied in order until one did not match) are in Mongo"""
+        current = await get_database().matches.find_one({"_id": ObjectId(hot.match_id)}, {"write_mark": 1})
+        owner, _, version = ((current or {}).get("write_mark") or "").partition(":")
+        versions = [update_version for update_version, _ in updates]
+        if owner != self.node_id or not version.isdigit() or int(version) not in versions:
+            return 0
+        return versions.index(int(version)) + 1
+
+    async def _requeue_unapplied(self, batch: List[Tuple[HotMatch, List[Tuple[int, Dict[str, Any]]]]]):
+        """After a failed bulk write, put back only the updates Mongo did not apply"""
+        for hot, updates in batch:
+            applied = 0
+            try:
+                applied = await self._applied_count(hot, updates)
+            except Exception:
+                pass  # Unknown: retry everything, as before the write
+            hot.pending = updates[applied:] + hot.pending
+            if applied:
+                self._journal_rewrite(hot)
+
+    async def _resolve_conflicts(self, batch: List[Tuple[HotMatch, List[Tuple[int, Dict[str, Any]]]]]):
+        """
+        Handle flushed updates that found another version in Mongo.
+
+        If the lease moved to another node, this copy is outdated and its
+        updates are dropped rather than applied twice. If this node still
+        holds it, a direct write from a node without the lease got in
+        between: the remaining updates go on top of it, unless that write
+        completed the match, and the copy reloads.
+        """
+        for hot, updates in batch:
+            applied = await self._applied_count(hot, updates)
+            rest = updates[applied:]
+            if not rest:
+                continue
+            if not await self._acquire_lease(hot.match_id):
+                self._drop(hot, "lease taken over by another node", unpersisted=len(rest))
+                continue
+            hot.stale = True
+            # The first update only lands on a match that is still running, the others
+            # after the previous one (so this node's own completion does not stop the rest)
+            operations = [
+                UpdateOne(
+                    {"_id": ObjectId(hot.match_id), "write_mark": f"{self.node_id}:{rest[i - 1][0]}"}
+                    if i else {"_id": ObjectId(hot.match_id), "status": {"$ne": "completed"}},
+                    self._marked(update, version)
+                )
+                for i, (version, update) in enumerate(rest)
+            ]
+            try:
+                result = await get_database().matches.bulk_write(operations, ordered=True)
+            except Exception as e:
+                # Retry the ones that did not make it on the next flush
+                await self._requeue_unapplied([(hot, rest)])
+                print(f"⚠️ Match {hot.match_id} conflict resolution failed, retrying: {e}")
+                continue
+            if result.matched_count < len(operations):
+                print(f"⚠️ Match {hot.match_id} was completed elsewhere, "
+                      f"{len(operations) - result.matched_count} update(s) discarded")
+
+    async def flush_all(self):
+        # Find out about leases lost while this node stalled before flushing anything
+        await self._renew_leases()
+        hot_matches = list(self._hot.values())
+        await self._flush(hot_matches)
+        for hot in hot_matches:
+            if hot.releasing and not hot.pending and self._hot.get(hot.match_id) is hot:
+                del self._hot[hot.match_id]
+                self._acquire_locks.pop(hot.match_id, None)
+                await get_database().match_leases.delete_one({"_id": hot.match_id, "owner": self.node_id})
+                print(f"🧊 Match {hot.match_id} persisted and released")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            try:
+                await self.flush_all()
+                now = datetime.utcnow()
+                if (now - self._last_recovery).total_seconds() >= LEASE_TTL_SECONDS:
+                    self._last_recovery = now
+                    await self.recover()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Match write-behind flush failed: {e}")
+
+    # ----- Journal -----
+
+    def _journal_path(self, match_id: str) -> str:
+        return os.path.join(self.node_journal_dir, f"{match_id}.jsonl")
+
+    def _journal_append(self, match_id: str, version: int, update: Dict[str, Any]):
+        with open(self._journal_path(match_id), "a", encoding="utf-8") as f:
+            f.write(json_util.dumps({"version": version, "update": update}) + "\n")
+            # On disk before the update is acknowledged
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _journal_remove(self, match_id: str):
+        try:
+            os.remove(self._journal_path(match_id))
+        except FileNotFoundError:
+            pass
+
+    def _journal_rewrite(self, hot: HotMatch):
+        """Keep only the journal entries that are not persisted yet"""
+        if not hot.pending:
+            self._journal_remove(hot.match_id)
+            return
+        # Written aside and renamed over the journal, so a crash leaves one or the other
+        path = self._journal_path(hot.match_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.writelines(json_util.dumps({"version": version, "update": update}) + "\n" for version, update in hot.pending)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    async def recover(self, match_id: Optional[str] = None) -> int:
+        """
+        Replay journal entries other nodes did not persist before they went
+        away (all matches, or only ``match_id``); returns how many journals
+        were replayed. A journal stays put while its node still holds the
+        match's lease: that node is alive, on this host or another.
+        """
+        if not os.path.isdir(self.journal_dir):
+            return 0
+        leases = get_database().match_leases
+        replayed = 0
+        for owner in os.listdir(self.journal_dir):
+            node_dir = os.path.join(self.journal_dir, owner)
+            if owner == self.node_id or not os.path.isdir(node_dir):
+                continue
+            names = [f"{match_id}.jsonl"] if match_id else os.listdir(node_dir)
+            for name in names:
+                path = os.path.join(node_dir, name)
+                if not name.endswith(".jsonl") or not os.path.isfile(path):
+                    continue
+                journal_match_id = name[:-len(".jsonl")]
+                lease = await leases.find_one({"_id": journal_match_id})
+                if lease and lease.get("owner") == owner and lease.get("expires_at", datetime.min) > datetime.utcnow():
+                    continue
+                await self._replay(journal_match_id, path)
+                replayed += 1
+            if not match_id:
+                try:
+                    os.rmdir(node_dir)  # Only succeeds once the gone node's journals are all replayed
+                except OSError:
+                    pass
+        return replayed
+
+    async def _replay(self, match_id: str, path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = [line for line in f if line.strip()]
+        except FileNotFoundError:
+            return  # Another node replayed it first
+        entries = []
+        for i, line in enumerate(lines):
+            try:
+                entries.append(json_util.loads(line))
+            except ValueError:
+                if i < len(lines) - 1:
+                    raise
+                # The node died halfway through its last append, before acknowledging it
+
+        db = get_database()
+        applied = skipped = 0
+        for entry in entries:
+            # Each entry produced `version`; apply it only on top of the version before it
+            result = await db.matches.update_one(
+                {"_id": ObjectId(match_id), "version": entry["version"] - 1},
+                entry["update"]
+            )
+            if result.modified_count:
+                applied += 1
+            else:
+                skipped += 1
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        print(f"♻️ Recovered match {match_id} from journal: {applied} applied, {skipped} already persisted or superseded")
+
+    # ----- Lifecycle -----
+
+    async def start(self):
+        if not self.enabled:
+            return
+        from app.services.event_bus import event_bus
+
+        os.makedirs(self.node_journal_dir, exist_ok=True)
+        await self.recover()
+        event_bus.add_listener(self.on_event)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        print(f"🔥 Hot match store enabled (node {self.node_id[:8]}, journal {self.journal_dir})")
+
+    async def stop(self):
+        if self._flush_task is None:
+            return
+        self._flush_task.cancel()
+        try:
+            await self._flush_task
+        except asyncio.CancelledError:
+            pass
+        self._flush_task = None
+        for hot in self._hot.values():
+            hot.releasing = True
+        try:
+            await self.flush_all()
+        except Exception as e:
+            print(f"⚠️ Final match flush failed, journal kept for recovery: {e}")
+
+
+match_store = HotMatchStore(settings.hot_match_store, settings.match_journal_dir)
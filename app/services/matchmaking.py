@@ -0,0 +1,282 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# Tickets are bucketed by rating; a bucket is narrower than half the initial
+# window, so any two tickets in the same or adjacent buckets accept each other
+BUCKET_WIDTH = 50
+INITIAL_WINDOW = 100
+WIDEN_PER_SECOND = 20
+MAX_WINDOW = 600
+
+# A ticket nobody accepts within this long is matched against a bot
+BOT_FALLBACK_SECONDS = 20
+SWEEP_INTERVAL_SECONDS = 1.0
+# How long a resolved ticket is kept for late long-polls
+RESULT_TTL_SECONDS = 60
+
+QueueKey = Tuple[str, Optional[str]]  # (game_mode, problem_id)
+MatchFactory = Callable[["Ticket", Optional["Ticket"]], Awaitable[str]]
+
+
+class Ticket:
+    """One player waiting in the matchmaking queue"""
+
+    def __init__(self, user_id: str, username: str, rating: int, game_mode: str, problem_id: Optional[str] = None):
+        self.ticket_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.username = username
+        self.rating = rating
+        self.game_mode = game_mode
+        self.problem_id = problem_id
+        self.enqueued_at = time.monotonic()
+        self.resolved_at: Optional[float] = None
+        self.status = "queued"  # queued, matching, matched, cancelled, failed
+        self.match_id: Optional[str] = None
+        self.opponent: Optional[str] = None
+        self.error: Optional[str] = None
+        self._done = asyncio.Event()
+
+    @property
+    def queue_key(self) -> QueueKey:
+        return (self.game_mode, self.problem_id)
+
+    @property
+    def bucket(self) -> int:
+        return self.rating // BUCKET_WIDTH
+
+    def waited(self, now: Optional[float] = None) -> float:
+        return (now or time.monotonic()) - self.enqueued_at
+
+    def window(self, now: Optional[float] = None) -> int:
+        """Largest rating difference this ticket accepts; widens the longer it waits"""
+        return min(MAX_WINDOW, INITIAL_WINDOW + int(self.waited(now) * WIDEN_PER_SECOND))
+
+    def accepts(self, other: "Ticket", now: Optional[float] = None) -> bool:
+        return abs(self.rating - other.rating) <= self.window(now)
+
+    def resolve(self, status: str, match_id: Optional[str] = None, opponent: Optional[str] = None,
+                error: Optional[str] = None):
+        self.status = status
+        self.match_id = match_id
+        self.opponent = opponent
+        self.error = error
+        self.resolved_at = time.monotonic()
+        self._done.set()
+
+    async def wait(self, timeout: float):
+        """Return once the ticket is resolved or ``timeout`` elapses"""
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def to_public(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "ticket_id": self.ticket_id,
+            "status": self.status,
+            "game_mode": self.game_mode,
+            "waited_seconds": round(self.waited(self.resolved_at), 1),
+            "rating_window": self.window(self.resolved_at)
+        }
+        if self.match_id:
+            result["match_id"] = self.match_id
+            result["opponent"] = self.opponent
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+class RatingQueue:
+    """Queued tickets of one (game mode, problem), bucketed by rating, FIFO within a bucket"""
+
+    def __init__(self):
+        self._buckets: Dict[int, "OrderedDict[str, Ticket]"] = {}
+        self.size = 0
+
+    def add(self, ticket: Ticket):
+        self._buckets.setdefault(ticket.bucket, OrderedDict())[ticket.ticket_id] = ticket
+        self.size += 1
+
+    def remove(self, ticket: Ticket) -> bool:
+        bucket = self._buckets.get(ticket.bucket)
+        if bucket is None or bucket.pop(ticket.ticket_id, None) is None:
+            return False
+        if not bucket:
+            del self._buckets[ticket.bucket]
+        self.size -= 1
+        return True
+
+    def tickets(self) -> List[Ticket]:
+        """Every queued ticket, longest-waiting first"""
+        return sorted((t for bucket in self._buckets.values() for t in bucket.values()), key=lambda t: t.enqueued_at)
+
+    def find_opponent(self, ticket: Ticket, now: Optional[float] = None) -> Optional[Ticket]:
+        """
+        Closest acceptable opponent for ``ticket``: buckets are visited outward
+        from the ticket's own within its window, longest-waiting first within
+        a bucket, so a lookup touches at most 2 * MAX_WINDOW / BUCKET_WIDTH + 1
+        buckets no matter how many players are queued. Any two tickets of the
+        same or adjacent buckets accept each other, so only the outermost
+        buckets are ever scanned past their first ticket.
+        """
+        reach = ticket.window(now) // BUCKET_WIDTH + 1
+        for distance in range(reach + 1):
+            for bucket_id in {ticket.bucket - distance, ticket.bucket + distance}:
+                bucket = self._buckets.get(bucket_id)
+                if not bucket:
+                    continue
+                for other in bucket.values():
+                    if other is ticket or other.user_id == ticket.user_id:
+                        continue
+                    if ticket.accepts(other, now) and other.accepts(ticket, now):
+                        return other
+        return None
+
+
+class Matchmaker:
+    """
+    In-memory matchmaking for 1v1 matches.
+
+    ``enqueue`` pairs a player immediately when an acceptable opponent is
+    queued, otherwise the ticket waits while its rating window widens. A
+    background sweep retries waiting tickets (oldest first) and hands tickets
+    that waited BOT_FALLBACK_SECONDS to a bot. Claiming removes both tickets
+    from the queue without awaiting in between, so a ticket can be paired
+    only once. Clients long-poll ``Ticket.wait`` for the outcome.
+
+    The queue lives in the serving process: with several workers, route
+    matchmaking requests to one of them (or run a single worker).
+    """
+
+    def __init__(self):
+        self._queues: Dict[QueueKey, RatingQueue] = {}
+        self._tickets: Dict[str, Ticket] = {}
+        self._by_user: Dict[str, Ticket] = {}
+        self._match_factory: Optional[MatchFactory] = None
+        self._sweep_task: Optional[asyncio.Task] = None
+        # Match creations in flight (the event loop only keeps weak references)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def set_match_factory(self, factory: MatchFactory):
+        """``factory(ticket, opponent_or_None)`` creates the match and returns its id (None = bot)"""
+        self._match_factory = factory
+
+    # ----- Queue operations -----
+
+    def enqueue(self, user_id: str, username: str, rating: int, game_mode: str,
+                problem_id: Optional[str] = None) -> Ticket:
+        """Queue a player (or return their live ticket) and try to pair right away"""
+        existing = self._by_user.get(user_id)
+        if existing is not None and existing.status in ("queued", "matching"):
+            return existing
+
+        ticket = Ticket(user_id, username, rating, game_mode, problem_id)
+        self._tickets[ticket.ticket_id] = ticket
+        self._by_user[user_id] = ticket
+
+        queue = self._queues.setdefault(ticket.queue_key, RatingQueue())
+        opponent = queue.find_opponent(ticket)
+        if opponent is not None:
+            queue.remove(opponent)
+            self._claim(ticket, opponent)
+        else:
+            queue.add(ticket)
+            print(f"⏳ {username} queued for {game_mode} at rating {rating} ({queue.size} waiting)")
+        return ticket
+
+    def get(self, ticket_id: str) -> Optional[Ticket]:
+        return self._tickets.get(ticket_id)
+
+    def cancel(self, user_id: str) -> bool:
+        ticket = self._by_user.get(user_id)
+        if ticket is None or ticket.status != "queued":
+            return False
+        self._queues[ticket.queue_key].remove(ticket)
+        ticket.resolve("cancelled")
+        return True
+
+    def queued_count(self, game_mode: str) -> int:
+        return sum(queue.size for key, queue in self._queues.items() if key[0] == game_mode)
+
+    # ----- Pairing -----
+
+    def _claim(self, ticket: Ticket, opponent: Optional[Ticket]):
+        """Both tickets are already out of the queue; create the match in the background"""
+        ticket.status = "matching"
+        if opponent is not None:
+            opponent.status = "matching"
+        task = asyncio.create_task(self._create_match(ticket, opponent))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _create_match(self, ticket: Ticket, opponent: Optional[Ticket]):
+        try:
+            if self._match_factory is None:
+                raise RuntimeError("No match factory registered")
+            match_id = await self._match_factory(ticket, opponent)
+        except Exception as e:
+            print(f"❌ Matchmaking failed to create a match: {e}")
+            for t in (ticket, opponent):
+                if t is not None:
+                    t.resolve("failed", error=str(e))
+            return
+
+        if opponent is None:
+            ticket.resolve("matched", match_id, opponent="bot")
+        else:
+            ticket.resolve("matched", match_id, opponent=opponent.username)
+            opponent.resolve("matched", match_id, opponent=ticket.username)
+            print(f"🤝 Matched {ticket.username} ({ticket.rating}) vs {opponent.username} ({opponent.rating})")
+
+    def sweep(self, now: Optional[float] = None):
+        """Retry waiting tickets with their widened windows; fall back to bots; forget old results"""
+        now = now or time.monotonic()
+        for queue in list(self._queues.values()):
+            for ticket in queue.tickets():
+                if ticket.status != "queued":
+                    continue
+                opponent = queue.find_opponent(ticket, now)
+                if opponent is not None:
+                    queue.remove(ticket)
+                    queue.remove(opponent)
+                    self._claim(ticket, opponent)
+                elif ticket.waited(now) >= BOT_FALLBACK_SECONDS:
+                    queue.remove(ticket)
+                    self._claim(ticket, None)
+
+        for ticket_id, ticket in list(self._tickets.items()):
+            if ticket.resolved_at is not None and now - ticket.resolved_at > RESULT_TTL_SECONDS:
+                del self._tickets[ticket_id]
+                if self._by_user.get(ticket.user_id) is ticket:
+                    del self._by_user[ticket.user_id]
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ Matchmaking sweep failed: {e}")
+
+    # ----- Lifecycle -----
+
+    async def start(self):
+        self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self):
+        if self._sweep_task:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+matchmaker = Matchmaker()
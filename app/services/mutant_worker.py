@@ -0,0 +1,111 @@
+"""
+Batched mutant execution worker.
+
+Runs in a single child process spawned by ``MutationTester``. It reads one JSON
+job from stdin, executes the reference program (for inputs whose reference
+output is not cached yet), keeps the tests whose expected output matches the
+reference, runs every mutant against those tests and writes one JSON result
+to stdout.
+
+This file is executed as a standalone script and must not import anything
+from ``app`` - importing the app would print startup logs into stdout.
+
+Job format:
+    {
+        "inputs": ["1 2", ...],
+        "expected": ["3", ...],                          # user's expected outputs
+        "reference_outputs": {"4 5": "9"},               # cached reference outputs
+        "reference": {"1 2": "<wrapped source>", ...},   # only uncached inputs
+        "mutants": [["<wrapped source per input>", ...], ...],
+        "timeout": 2.0                                   # seconds per program run
+    }
+
+Result format:
+    {"reference_outputs": {"1 2": "3"}, "valid": [0, ...], "killed": [true, false, ...]}
+"""
+import contextlib
+import io
+import json
+import signal
+import sys
+
+ERROR_PREFIX = "!ERR:"
+
+
+class _RunTimeout(BaseException):
+    """Raised inside a program run when it exceeds its time budget"""
+
+
+def _on_alarm(signum, frame):
+    raise _RunTimeout()
+
+
+def run_program(source: str, test_input: str, timeout: float) -> str:
+    """Execute ``source`` with ``test_input`` on stdin and return its stripped stdout"""
+    stdout = io.StringIO()
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    has_alarm = hasattr(signal, "setitimer")
+
+    original_stdin = sys.stdin
+    # Same stdin handling as CodeExecutor: escaped newlines from seed data become real ones
+    sys.stdin = io.StringIO(test_input.replace('\\n', '\n'))
+    try:
+        if has_alarm:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        with contextlib.redirect_stdout(stdout):
+            exec(compile(source, "<program>", "exec"), namespace)
+    except SystemExit:
+        pass
+    except _RunTimeout:
+        return ERROR_PREFIX + "Timeout"
+    except BaseException as e:
+        return ERROR_PREFIX + type(e).__name__
+    finally:
+        if has_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        sys.stdin = original_stdin
+
+    return stdout.getvalue().strip()
+
+
+def main():
+    job = json.loads(sys.stdin.read())
+    inputs = job["inputs"]
+    expected = job["expected"]
+    timeout = float(job.get("timeout", 2.0))
+
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+    computed_outputs = {
+        test_input: run_program(source, test_input, timeout)
+        for test_input, source in job.get("reference", {}).items()
+    }
+    reference_outputs = {**job.get("reference_outputs", {}), **computed_outputs}
+
+    # Only tests the reference solution passes can judge a mutant
+    valid = [
+        i for i, test_input in enumerate(inputs)
+        if not reference_outputs[test_input].startswith(ERROR_PREFIX)
+        and reference_outputs[test_input] == expected[i]
+    ]
+
+    killed = []
+    for mutant_sources in job["mutants"]:
+        is_killed = False
+        for i in valid:
+            if run_program(mutant_sources[i], inputs[i], timeout) != reference_outputs[inputs[i]]:
+                # Early exit: one failing test is enough to kill the mutant
+                is_killed = True
+                break
+        killed.append(is_killed)
+
+    sys.stdout.write(json.dumps({
+        "reference_outputs": computed_outputs,
+        "valid": valid,
+        "killed": killed
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from app.services.bug_generator import generate_mutants
+from app.services.code_executor import code_executor
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mutant_worker.py")
+
+
+class MutationTester:
+    """
+    Scores user-written test cases by the fraction of reference mutants they kill.
+
+    All programs for one submission (the reference for uncached inputs plus
+    every mutant) run inside one batched worker process instead of one
+    subprocess per (program, test) pair. Mutants and reference outputs are
+    cached per problem, so repeat submissions only pay for the mutant runs.
+
+    Mutants that survive the problem's own test cases are dropped once per
+    problem before any scoring: they are most likely equivalent to the
+    reference, and no user test could kill them.
+    """
+
+    def __init__(
+        self,
+        max_mutants: int = 12,
+        run_timeout: float = 2.0,
+        batch_timeout: float = 30.0,
+        max_cached_problems: int = 128,
+        max_cached_inputs: int = 512
+    ):
+        self.max_mutants = max_mutants
+        self.run_timeout = run_timeout
+        self.batch_timeout = batch_timeout
+        self.max_cached_problems = max_cached_problems
+        self.max_cached_inputs = max_cached_inputs
+        self._mutants: "OrderedDict[tuple, List[str]]" = OrderedDict()
+        self._reference_outputs: "OrderedDict[tuple, Dict[str, str]]" = OrderedDict()
+
+    def _cache_key(self, problem_id: str, reference_code: str, language: str) -> tuple:
+        # Include a checksum of the code so an edited reference never reuses stale mutants
+        return (problem_id, language, zlib.crc32(reference_code.encode('utf-8')))
+
+    def _remember(self, cache: OrderedDict, key: tuple, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_cached_problems:
+            cache.popitem(last=False)
+
+    async def get_mutants(
+        self,
+        problem_id: str,
+        reference_code: str,
+        language: str,
+        problem_tests: Optional[List[Dict[str, str]]] = None
+    ) -> List[str]:
+        """
+        Return the cached mutant set for a problem, generating it on first use.
+
+        With the problem's own ``problem_tests``, mutants none of them kill are
+        dropped before the set is cached.
+        """
+        key = self._cache_key(problem_id, reference_code, language)
+        mutants = self._mutants.get(key)
+        if mutants is not None:
+            self._mutants.move_to_end(key)
+            return mutants
+
+        mutants = generate_mutants(reference_code, language, self.max_mutants)
+        if mutants and problem_tests:
+            viable = await self._drop_equivalent(problem_id, key, reference_code, mutants, problem_tests)
+            if viable is None:
+                # Pruning failed: score with the full set this time, retry on the next submission
+                return mutants
+            mutants = viable
+        self._remember(self._mutants, key, mutants)
+        print(f"🧬 Generated {len(mutants)} mutants for problem {problem_id}")
+        return mutants
+
+    async def _drop_equivalent(
+        self,
+        problem_id: str,
+        key: tuple,
+        reference_code: str,
+        mutants: List[str],
+        problem_tests: List[Dict[str, str]]
+    ) -> Optional[List[str]]:
+        """``mutants`` minus those the problem's tests cannot tell from the reference"""
+        inputs = [str(tc.get("input", "")).strip() for tc in problem_tests]
+        result = await self._run(problem_id, key, reference_code, mutants, inputs, [
+            str(tc.get("expected", "")).strip() for tc in problem_tests
+        ])
+        if result is None:
+            return None
+        if not result["valid"]:
+            # The reference does not pass its own tests: nothing to judge equivalence by
+            return mutants
+        viable = [mutant for mutant, killed in zip(mutants, result["killed"]) if killed]
+        if len(viable) < len(mutants):
+            print(f"🧬 Dropped {len(mutants) - len(viable)} equivalent mutant(s) for problem {problem_id}")
+        return viable
+
+    async def _run(
+        self,
+        problem_id: str,
+        key: tuple,
+        reference_code: str,
+        mutants: List[str],
+        inputs: List[str],
+        expected: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Run the reference and ``mutants`` on ``inputs`` in one worker; None on failure"""
+        cached_outputs = self._reference_outputs.get(key, {})
+        uncached_inputs = {i for i in inputs if i not in cached_outputs}
+
+        job = {
+            "inputs": inputs,
+            "expected": expected,
+            "reference_outputs": {i: cached_outputs[i] for i in inputs if i in cached_outputs},
+            "reference": {
+                i: code_executor._wrap_python_code(reference_code, i) for i in uncached_inputs
+            },
+            "mutants": [
+                [code_executor._wrap_python_code(mutant, i) for i in inputs]
+                for mutant in mutants
+            ],
+            "timeout": self.run_timeout
+        }
+
+        try:
+            result = await asyncio.to_thread(self._run_worker, job)
+        except Exception as e:
+            print(f"⚠️ Mutation testing failed for problem {problem_id}: {e}")
+            return None
+
+        if result["reference_outputs"]:
+            outputs = {**cached_outputs, **result["reference_outputs"]}
+            # Keep the most recently seen inputs when a problem accumulates too many
+            if len(outputs) > self.max_cached_inputs:
+                outputs = dict(list(outputs.items())[-self.max_cached_inputs:])
+            self._remember(self._reference_outputs, key, outputs)
+        return result
+
+    def _run_worker(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        result = subprocess.run(
+            [sys.executable, WORKER_PATH],
+            input=json.dumps(job),
+            capture_output=True,
+            text=True,
+            timeout=self.batch_timeout
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr or "Mutant worker failed")
+        return json.loads(result.stdout)
+
+    async def score_test_cases(
+        self,
+        problem_id: str,
+        reference_code: str,
+        language: str,
+        test_cases: List[Dict[str, str]],
+        problem_tests: Optional[List[Dict[str, str]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Run the user's tests against the reference solution and its mutants
+        (minus those ``problem_tests``, the problem's own tests, cannot kill).
+
+        Returns None when mutation scoring is not possible (unsupported
+        language, no reference code, no viable mutants or a worker failure)
+        so the caller can fall back to heuristic scoring.
+        """
+        if language.lower() != "python" or not reference_code or not test_cases:
+            return None
+
+        if "\\n" in reference_code:
+            reference_code = reference_code.replace("\\n", "\n")
+
+        mutants = await self.get_mutants(problem_id, reference_code, language, problem_tests)
+        if not mutants:
+            return None
+
+        inputs = [str(tc.get("input", "")).strip() for tc in test_cases]
+        expected = [str(tc.get("expected", "")).strip() for tc in test_cases]
+
+        key = self._cache_key(problem_id, reference_code, language)
+        result = await self._run(problem_id, key, reference_code, mutants, inputs, expected)
+        if result is None:
+            return None
+
+        killed = sum(1 for k in result["killed"] if k)
+        total = len(mutants)
+        valid = set(result["valid"])
+        score = int(round(100 * killed / total))
+
+        print(f"🧬 Mutation score for problem {problem_id}: {killed}/{total} mutants killed, "
+              f"{len(valid)}/{len(test_cases)} valid tests")
+
+        return {
+            "score": score,
+            "killed": killed,
+            "total_mutants": total,
+            "valid_tests": len(valid),
+            "invalid_tests": [i for i in range(len(test_cases)) if i not in valid]
+        }
+
+
+mutation_tester = MutationTester()
@@ -0,0 +1,166 @@
+import ast
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from itertools import zip_longest
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+TOKEN_PATTERN = re.compile(r"\S+")
+LINE_PATTERN = re.compile(r"[^\r\n]+")
+
+DEFAULT_REL_TOL = 1e-9
+DEFAULT_ABS_TOL = 1e-6
+
+
+def _tokens(output: str) -> Iterator[str]:
+    """Yield whitespace-separated tokens without splitting the whole output"""
+    for match in TOKEN_PATTERN.finditer(output):
+        yield match.group()
+
+
+class OutputComparator:
+    """
+    Compares program output against an expected output.
+
+    ``normalize`` runs once per expected output (when a problem's grading
+    context is built) and ``matches`` runs once per test execution against
+    that pre-normalized value.
+    """
+
+    mode = "exact"
+
+    def normalize(self, expected: str) -> Any:
+        return expected.strip()
+
+    def matches(self, actual: str, normalized_expected: Any) -> bool:
+        return actual.strip() == normalized_expected
+
+    def passes(self, result: Dict[str, Any], normalized_expected: Any) -> bool:
+        """True when an execute_code result succeeded and its output matches"""
+        return bool(result.get("success")) and self.matches(result.get("output", ""), normalized_expected)
+
+
+class TokenComparator(OutputComparator):
+    """Token-wise comparison: ignores trailing spaces, blank lines and spacing"""
+
+    mode = "token"
+
+    def normalize(self, expected: str) -> Tuple[str, ...]:
+        return tuple(_tokens(expected))
+
+    def matches(self, actual: str, normalized_expected: Tuple[str, ...]) -> bool:
+        for expected_token, actual_token in zip_longest(normalized_expected, _tokens(actual)):
+            if expected_token != actual_token:
+                return False
+        return True
+
+
+class FloatComparator(OutputComparator):
+    """Token-wise comparison where numeric tokens match within a tolerance"""
+
+    mode = "float"
+
+    def __init__(self, rel_tol: float = DEFAULT_REL_TOL, abs_tol: float = DEFAULT_ABS_TOL):
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+
+    @staticmethod
+    def _parse(token: str) -> Union[float, str]:
+        try:
+            return float(token)
+        except ValueError:
+            return token
+
+    def normalize(self, expected: str) -> Tuple[Union[float, str], ...]:
+        return tuple(self._parse(token) for token in _tokens(expected))
+
+    def matches(self, actual: str, normalized_expected: Tuple[Union[float, str], ...]) -> bool:
+        for expected_token, actual_token in zip_longest(normalized_expected, _tokens(actual)):
+            if expected_token is None or actual_token is None:
+                return False
+            if isinstance(expected_token, float):
+                actual_value = self._parse(actual_token)
+                if not isinstance(actual_value, float):
+                    return False
+                if not math.isclose(actual_value, expected_token, rel_tol=self.rel_tol, abs_tol=self.abs_tol):
+                    # nan == nan for grading purposes
+                    if not (math.isnan(actual_value) and math.isnan(expected_token)):
+                        return False
+            elif actual_token != expected_token:
+                return False
+        return True
+
+
+class UnorderedComparator(OutputComparator):
+    """
+    Order-insensitive comparison of list output.
+
+    A single list literal such as ``[3, 1, 2]`` is compared by its elements;
+    any other output is compared as a multiset of its non-blank lines.
+    """
+
+    mode = "unordered"
+
+    @staticmethod
+    def _elements(output: str) -> Counter:
+        stripped = output.strip()
+        if stripped.startswith("[") and stripped.endswith("]"):
+            try:
+                value = ast.literal_eval(stripped)
+            except (ValueError, SyntaxError):
+                value = None
+            if isinstance(value, list):
+                return Counter(repr(item) for item in value)
+        return Counter(
+            match.group().rstrip()
+            for match in LINE_PATTERN.finditer(output)
+            if not match.group().isspace()
+        )
+
+    def normalize(self, expected: str) -> Counter:
+        return self._elements(expected)
+
+    def matches(self, actual: str, normalized_expected: Counter) -> bool:
+        return self._elements(actual) == normalized_expected
+
+
+COMPARATORS = {
+    "exact": OutputComparator,
+    "token": TokenComparator,
+    "float": FloatComparator,
+    "unordered": UnorderedComparator,
+}
+
+
+@lru_cache(maxsize=64)
+def _build_comparator(mode: str, options: Tuple[Tuple[str, Any], ...]) -> OutputComparator:
+    return COMPARATORS[mode](**dict(options))
+
+
+def get_comparator(spec: Optional[Union[str, Dict[str, Any]]] = None) -> OutputComparator:
+    """
+    Resolve a problem's ``comparator`` field to a (shared) comparator instance.
+
+    ``spec`` is a mode name (``"token"``) or a dict with a ``mode`` key plus
+    mode options (``{"mode": "float", "abs_tol": 1e-4}``). Missing or unknown
+    specs fall back to exact comparison.
+    """
+    if not spec:
+        return _build_comparator("exact", ())
+
+    if isinstance(spec, str):
+        mode, options = spec, {}
+    else:
+        options = {key: value for key, value in spec.items() if key != "mode"}
+        mode = spec.get("mode", "exact")
+
+    if mode not in COMPARATORS:
+        print(f"⚠️ Unknown comparator '{mode}', falling back to exact comparison")
+        return _build_comparator("exact", ())
+
+    try:
+        return _build_comparator(mode, tuple(sorted(options.items())))
+    except TypeError:
+        print(f"⚠️ Invalid options for comparator '{mode}': {options}, using defaults")
+        return _build_comparator(mode, ())
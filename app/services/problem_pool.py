@@ -0,0 +1,278 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.core.config import get_settings
+from app.db.mongo import get_database
+from app.services.bug_variants import build_verified_variants
+from app.services.leader import LeaderLease, LeaderLoop
+from app.services.problem_generator import generate_competitive_problem
+from app.services.problem_validation import validate_reference
+from app.services.similarity_index import similarity_index
+
+# Inventories kept warm: lobbies race through five hard problems per match
+POOL_KEYS: List[Tuple[str, str]] = [("hard", "standard"), ("hard", "bug_hunt"), ("hard", "code_shuffle")]
+PROBLEMS_PER_LOBBY = 5
+REFILL_INTERVAL_SECONDS = 30
+# Upper bound of an inventory array (the $slice length in claims)
+MAX_INVENTORY = 1000
+# Rounds of on-the-spot generation for a claim's shortfall before using stored problems
+CLAIM_GENERATION_ROUNDS = 2
+
+PoolKey = Tuple[str, str]  # (difficulty, competitive_mode)
+
+
+def pool_id(difficulty: str, competitive_mode: str) -> str:
+    return f"{difficulty}:{competitive_mode}"
+
+
+class GenerationUnavailable(Exception):
+    """The generator served a local fallback problem where only new content will do"""
+
+
+def problem_document(problem_data: Dict[str, Any], difficulty: str, competitive_mode: str) -> Dict[str, Any]:
+    """A generated (or fallback) problem as stored in ``problems`` for custom (lobby) matches"""
+    fallback = bool(problem_data.get("fallback"))
+    return {
+        "title": problem_data["title"],
+        "description": problem_data["description"],
+        "difficulty": difficulty.capitalize(),
+        "testCases": problem_data["testCases"],
+        "examples": problem_data.get("examples", []),
+        "hint": problem_data.get("hint", ""),
+        "starterCode": problem_data.get("starterCode", {}),
+        "topics": ["competitive", "fallback" if fallback else "ai-generated", difficulty],
+        "created_for_competitive": True,
+        "competitive_mode": competitive_mode,
+        "fallback": fallback,
+        "videoUrl": "",
+        "referenceCode": problem_data.get("referenceCode", {"python": "", "cpp": "", "java": ""}),
+        "buggyCode": {},
+        "buggyCodeVariants": problem_data.get("buggyCodeVariants", {}),
+        "buggyVariantsVerifiedAt": problem_data.get("buggyVariantsVerifiedAt"),
+        "explanations": {"approach": [], "complexity": []},
+        "sampleTests": [],
+        "match_type": "custom_match",
+        "generated_at": datetime.utcnow(),
+        "reference_timings": problem_data.get("reference_timings"),
+        "validated_at": problem_data.get("validated_at")
+    }
+
+
+def validation_errors(problem_data: Dict[str, Any], competitive_mode: str) -> List[str]:
+    """Why a generated problem cannot enter the pool (empty when it can)"""
+    errors = [f"missing {field}" for field in ("title", "description") if not problem_data.get(field)]
+    test_cases = problem_data.get("testCases") or []
+    if not test_cases:
+        errors.append("no test cases")
+    elif any("input" not in case or "expected" not in case for case in test_cases):
+        errors.append("malformed test case")
+    if competitive_mode == "code_shuffle" and not (problem_data.get("referenceCode") or {}).get("python"):
+        errors.append("no python reference code to shuffle")
+    return errors
+
+
+class ProblemPool:
+    """
+    Pre-generated problems for lobby creation.
+
+    Generated problems are validated (their reference solutions must pass
+    their tests, see problem_validation; Bug Hunt problems also need verified
+    buggy variants, see bug_variants), inserted into ``problems`` ahead of
+    time and their ids queued in one ``problem_pool`` document per
+    (difficulty, competitive mode). ``claim`` takes the first n ids with a single update that slices
+    them off the queue, so concurrent lobbies never share a problem. The
+    leader node's worker tops every inventory back up to the target,
+    generating off the event loop; a claim the pool cannot cover generates
+    the shortfall on the spot, retrying failed generations, and falls back to
+    problems stored for earlier lobbies when generation keeps failing.
+
+    Only generated content is checked against the similarity index: a
+    fallback problem reuses the ``problems`` document stored the first time
+    it was served, and never enters the pool.
+    """
+
+    def __init__(self, target: Optional[int] = None, keys: List[PoolKey] = POOL_KEYS):
+        self.target = target if target is not None else get_settings().problem_pool_target
+        self.keys = keys
+        self.lease = LeaderLease("problem_pool", ttl_seconds=REFILL_INTERVAL_SECONDS * 3)
+        self.worker = LeaderLoop(self.lease, REFILL_INTERVAL_SECONDS, self._step, "Problem pool refill failed")
+
+    async def generate(self, difficulty: str, competitive_mode: str, allow_fallback: bool = True) -> str:
+        """
+        Generate, validate (reference solutions included) and insert one
+        problem; returns its id. A fallback problem that was stored before is
+        reused as is; with ``allow_fallback`` off it raises GenerationUnavailable.
+        """
+        problem_data = await generate_competitive_problem(difficulty, competitive_mode)
+        fallback = bool(problem_data.get("fallback"))
+        if fallback:
+            if not allow_fallback:
+                raise GenerationUnavailable(f"generator served fallback problem '{problem_data.get('title')}'")
+            existing = await get_database().problems.find_one({
+                "fallback": True,
+                "title": problem_data.get("title"),
+                "match_type": "custom_match",
+                "competitive_mode": competitive_mode,
+                "difficulty": difficulty.capitalize()
+            }, {"_id": 1})
+            if existing:
+                return str(existing["_id"])
+        errors = validation_errors(problem_data, competitive_mode)
+        if errors:
+            raise ValueError(f"generated problem rejected: {', '.join(errors)}")
+        if not fallback:
+            duplicate = similarity_index.find_duplicate("problems", problem_data)
+            if duplicate:
+                raise ValueError(f"generated problem '{problem_data['title']}' is a near-duplicate of {duplicate[0]}")
+        validation = await validate_reference(problem_data)
+        if not validation.accepted:
+            raise ValueError(f"generated problem '{problem_data['title']}' rejected: {validation.reason}")
+        if validation.dropped_tests or validation.dropped_languages:
+            print(f"🔧 Repaired '{problem_data['title']}': dropped tests {validation.dropped_tests}, "
+                  f"reference languages {validation.dropped_languages}")
+        problem_data = validation.problem
+        if competitive_mode == "bug_hunt":
+            variants = await build_verified_variants(problem_data)
+            if not variants:
+                raise ValueError(f"generated problem '{problem_data['title']}' rejected: no verified buggy variants")
+            problem_data["buggyCodeVariants"] = {"python": variants}
+            problem_data["buggyVariantsVerifiedAt"] = datetime.utcnow()
+        doc = problem_document(problem_data, difficulty, competitive_mode)
+        result = await get_database().problems.insert_one(doc)
+        if not fallback:
+            await similarity_index.add("problems", [doc])
+        return str(result.inserted_id)
+
+    async def claim(self, difficulty: str, competitive_mode: str, count: int = PROBLEMS_PER_LOBBY) -> List[str]:
+        """
+        Take ``count`` problem ids for one match: pool first, then generated
+        now, then stored custom-match problems. Fewer than ``count`` only when
+        all of those run dry; raises LookupError when there is none at all.
+        """
+        key = pool_id(difficulty, competitive_mode)
+        before = await get_database().problem_pool.find_one_and_update(
+            {"_id": key},
+            [{"$set": {"problem_ids": {"$slice": [{"$ifNull": ["$problem_ids", []]}, count, MAX_INVENTORY]}}}],
+            projection={"problem_ids": {"$slice": count}},
+            return_document=ReturnDocument.BEFORE
+        )
+        claimed = list((before or {}).get("problem_ids", []))[:count]
+        # Wake the worker early so the pool refills between lobbies
+        self.worker.wake()
+
+        problem_ids = list(claimed)
+        try:
+            if len(problem_ids) < count:
+                print(f"⚠️ Problem pool {key} short by {count - len(problem_ids)}, generating now")
+                problem_ids += await self._generate_now(difficulty, competitive_mode, count - len(problem_ids), problem_ids)
+            if len(problem_ids) < count:
+                problem_ids += await self._stored(difficulty, competitive_mode, count - len(problem_ids), problem_ids)
+            if not problem_ids:
+                raise LookupError(f"no {difficulty} {competitive_mode} problems available")
+        except BaseException:
+            # The match will not use them: back to the front of the queue for the next claim
+            if claimed:
+                await get_database().problem_pool.update_one(
+                    {"_id": key}, {"$push": {"problem_ids": {"$each": claimed, "$position": 0}}}
+                )
+            raise
+        if len(problem_ids) < count:
+            print(f"⚠️ Only {len(problem_ids)}/{count} {key} problems available for this match")
+        return problem_ids
+
+    async def _generate_now(self, difficulty: str, competitive_mode: str, needed: int, taken: List[str]) -> List[str]:
+        """Up to ``needed`` new problem ids; a failed generation is retried in the next round"""
+        problem_ids: List[str] = []
+        for _ in range(CLAIM_GENERATION_ROUNDS):
+            missing = needed - len(problem_ids)
+            if missing <= 0:
+                break
+            results = await asyncio.gather(
+                *(self.generate(difficulty, competitive_mode) for _ in range(missing)),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, BaseException):
+                    print(f"⚠️ Problem pool {pool_id(difficulty, competitive_mode)}: {result}")
+                elif result not in taken and result not in problem_ids:
+                    problem_ids.append(result)
+        return problem_ids
+
+    async def _stored(self, difficulty: str, competitive_mode: str, needed: int, taken: List[str]) -> List[str]:
+        """Random custom-match problems generated for earlier lobbies, excluding ``taken``"""
+        cursor = get_database().problems.aggregate([
+            {"$match": {
+                "created_for_competitive": True,
+                "match_type": "custom_match",
+                "competitive_mode": competitive_mode,
+                "difficulty": difficulty.capitalize(),
+                "_id": {"$nin": [ObjectId(problem_id) for problem_id in taken if ObjectId.is_valid(problem_id)]}
+            }},
+            {"$sample": {"size": needed}},
+            {"$project": {"_id": 1}}
+        ])
+        problem_ids = [str(doc["_id"]) async for doc in cursor]
+        if problem_ids:
+            print(f"♻️ Reusing {len(problem_ids)} stored {pool_id(difficulty, competitive_mode)} problem(s)")
+        return problem_ids
+
+    async def inventory(self) -> Dict[str, int]:
+        """Queued problems per pool id"""
+        cursor = get_database().problem_pool.find({}, {"size": {"$size": {"$ifNull": ["$problem_ids", []]}}})
+        return {doc["_id"]: doc["size"] async for doc in cursor}
+
+    async def refill(self) -> int:
+        """
+        Generate until every inventory reaches the target; returns how many
+        were added. Each problem takes a while (generation, validation, bug
+        variants), so the lease is renewed before every one and the refill
+        stops as soon as another node has taken over.
+        """
+        sizes = await self.inventory()
+        added = 0
+        try:
+            for difficulty, competitive_mode in self.keys:
+                key = pool_id(difficulty, competitive_mode)
+                for _ in range(max(0, self.target - sizes.get(key, 0))):
+                    if not await self.lease.acquire():
+                        print("⚠️ Problem pool refill stopped: no longer leader")
+                        return added
+                    try:
+                        problem_id = await self.generate(difficulty, competitive_mode, allow_fallback=False)
+                    except GenerationUnavailable as e:
+                        # Nothing new to pool until generation is back; claims still get fallbacks
+                        print(f"⚠️ Problem pool refill paused: {e}")
+                        return added
+                    except Exception as e:
+                        print(f"⚠️ Problem pool {key}: {e}")
+                        continue
+                    await get_database().problem_pool.update_one(
+                        {"_id": key},
+                        {
+                            "$push": {"problem_ids": problem_id},
+                            "$setOnInsert": {"difficulty": difficulty, "competitive_mode": competitive_mode}
+                        },
+                        upsert=True
+                    )
+                    added += 1
+        finally:
+            if added:
+                print(f"🧩 Problem pool refilled with {added} problem(s)")
+        return added
+
+    async def _step(self):
+        if await self.lease.acquire():
+            await self.refill()
+
+    async def start(self):
+        await self.worker.start()
+
+    async def stop(self):
+        await self.worker.stop()
+
+
+problem_pool = ProblemPool()
@@ -0,0 +1,114 @@
+import asyncio
+import copy
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.code_executor import code_executor
+from app.services.output_comparator import get_comparator
+
+# Grading, Code Shuffle and Bug Hunt all run on the python reference
+PRIMARY_LANGUAGE = "python"
+# Reference runs in flight at once across all languages and tests
+VALIDATION_CONCURRENCY = 8
+# Failing tests are dropped only while at least this many passing ones remain
+MIN_VALID_TESTS = 3
+# ...and only when they are at most this share of the tests
+MAX_DROPPED_SHARE = 0.5
+
+
+class ReferenceValidation:
+    """Outcome of running a generated problem's reference solutions against its tests"""
+
+    def __init__(self):
+        self.accepted = False
+        self.reason: Optional[str] = None
+        self.problem: Optional[Dict[str, Any]] = None  # the (repaired) problem when accepted
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.dropped_tests: List[int] = []
+        self.dropped_languages: List[str] = []
+
+    def reject(self, reason: str) -> "ReferenceValidation":
+        self.accepted = False
+        self.reason = reason
+        return self
+
+
+async def validate_reference(
+    problem: Dict[str, Any],
+    executor=code_executor,
+    concurrency: int = VALIDATION_CONCURRENCY
+) -> ReferenceValidation:
+    """
+    Run every supported language's reference solution against every test
+    case, all in parallel (bounded by ``concurrency``).
+
+    The python reference must run cleanly on every test. Tests whose expected
+    output it does not reproduce are dropped when enough passing tests remain,
+    otherwise the problem is rejected. Other languages' references that fail
+    a kept test are blanked rather than rejecting the problem. The accepted
+    problem carries ``reference_timings`` (max and total seconds per
+    language) and ``validated_at``.
+    """
+    validation = ReferenceValidation()
+    comparator = get_comparator(problem.get("comparator"))
+    references = {
+        language: code
+        for language, code in (problem.get("referenceCode") or {}).items()
+        if code and language in executor.supported_languages
+    }
+    if PRIMARY_LANGUAGE not in references:
+        return validation.reject(f"no {PRIMARY_LANGUAGE} reference solution")
+
+    test_cases = problem.get("testCases") or []
+    # Same filter as grading: tests with empty inputs never run
+    indexes = [i for i, tc in enumerate(test_cases) if (tc.get("input") or "").strip()]
+    if not indexes:
+        return validation.reject("no runnable test cases")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(language: str, index: int) -> Tuple[str, int, Dict[str, Any]]:
+        async with semaphore:
+            result = await executor.execute_code(references[language], language, test_cases[index]["input"].strip())
+        return language, index, result
+
+    runs = await asyncio.gather(*(run(language, i) for language in references for i in indexes))
+
+    passed: Dict[str, Dict[int, bool]] = {language: {} for language in references}
+    for language, index, result in runs:
+        expected = comparator.normalize((test_cases[index].get("expected") or "").strip())
+        passed[language][index] = comparator.passes(result, expected)
+        timing = validation.timings.setdefault(language, {"max": 0.0, "total": 0.0})
+        timing["max"] = max(timing["max"], result.get("execution_time", 0.0))
+        timing["total"] += result.get("execution_time", 0.0)
+
+    crashed = sorted(index for language, index, result in runs if language == PRIMARY_LANGUAGE and not result.get("success"))
+    if crashed:
+        return validation.reject(f"{PRIMARY_LANGUAGE} reference fails to run on test(s) {crashed}")
+
+    failing = [i for i in indexes if not passed[PRIMARY_LANGUAGE][i]]
+    kept = [i for i in indexes if passed[PRIMARY_LANGUAGE][i]]
+    if failing and (len(kept) < MIN_VALID_TESTS or len(failing) > MAX_DROPPED_SHARE * len(indexes)):
+        return validation.reject(
+            f"{PRIMARY_LANGUAGE} reference disagrees with {len(failing)}/{len(indexes)} test(s)"
+        )
+
+    repaired = copy.deepcopy(problem)
+    if failing:
+        validation.dropped_tests = failing
+        # Empty-input tests are kept as they were: grading skips them anyway
+        repaired["testCases"] = [tc for i, tc in enumerate(test_cases) if i not in failing]
+    for language in references:
+        if language != PRIMARY_LANGUAGE and not all(passed[language][i] for i in kept):
+            validation.dropped_languages.append(language)
+            repaired["referenceCode"][language] = ""
+            validation.timings.pop(language, None)
+
+    repaired["reference_timings"] = {
+        language: {"max": round(timing["max"], 4), "total": round(timing["total"], 4)}
+        for language, timing in validation.timings.items()
+    }
+    repaired["validated_at"] = datetime.utcnow()
+    validation.problem = repaired
+    validation.accepted = True
+    return validation
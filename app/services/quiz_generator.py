@@ -1,5 +1,5 @@
-import google.generativeai as genai
-from app.core.config import get_settings
+from app.services.llm_client import llm_client
+from app.services.similarity_index import similarity_index
 import json
 import random
 import asyncio
@@ -8,12 +8,6 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from bson import ObjectId
 
-settings = get_settings()
-
-# Configure Gemini
-if settings.google_api_key:
-    genai.configure(api_key=settings.google_api_key)
-
 # Load question banks from JSON files
 QUESTION_BANKS = {}
 
@@ -62,6 +56,7 @@ POINTS_BY_DIFFICULTY = {
 
 def generate_sample_question(language: str, difficulty: str, question_type: str) -> Dict:
     """Generate a sample question from JSON files (fallback for quota issues)"""
+    llm_client.record_fallback("quiz_question")
     
     # Try to get question from loaded JSON files
     try:
@@ -452,17 +447,16 @@ async def generate_single_question(
 ) -> Optional[Dict]:
     """Generate a single quiz question using AI"""
     
-    if not settings.google_api_key:
+    if not llm_client.available:
         print("⚠️ No API key, using sample question")
         return generate_sample_question(language, difficulty, question_type)
     
     try:
         # Use gemini-flash-latest (alias for latest stable flash model)
-        model = genai.GenerativeModel('gemini-flash-latest')
         prompt = build_question_prompt(language, difficulty, question_type)
         
-        response = model.generate_content(prompt)
-        question_text = response.text.strip()
+        response_text = await llm_client.generate(prompt, model='gemini-flash-latest')
+        question_text = response_text.strip()
         
         # Remove markdown code blocks if present
         if question_text.startswith("```"):
@@ -500,6 +494,7 @@ async def generate_single_question(
         question_data["times_incorrect"] = 0
         question_data["average_time_to_answer"] = 0.0
         
+        llm_client.record_generated("quiz_question")
         return question_data
         
     except json.JSONDecodeError as e:
@@ -560,6 +555,7 @@ async def save_questions(db, questions: List[Dict]) -> List[str]:
         return []
     
     result = await db.quiz_questions.insert_many(questions)
+    await similarity_index.add("quiz_questions", questions)
     return [str(id) for id in result.inserted_ids]
 
 
@@ -631,33 +627,20 @@ async def generate_quiz_questions(
     print(f"  🤖 Need to generate {len(questions_to_generate)} new questions")
     
     # Generate missing questions with AI
-    if questions_to_generate and settings.google_api_key:
+    if questions_to_generate and llm_client.available:
         print(f"  🤖 Generating with AI...")
         
-        # Generate in batches to respect rate limits
-        batch_size = 5
-        new_questions = []
+        # All in parallel: the generation client bounds concurrency and request rate
+        results = await asyncio.gather(*(
+            generate_single_question(lang, diff, qtype)
+            for lang, diff, qtype in questions_to_generate
+        ))
         
-        for i in range(0, len(questions_to_generate), batch_size):
-            batch = questions_to_generate[i:i + batch_size]
-            
-            # Generate batch in parallel
-            tasks = [
-                generate_single_question(lang, diff, qtype)
-                for lang, diff, qtype in batch
-            ]
-            
-            batch_results = await asyncio.gather(*tasks)
-            
-            # Filter out None results
-            valid_results = [q for q in batch_results if q is not None]
-            new_questions.extend(valid_results)
-            
-            print(f"     Generated {len(valid_results)}/{len(batch)} questions in batch")
-            
-            # Small delay between batches
-            if i + batch_size < len(questions_to_generate):
-                await asyncio.sleep(0.5)
+        # Filter out None results and near-duplicates of known questions
+        generated = [q for q in results if q is not None]
+        new_questions = similarity_index.remove_duplicates("quiz_questions", generated)
+        print(f"     Generated {len(generated)}/{len(questions_to_generate)} questions, "
+              f"{len(generated) - len(new_questions)} near-duplicate(s) dropped")
         
         # Save new questions to database
         if new_questions:
@@ -0,0 +1,84 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Set
+
+from fastapi import WebSocket
+
+SEND_TIMEOUT_SECONDS = 5
+
+
+def match_channel(match_id: str) -> str:
+    return f"match:{match_id}"
+
+
+def spectator_channel(match_id: str) -> str:
+    return f"match:{match_id}:spectators"
+
+
+def lobby_channel(game_id: str) -> str:
+    return f"lobby:{game_id.upper()}"
+
+
+class RealtimeHub:
+    """
+    Fan-out of match and lobby state to connected WebSocket clients.
+
+    Clients subscribe to a channel (one per match or lobby). When the state
+    behind a channel changes, the caller loads it once and ``publish`` sends
+    the same message to every subscriber, so database reads scale with state
+    changes instead of with the number of clients polling.
+    """
+
+    def __init__(self):
+        self._channels: Dict[str, Set[WebSocket]] = {}
+
+    def subscribe(self, channel: str, websocket: WebSocket):
+        self._channels.setdefault(channel, set()).add(websocket)
+        print(f"🔌 WebSocket subscribed to {channel} ({len(self._channels[channel])} connected)")
+
+    def unsubscribe(self, channel: str, websocket: WebSocket):
+        subscribers = self._channels.get(channel)
+        if subscribers is None:
+            return
+        subscribers.discard(websocket)
+        if not subscribers:
+            del self._channels[channel]
+        print(f"🔌 WebSocket unsubscribed from {channel}")
+
+    def has_subscribers(self, channel: str) -> bool:
+        return bool(self._channels.get(channel))
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._channels.get(channel, ()))
+
+    def channels(self, prefix: str = "") -> List[str]:
+        """Channels with at least one subscriber on this node"""
+        return [channel for channel in self._channels if channel.startswith(prefix)]
+
+    async def _send(self, channel: str, websocket: WebSocket, text: str):
+        try:
+            await asyncio.wait_for(websocket.send_text(text), SEND_TIMEOUT_SECONDS)
+        except Exception:
+            # Dead or stuck connection; the client reconnects and resyncs
+            self.unsubscribe(channel, websocket)
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        """Send ``message`` to every subscriber of ``channel``; returns how many were targeted"""
+        subscribers = list(self._channels.get(channel, ()))
+        if not subscribers:
+            return 0
+        # Serialize once for the whole channel, not once per connection
+        text = json.dumps(message)
+        await asyncio.gather(*(self._send(channel, ws, text) for ws in subscribers))
+        return len(subscribers)
+
+    async def close_channel(self, channel: str, code: int = 1000):
+        """Close every connection of a channel (e.g. the lobby was deleted)"""
+        for websocket in list(self._channels.pop(channel, ())):
+            try:
+                await websocket.close(code=code)
+            except Exception:
+                pass
+
+
+realtime_hub = RealtimeHub()
@@ -0,0 +1,155 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from app.db.mongo import get_database
+
+TIMER_POLL_SECONDS = 1.0
+# A claimed timer whose handler has not finished by then is retried elsewhere
+TIMER_LEASE_SECONDS = 60
+TIMER_BATCH_SIZE = 100
+TIMER_MAX_ATTEMPTS = 5
+TIMER_RETRY_BASE_SECONDS = 5
+
+TimerHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class TimerScheduler:
+    """
+    Durable one-shot timers stored in the ``timers`` collection.
+
+    A timer is a document with a ``kind``, a ``payload`` and ``run_at``, the
+    time it becomes runnable. Every node polls for due timers and claims one
+    by atomically moving its ``run_at`` a lease into the future, so the same
+    index (``run_at``) serves both due-time lookups and lease expiry: a timer
+    whose node dies mid-run becomes due again when the lease runs out.
+    Finished timers are deleted; failing ones are retried with backoff up to
+    TIMER_MAX_ATTEMPTS. Handlers must tolerate running more than once.
+    """
+
+    def __init__(self, collection_name: str = "timers"):
+        self.collection_name = collection_name
+        self.node_id = uuid.uuid4().hex
+        self._handlers: Dict[str, TimerHandler] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def collection(self):
+        return get_database()[self.collection_name]
+
+    def register(self, kind: str, handler: TimerHandler):
+        """Run ``handler(payload)`` for every due timer of ``kind``"""
+        self._handlers[kind] = handler
+
+    async def schedule(self, kind: str, run_at: datetime, payload: Dict[str, Any], key: Optional[str] = None) -> str:
+        """
+        Persist a timer; returns its id. With a ``key`` the timer is unique per
+        (kind, key) and scheduling it again moves it instead of adding another.
+        """
+        doc = {
+            "kind": kind,
+            "payload": payload,
+            "due_at": run_at,
+            "run_at": run_at,
+            "attempts": 0,
+            "owner": None,
+            "created_at": datetime.utcnow()
+        }
+        if key is None:
+            result = await self.collection.insert_one(doc)
+            return str(result.inserted_id)
+
+        timer_id = f"{kind}:{key}"
+        await self.collection.replace_one({"_id": timer_id}, doc, upsert=True)
+        return timer_id
+
+    async def schedule_in(self, kind: str, delay_seconds: float, payload: Dict[str, Any], key: Optional[str] = None) -> str:
+        return await self.schedule(kind, datetime.utcnow() + timedelta(seconds=delay_seconds), payload, key)
+
+    async def cancel(self, kind: str, key: str) -> bool:
+        result = await self.collection.delete_one({"_id": f"{kind}:{key}"})
+        return bool(result.deleted_count)
+
+    # ----- Running -----
+
+    async def _claim(self, now: datetime) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one_and_update(
+            {"run_at": {"$lte": now}},
+            {
+                "$set": {"run_at": now + timedelta(seconds=TIMER_LEASE_SECONDS), "owner": self.node_id},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _run(self, timer: Dict[str, Any]):
+        kind = timer.get("kind")
+        handler = self._handlers.get(kind)
+        try:
+            if handler is None:
+                raise LookupError(f"no handler registered for timer kind '{kind}'")
+            await handler(timer.get("payload", {}))
+        except Exception as e:
+            attempts = timer.get("attempts", 1)
+            if attempts >= TIMER_MAX_ATTEMPTS:
+                print(f"❌ Timer {timer['_id']} ({kind}) failed {attempts} times, dropping it: {e}")
+                await self.collection.delete_one({"_id": timer["_id"], "owner": self.node_id})
+            else:
+                retry_in = TIMER_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+                print(f"⚠️ Timer {timer['_id']} ({kind}) failed, retrying in {retry_in}s: {e}")
+                await self.collection.update_one(
+                    {"_id": timer["_id"], "owner": self.node_id},
+                    {"$set": {"run_at": datetime.utcnow() + timedelta(seconds=retry_in), "owner": None}}
+                )
+            return
+
+        # Only delete if no other node re-claimed it after our lease ran out
+        await self.collection.delete_one({"_id": timer["_id"], "owner": self.node_id, "attempts": timer["attempts"]})
+
+    async def run_due(self, now: Optional[datetime] = None) -> int:
+        """Claim and run up to TIMER_BATCH_SIZE due timers; returns how many ran"""
+        now = now or datetime.utcnow()
+        claimed: List[Dict[str, Any]] = []
+        while len(claimed) < TIMER_BATCH_SIZE:
+            timer = await self._claim(now)
+            if timer is None:
+                break
+            claimed.append(timer)
+        if claimed:
+            await asyncio.gather(*(self._run(timer) for timer in claimed))
+        return len(claimed)
+
+    async def _loop(self):
+        while True:
+            try:
+                ran = await self.run_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Timer poll failed: {e}")
+                ran = 0
+            # A full batch means more are probably due: keep draining
+            if ran < TIMER_BATCH_SIZE:
+                await asyncio.sleep(TIMER_POLL_SECONDS)
+
+    # ----- Lifecycle -----
+
+    async def start(self):
+        self._task = asyncio.create_task(self._loop())
+        print(f"⏰ Timer scheduler started (node {self.node_id[:8]}, kinds: {', '.join(sorted(self._handlers))})")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+scheduler = TimerScheduler()
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import random
+import re
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from app.db.mongo import get_database
+from app.services.leader import LeaderLease, LeaderLoop
+
+# 64 MinHash values in 16 bands of 4: items sharing any band are candidates,
+# which catches pairs down to ~0.5 Jaccard; candidates are then confirmed on
+# the full signature against NEAR_DUPLICATE_THRESHOLD
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+NEAR_DUPLICATE_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+
+REFRESH_SECONDS = 30
+BACKFILL_BATCH_SIZE = 500
+
+_PRIME = (1 << 61) - 1
+_MASK = 0xFFFFFFFF
+_rng = random.Random(0x5EED)
+PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+WORD_PATTERN = re.compile(r"[a-z0-9_]+")
+CODE_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+COMMENT_PATTERN = re.compile(r"(#|//)[^\n]*")
+
+Signature = array  # NUM_PERM unsigned 32-bit MinHash values
+
+
+def _hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+
+
+def _shingles(tokens: List[str], prefix: str) -> Set[int]:
+    if len(tokens) <= SHINGLE_SIZE:
+        return {_hash(prefix + " ".join(tokens))} if tokens else set()
+    return {_hash(prefix + " ".join(tokens[i:i + SHINGLE_SIZE])) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def text_shingles(text: str) -> Set[int]:
+    """Word 3-grams of lower-cased prose"""
+    return _shingles(WORD_PATTERN.findall((text or "").lower()), "t:")
+
+
+def code_shingles(code: str) -> Set[int]:
+    """Token 3-grams of code without comments, so reformatting does not matter"""
+    return _shingles(CODE_TOKEN_PATTERN.findall(COMMENT_PATTERN.sub("", code or "")), "c:")
+
+
+def minhash(shingles: Set[int]) -> Optional[Signature]:
+    if not shingles:
+        return None
+    return array("I", (min((a * s + b) % _PRIME for s in shingles) & _MASK for a, b in PERMUTATIONS))
+
+
+def similarity(first: Signature, second: Signature) -> float:
+    """Estimated Jaccard similarity of the two shingle sets"""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERM
+
+
+def _band_keys(signature: Signature) -> List[int]:
+    return [hash(tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+def problem_signature(problem: Dict[str, Any]) -> Optional[Signature]:
+    """Title and description prose plus the python reference solution"""
+    reference = (problem.get("referenceCode") or {}).get("python", "")
+    return minhash(text_shingles(f"{problem.get('title', '')} {problem.get('description', '')}") | code_shingles(reference))
+
+
+def question_signature(question: Dict[str, Any]) -> Optional[Signature]:
+    """Question prose, its code snippet and the answer options"""
+    options = " ".join(str(option) for option in question.get("options") or [])
+    return minhash(text_shingles(f"{question.get('question', '')} {options}") | code_shingles(question.get("code", "")))
+
+
+class _Namespace:
+    """LSH buckets and signatures of one collection"""
+
+    def __init__(self):
+        self.signatures: Dict[str, Signature] = {}
+        self.buckets: List[Dict[int, List[str]]] = [{} for _ in range(BANDS)]
+
+    def add(self, item_id: str, signature: Signature):
+        if item_id in self.signatures:
+            return
+        self.signatures[item_id] = signature
+        for bucket, key in zip(self.buckets, _band_keys(signature)):
+            bucket.setdefault(key, []).append(item_id)
+
+    def nearest(self, signature: Signature, threshold: float) -> Optional[Tuple[str, float]]:
+        candidates: Set[str] = set()
+        for bucket, key in zip(self.buckets, _band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        best: Optional[Tuple[str, float]] = None
+        for item_id in candidates:
+            score = similarity(signature, self.signatures[item_id])
+            if score >= threshold and (best is None or score > best[1]):
+                best = (item_id, score)
+        return best
+
+
+class SimilarityIndex:
+    """
+    MinHash/LSH near-duplicate index over generated problems and quiz questions.
+
+    Lookups run against in-memory LSH buckets: a signature touches BANDS
+    buckets and compares only the few items sharing one, so checks stay well
+    under a millisecond at 100k items. Signatures are persisted in the
+    ``similarity_index`` collection as items are added and every node
+    reloads new entries every REFRESH_SECONDS; the leader backfills
+    documents inserted before the index existed, tracking its progress per
+    source collection.
+    """
+
+    SOURCES: Dict[str, Callable[[Dict[str, Any]], Optional[Signature]]] = {
+        "problems": problem_signature,
+        "quiz_questions": question_signature
+    }
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.namespaces: Dict[str, _Namespace] = {name: _Namespace() for name in self.SOURCES}
+        self.lease = LeaderLease("similarity_backfill", ttl_seconds=REFRESH_SECONDS * 3)
+        self._loaded_until: Optional[datetime] = None
+        self.worker = LeaderLoop(self.lease, REFRESH_SECONDS, self._step, "Similarity index refresh failed")
+
+    @property
+    def collection(self):
+        return get_database().similarity_index
+
+    def signature(self, namespace: str, doc: Dict[str, Any]) -> Optional[Signature]:
+        return self.SOURCES[namespace](doc)
+
+    def find_duplicate(self, namespace: str, doc: Dict[str, Any]) -> Optional[Tuple[str, float]]:
+        """(id, similarity) of the closest indexed near-duplicate of ``doc``, None if it is new"""
+        signature = self.signature(namespace, doc)
+        if signature is None:
+            return None
+        return self.namespaces[namespace].nearest(signature, self.threshold)
+
+    def remove_duplicates(self, namespace: str, docs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """``docs`` minus near-duplicates of indexed items and of earlier docs in the batch"""
+        batch = _Namespace()
+        unique = []
+        for i, doc in enumerate(docs):
+            signature = self.signature(namespace, doc)
+            if signature is not None:
+                if self.namespaces[namespace].nearest(signature, self.threshold) or batch.nearest(signature, self.threshold):
+                    continue
+                batch.add(str(i), signature)
+            unique.append(doc)
+        return unique
+
+    def _signatures(self, namespace: str, docs: Iterable[Dict[str, Any]]) -> List[Tuple[str, Signature]]:
+        entries = []
+        for doc in docs:
+            signature = self.signature(namespace, doc)
+            if signature is not None:
+                entries.append((str(doc["_id"]), signature))
+        return entries
+
+    async def add(self, namespace: str, docs: Iterable[Dict[str, Any]]):
+        """Index inserted documents (they need their ``_id``) here and in the persisted index"""
+        await self._store(namespace, self._signatures(namespace, docs))
+
+    async def _store(self, namespace: str, entries: List[Tuple[str, Signature]]):
+        operations = []
+        now = datetime.utcnow()
+        for item_id, signature in entries:
+            self.namespaces[namespace].add(item_id, signature)
+            operations.append(UpdateOne(
+                {"_id": f"{namespace}:{item_id}"},
+                {"$setOnInsert": {
+                    "namespace": namespace,
+                    "item_id": item_id,
+                    "signature": signature.tolist(),
+                    "indexed_at": now
+                }},
+                upsert=True
+            ))
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    # ----- Persistence -----
+
+    async def refresh(self) -> int:
+        """Load persisted signatures added since the last load (all of them the first time)"""
+        query: Dict[str, Any] = {"namespace": {"$in": list(self.SOURCES)}}
+        if self._loaded_until is not None:
+            # Overlap covers entries written with slightly older clocks; adds are idempotent
+            query["indexed_at"] = {"$gte": self._loaded_until - timedelta(seconds=REFRESH_SECONDS)}
+        started = datetime.utcnow()
+        loaded = 0
+        async for entry in self.collection.find(query, {"namespace": 1, "item_id": 1, "signature": 1}):
+            self.namespaces[entry["namespace"]].add(entry["item_id"], array("I", entry["signature"]))
+            loaded += 1
+        self._loaded_until = started
+        return loaded
+
+    async def backfill(self, namespace: str) -> int:
+        """Index one batch of source documents past this namespace's checkpoint"""
+        db = get_database()
+        checkpoint_id = f"_checkpoint:{namespace}"
+        checkpoint = await self.collection.find_one({"_id": checkpoint_id})
+        query = {"_id": {"$gt": checkpoint["last_id"]}} if checkpoint else {}
+        docs = await db[namespace].find(query).sort("_id", 1).limit(BACKFILL_BATCH_SIZE).to_list(length=BACKFILL_BATCH_SIZE)
+        if not docs:
+            return 0
+        # Hashing a whole batch takes a while: keep it off the event loop
+        await self._store(namespace, await asyncio.to_thread(self._signatures, namespace, docs))
+        await self.collection.update_one({"_id": checkpoint_id}, {"$set": {"last_id": docs[-1]["_id"]}}, upsert=True)
+        return len(docs)
+
+    async def _step(self):
+        await self.refresh()
+        if not await self.lease.acquire():
+            return
+        for namespace in self.SOURCES:
+            indexed = 0
+            while True:
+                batch = await self.backfill(namespace)
+                indexed += batch
+                if batch < BACKFILL_BATCH_SIZE:
+                    break
+            if indexed:
+                print(f"🔎 Indexed {indexed} existing {namespace} for near-duplicate checks")
+
+    async def start(self):
+        await self.worker.start()
+
+    async def stop(self):
+        await self.worker.stop()
+
+
+similarity_index = SimilarityIndex()
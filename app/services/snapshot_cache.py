@@ -0,0 +1,113 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# How long a snapshot is served without asking the database whether its
+# version is still current. Writes that publish an event invalidate earlier.
+DEFAULT_FRESH_SECONDS = 1.0
+
+
+class Snapshot:
+    """Pre-serialized JSON of one version of a match or lobby view"""
+
+    __slots__ = ("version", "body", "checked_at")
+
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        self.checked_at = time.monotonic()
+
+
+class SnapshotCache:
+    """
+    Latest serialized snapshot per view (e.g. ("match", id), ("lobby", game_id)).
+
+    Every reader of a view (players polling, spectators) is served the same
+    bytes. A snapshot is trusted for ``fresh_seconds``; after that one
+    version-only read revalidates it, and only a version change triggers a
+    full read and serialization. Concurrent misses share a single rebuild.
+    """
+
+    def __init__(self, max_entries: int = 2048, fresh_seconds: float = DEFAULT_FRESH_SECONDS):
+        self.max_entries = max_entries
+        self.fresh_seconds = fresh_seconds
+        self._snapshots: "OrderedDict[Tuple[str, str], Snapshot]" = OrderedDict()
+        self._building: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def get(
+        self,
+        key: Tuple[str, str],
+        load_version: Callable[[], Awaitable[Optional[int]]],
+        build: Callable[[], Awaitable[Optional[Snapshot]]]
+    ) -> Optional[Snapshot]:
+        """
+        Return the current snapshot for ``key``, or None when the entity is gone.
+
+        ``load_version`` reads only the version (None if missing); ``build``
+        reads the full document and serializes it.
+        """
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            self._snapshots.move_to_end(key)
+            if time.monotonic() - snapshot.checked_at < self.fresh_seconds:
+                return snapshot
+            version = await load_version()
+            if version is None:
+                self.invalidate(key)
+                return None
+            if version == snapshot.version:
+                snapshot.checked_at = time.monotonic()
+                return snapshot
+
+        while True:
+            pending = self._building.get(key)
+            if pending is None:
+                break
+            try:
+                # Shielded: a waiter being cancelled must not cancel everyone's build
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The building request was cancelled; build here instead
+
+        future = asyncio.get_running_loop().create_future()
+        self._building[key] = future
+        try:
+            snapshot = await build()
+            if snapshot is None:
+                self._snapshots.pop(key, None)
+            else:
+                self._snapshots[key] = snapshot
+                while len(self._snapshots) > self.max_entries:
+                    self._snapshots.popitem(last=False)
+            future.set_result(snapshot)
+            return snapshot
+        except asyncio.CancelledError:
+            future.cancel()  # Waiters retry the build rather than wait forever
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved in case nobody else is waiting
+            raise
+        finally:
+            self._building.pop(key, None)
+
+    def put(self, key: Tuple[str, str], snapshot: Snapshot):
+        """Store a snapshot built elsewhere (e.g. while broadcasting), unless a newer one is cached"""
+        current = self._snapshots.get(key)
+        if current is None or current.version <= snapshot.version:
+            self._snapshots[key] = snapshot
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+
+    def invalidate(self, key: Tuple[str, str]):
+        self._snapshots.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+
+snapshot_cache = SnapshotCache()
@@ -0,0 +1,76 @@
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+# Errors that depend on server load rather than on the arrangement itself.
+# Verdicts caused by them must not be cached or every later player with the
+# same arrangement would inherit the failure.
+TRANSIENT_ERROR_MARKERS = ("timed out", "Execution error")
+
+
+def _reference_lines(code: str) -> List[str]:
+    # Handle escaped newlines from seed data (same as shuffle_code_lines)
+    if "\\n" in code:
+        code = code.replace("\\n", "\n")
+    return [line.rstrip() for line in code.strip().split('\n') if line.strip()]
+
+
+def matches_reference_order(reference_code: str, arranged_lines: List[str]) -> bool:
+    """True when the arrangement reproduces the reference solution line for line"""
+    if not reference_code or not arranged_lines:
+        return False
+    arranged = [line.rstrip() for line in arranged_lines if line.strip()]
+    return arranged == _reference_lines(reference_code)
+
+
+class ShuffleVerdictCache:
+    """
+    Per-problem cache of Code Shuffle verdicts.
+
+    Most players converge on a handful of arrangements, so the verdict of an
+    arrangement is keyed by a hash of its normalized code and reused by every
+    player who submits the same arrangement for the same problem.
+    """
+
+    def __init__(self, max_problems: int = 256, max_arrangements_per_problem: int = 64):
+        self.max_problems = max_problems
+        self.max_arrangements_per_problem = max_arrangements_per_problem
+        self._verdicts: "OrderedDict[str, OrderedDict[str, Dict[str, Any]]]" = OrderedDict()
+
+    @staticmethod
+    def arrangement_key(language: str, normalized_code: str) -> str:
+        """Hash of the normalized arrangement (language included since it picks the runtime)"""
+        return hashlib.sha256(f"{language.lower()}\0{normalized_code}".encode('utf-8')).hexdigest()
+
+    def get(self, problem_id: str, key: str) -> Optional[Dict[str, Any]]:
+        problem_verdicts = self._verdicts.get(problem_id)
+        if problem_verdicts is None:
+            return None
+        verdict = problem_verdicts.get(key)
+        if verdict is not None:
+            problem_verdicts.move_to_end(key)
+            self._verdicts.move_to_end(problem_id)
+        return verdict
+
+    def put(self, problem_id: str, key: str, verdict: Dict[str, Any]) -> bool:
+        """Store a verdict; returns False when the verdict is transient and was not cached"""
+        error = (verdict.get("failed_test") or {}).get("error", "")
+        if error and any(marker in error for marker in TRANSIENT_ERROR_MARKERS):
+            return False
+
+        problem_verdicts = self._verdicts.setdefault(problem_id, OrderedDict())
+        problem_verdicts[key] = verdict
+        problem_verdicts.move_to_end(key)
+        self._verdicts.move_to_end(problem_id)
+
+        while len(problem_verdicts) > self.max_arrangements_per_problem:
+            problem_verdicts.popitem(last=False)
+        while len(self._verdicts) > self.max_problems:
+            self._verdicts.popitem(last=False)
+        return True
+
+    def evict_problem(self, problem_id: str):
+        self._verdicts.pop(problem_id, None)
+
+
+shuffle_verdict_cache = ShuffleVerdictCache()
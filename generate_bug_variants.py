@@ -0,0 +1,64 @@
+"""
+Precompute verified buggy variants for Bug Hunt.
+
+For every problem with a Python reference solution, generates K candidate
+buggy variants, runs each against the problem's testCases (in parallel through
+the code executor) and stores only the variants that actually fail a test in
+`buggyCodeVariants.python`. Bug Hunt matches then pick one of them at random
+instead of mutating code at request time.
+
+Run: python generate_bug_variants.py [--k 8] [--mode bug_hunt] [--force]
+"""
+
+import argparse
+import asyncio
+from datetime import datetime
+
+from app.db.mongo import get_database, connect_to_mongo, close_mongo_connection
+from app.services.bug_variants import build_verified_variants
+
+
+async def generate_bug_variants(k: int, mode: str, force: bool):
+    await connect_to_mongo()
+    db = get_database()
+
+    query = {"referenceCode.python": {"$nin": [None, ""]}}
+    if mode:
+        query["competitive_mode"] = mode
+    if not force:
+        query["buggyCodeVariants.python.0"] = {"$exists": False}
+
+    processed = 0
+    stored = 0
+
+    async for problem in db.problems.find(query):
+        processed += 1
+        variants = await build_verified_variants(problem, k=k)
+
+        if not variants:
+            print(f"  ⚠️ {problem.get('title', 'N/A')}: no verified variants")
+            continue
+
+        await db.problems.update_one(
+            {"_id": problem["_id"]},
+            {"$set": {
+                "buggyCodeVariants.python": variants,
+                "buggyVariantsVerifiedAt": datetime.utcnow()
+            }}
+        )
+        stored += 1
+        print(f"  ✅ {problem.get('title', 'N/A')}: stored {len(variants)} variant(s)")
+
+    print(f"\n✨ Processed {processed} problem(s), stored variants for {stored}")
+
+    await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute verified Bug Hunt variants")
+    parser.add_argument("--k", type=int, default=8, help="Candidate variants to generate per problem")
+    parser.add_argument("--mode", default="", help="Only process problems of this competitive_mode (e.g. bug_hunt)")
+    parser.add_argument("--force", action="store_true", help="Regenerate variants for problems that already have them")
+    args = parser.parse_args()
+
+    asyncio.run(generate_bug_variants(args.k, args.mode, args.force))
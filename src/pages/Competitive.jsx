@@ -109,7 +109,23 @@ export default function Competitive({ attempts, problems, stats }) {
         return;
       }
 
-      const data = await res.json();
+      let data = await res.json();
+
+      // Still queued: long-poll the ticket until an opponent (or a bot) is found
+      while (data.action === "queued") {
+        const pollRes = await fetch(`${API_BASE}/competitive/matchmaking/${data.ticket_id}`, {
+          headers: { Authorization: `Bearer ${token}` }
+        });
+        if (!pollRes.ok) {
+          showToast(`Matchmaking failed: ${pollRes.status} ${pollRes.statusText}`, "error");
+          return;
+        }
+        data = await pollRes.json();
+      }
+
+      if (data.action === "failed") {
+        showToast(data.message, "error");
+      }
 
       if (data.match_id) {
         // Navigate to match page
@@ -4,6 +4,7 @@ import { DragDropContext, Droppable, Draggable } from "@hello-pangea/dnd";
 import { Zap, Bug, Target, Trophy, Lightbulb, CheckCircle2, AlertTriangle, Play, Shuffle, Medal, Award, Clock as ClockIcon, Home, Check, X } from "lucide-react";
 import MonacoEditorWrapper from "../components/MonacoEditorWrapper";
 import { API_BASE } from "../utils/api";
+import { subscribeToUpdates } from "../utils/realtime";
 
 // Theme detection helper
 const useTheme = () => {
@@ -94,58 +95,105 @@ export default function CompetitiveMatch() {
     };
   }, [matchId]);
 
-  // Poll for match completion (check every 2 seconds)
+  // Watch for match completion: pushed over WebSocket, polled every 2 seconds only while the socket is down
   useEffect(() => {
     if (matchCompleted || !matchId) return;
 
+    let completed = false;
+
+    const handleMatchState = (data) => {
+      const currentUserId = localStorage.getItem("userId");
+      
+      // Check if match has been completed
+      if (data.status === "completed" && !completed) {
+        completed = true;
+        console.log("[INFO] Match completed! Showing scoreboard for:", currentUserId);
+        
+        if (data.players && data.players.length >= 2) {
+          // Multiplayer match
+          const allPlayers = data.players;
+          const rank = allPlayers.findIndex(p => p.user_id === currentUserId) + 1;
+          
+          setFinalResults({
+            type: 'multiplayer',
+            rank: rank > 0 ? rank : 1,
+            score: allPlayers.find(p => p.user_id === currentUserId)?.score || 0,
+            players: allPlayers,
+            currentUserId
+          });
+        }
+        
+        setMatchCompleted(true);
+        stopPolling();
+      }
+    };
+
+    // Last match version seen; polls only ask for the changes since then
+    let version = 0;
+
+    const fetchFullMatch = async (headers) => {
+      const res = await fetch(`${API_BASE}/competitive/matches/${matchId}`, { headers });
+      if (!res.ok) return;
+      const data = await res.json();
+      version = data.version || 0;
+      handleMatchState(data);
+    };
+
     const pollMatchStatus = async () => {
       try {
         const token = localStorage.getItem("token");
-        const currentUserId = localStorage.getItem("userId");
-        
-        const res = await fetch(`${API_BASE}/competitive/matches/${matchId}`, {
-          headers: { Authorization: `Bearer ${token}` },
-        });
-        
+        const headers = { Authorization: `Bearer ${token}` };
+
+        if (!version) {
+          await fetchFullMatch(headers);
+          return;
+        }
+
+        const res = await fetch(`${API_BASE}/competitive/matches/${matchId}/changes?since=${version}`, { headers });
         if (!res.ok) return;
-        
+
         const data = await res.json();
-        
-        // Check if match has been completed
-        if (data.status === "completed" && !matchCompleted) {
-          console.log("[INFO] Match completed! Showing scoreboard for:", currentUserId);
-          
-          if (data.players && data.players.length >= 2) {
-            // Multiplayer match
-            const allPlayers = data.players;
-            const rank = allPlayers.findIndex(p => p.user_id === currentUserId) + 1;
-            
-            setFinalResults({
-              type: 'multiplayer',
-              rank: rank > 0 ? rank : 1,
-              score: allPlayers.find(p => p.user_id === currentUserId)?.score || 0,
-              players: allPlayers,
-              currentUserId
-            });
-          }
-          
-          setMatchCompleted(true);
-          if (pollIntervalRef.current) {
-            clearInterval(pollIntervalRef.current);
-          }
+        if (data.resync) {
+          version = data.version;
+          handleMatchState(data.match);
+        } else if (data.changes.some(change => change.set?.status === "completed")) {
+          // Completion needs the full standings
+          await fetchFullMatch(headers);
+        } else {
+          version = data.version;
         }
       } catch (err) {
         console.error("[DEBUG] Poll error:", err);
       }
     };
-    
-    // Start polling
-    pollIntervalRef.current = setInterval(pollMatchStatus, 2000);
-    return () => {
+
+    const stopPolling = () => {
       if (pollIntervalRef.current) {
         clearInterval(pollIntervalRef.current);
+        pollIntervalRef.current = null;
       }
     };
+
+    const unsubscribe = subscribeToUpdates(`/competitive/ws/matches/${matchId}`, {
+      onMessage: (message) => {
+        if (message.match) {
+          version = message.match.version || version;
+          handleMatchState(message.match);
+        }
+      },
+      onConnectionChange: (connected) => {
+        if (connected) {
+          stopPolling();
+        } else if (!pollIntervalRef.current && !completed) {
+          pollIntervalRef.current = setInterval(pollMatchStatus, 2000);
+        }
+      },
+    });
+
+    return () => {
+      unsubscribe();
+      stopPolling();
+    };
   }, [matchId, matchCompleted]);
 
   // Update timer based on server start time
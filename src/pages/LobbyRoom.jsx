@@ -2,6 +2,7 @@ import { useState, useEffect } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import { Zap, Bug, Target, Crown, User, CheckCircle2, Copy, Clock, Gamepad2, Megaphone, Shuffle } from "lucide-react";
 import { API_BASE } from "../utils/api";
+import { subscribeToUpdates } from "../utils/realtime";
 import { useToast } from "../context/ToastContext";
 
 export default function LobbyRoom() {
@@ -44,11 +45,55 @@ export default function LobbyRoom() {
 
     fetchLobby();
 
-    // Poll for updates every 2 seconds
-    const interval = setInterval(fetchLobby, 2000);
-    return () => clearInterval(interval);
+    // Lobby updates are pushed over WebSocket; poll every 2 seconds only while the socket is down
+    let interval = null;
+    const unsubscribe = subscribeToUpdates(`/competitive/ws/lobby/${gameId}`, {
+      onMessage: (message) => {
+        if (message.type === "lobby_closed") {
+          showToast("Lobby has been closed", "error");
+          navigate("/competitive");
+        } else if (message.lobby) {
+          applyLobby(message.lobby);
+        }
+      },
+      onConnectionChange: (connected) => {
+        if (connected) {
+          clearInterval(interval);
+          interval = null;
+        } else if (!interval) {
+          interval = setInterval(fetchLobby, 2000);
+        }
+      },
+    });
+
+    return () => {
+      unsubscribe();
+      clearInterval(interval);
+    };
   }, [gameId]);
 
+  const applyLobby = (data) => {
+    setLobby(data);
+    setLoading(false);
+
+    if (data.status === "expired") {
+      showToast("Lobby expired due to inactivity", "error");
+      navigate("/competitive");
+      return;
+    }
+
+    // If game started, navigate to match
+    if (data.status === "active" && data.match_id) {
+      console.log("[INFO] Game started! Redirecting to match:", data.match_id);
+      // Check game mode and redirect accordingly
+      if (data.game_mode === "code_quiz") {
+        navigate(`/quiz/${data.match_id}`);
+      } else {
+        navigate(`/competitive/${data.match_id}`);
+      }
+    }
+  };
+
   const fetchLobby = async () => {
     try {
       const token = localStorage.getItem("token");
@@ -76,19 +121,7 @@ export default function LobbyRoom() {
 
       const data = await res.json();
       console.log("[SUCCESS] Lobby data received:", data.game_id, "Players:", data.players.length);
-      setLobby(data);
-      setLoading(false);
-
-      // If game started, navigate to match
-      if (data.status === "active" && data.match_id) {
-        console.log("[INFO] Game started! Redirecting to match:", data.match_id);
-        // Check game mode and redirect accordingly
-        if (data.game_mode === "code_quiz") {
-          navigate(`/quiz/${data.match_id}`);
-        } else {
-          navigate(`/competitive/${data.match_id}`);
-        }
-      }
+      applyLobby(data);
     } catch (err) {
       console.error("Error fetching lobby:", err);
       setLoading(false);
@@ -0,0 +1,59 @@
+import { API_BASE } from "./api";
+
+const PING_INTERVAL_MS = 25000;
+const MAX_RECONNECT_DELAY_MS = 10000;
+
+// Subscribe to a backend WebSocket push channel (e.g. "/competitive/ws/matches/<id>").
+// onMessage receives every parsed message ({ type, match | lobby }).
+// onConnectionChange(connected) lets callers fall back to polling while the socket is down.
+// Returns an unsubscribe function.
+export function subscribeToUpdates(path, { onMessage, onConnectionChange }) {
+  const token = localStorage.getItem("token");
+  const url = `${API_BASE.replace(/^http/, "ws")}${path}?token=${encodeURIComponent(token || "")}`;
+
+  let socket = null;
+  let pingTimer = null;
+  let reconnectTimer = null;
+  let reconnectDelay = 1000;
+  let closed = false;
+
+  const connect = () => {
+    socket = new WebSocket(url);
+
+    socket.onopen = () => {
+      reconnectDelay = 1000;
+      onConnectionChange?.(true);
+      pingTimer = setInterval(() => {
+        if (socket.readyState === WebSocket.OPEN) socket.send("ping");
+      }, PING_INTERVAL_MS);
+    };
+
+    socket.onmessage = (event) => {
+      try {
+        const message = JSON.parse(event.data);
+        if (message.type !== "pong") onMessage(message);
+      } catch (err) {
+        console.error("[REALTIME] Invalid message:", err);
+      }
+    };
+
+    socket.onclose = (event) => {
+      clearInterval(pingTimer);
+      if (closed) return;
+      onConnectionChange?.(false);
+      // 4401 = bad token, 4404 = match/lobby not found: retrying will not help
+      if (event.code === 4401 || event.code === 4404) return;
+      reconnectTimer = setTimeout(connect, reconnectDelay);
+      reconnectDelay = Math.min(reconnectDelay * 2, MAX_RECONNECT_DELAY_MS);
+    };
+  };
+
+  connect();
+
+  return () => {
+    closed = true;
+    clearInterval(pingTimer);
+    clearTimeout(reconnectTimer);
+    if (socket) socket.close();
+  };
+}
@@ -0,0 +1,90 @@
+import asyncio
+
+from app.services import bug_variants
+from app.services.bug_variants import build_verified_variants, select_buggy_code
+
+REFERENCE = "n = int(input())\nprint(n * 2)\n"
+
+
+def problem(**fields):
+    return {
+        "title": "Double",
+        "testCases": [{"input": "2", "expected": "4"}, {"input": "0", "expected": "0"}],
+        "referenceCode": {"python": REFERENCE},
+        **fields
+    }
+
+
+class FakeExecutor:
+    """Runs 'programs' that are python callables of the input (returning its output or a full result)"""
+
+    def __init__(self, programs):
+        self.programs = programs
+        self.runs = []
+
+    async def execute_code(self, code, language, test_input):
+        self.runs.append((code, test_input))
+        output = self.programs[code](test_input)
+        if isinstance(output, dict):
+            return output
+        return {"success": True, "output": output, "error": ""}
+
+
+def with_candidates(monkeypatch, candidates):
+    remaining = list(candidates)
+    monkeypatch.setattr(bug_variants, "generate_buggy_code", lambda code, language: remaining.pop(0))
+
+
+def test_reference_failing_its_own_tests_yields_no_variants(monkeypatch):
+    with_candidates(monkeypatch, ["bug"])
+    executor = FakeExecutor({REFERENCE: lambda x: str(int(x) * 3)})
+
+    assert asyncio.run(build_verified_variants(problem(), k=1, executor=executor)) == []
+    # Only the reference ran, and it stopped at its first failing test
+    assert executor.runs == [(REFERENCE, "2")]
+
+
+def test_only_candidates_failing_a_test_are_kept(monkeypatch):
+    triple, zero_safe, same = "triple", "zero_safe", "same"
+    with_candidates(monkeypatch, [triple, zero_safe, same, REFERENCE, triple])
+    executor = FakeExecutor({
+        REFERENCE: lambda x: str(int(x) * 2),
+        triple: lambda x: str(int(x) * 3),
+        zero_safe: lambda x: "1" if x == "0" else str(int(x) * 2),
+        same: lambda x: str(int(x) + int(x))
+    })
+
+    variants = asyncio.run(build_verified_variants(problem(), k=5, executor=executor))
+
+    # Unchanged and repeated candidates are skipped; "same" passes every test
+    assert variants == [triple, zero_safe]
+
+
+def test_candidates_that_do_not_parse_are_rejected(monkeypatch):
+    broken = "n = int(input()\nprint(n * 2)\n"
+    wrapped = "wrapped"
+    with_candidates(monkeypatch, [broken, wrapped])
+    executor = FakeExecutor({
+        REFERENCE: lambda x: str(int(x) * 2),
+        # Parses here, but the executor's wrapped program reports a syntax error
+        wrapped: lambda x: {"success": False, "output": "", "error": "SyntaxError: invalid syntax"}
+    })
+
+    assert asyncio.run(build_verified_variants(problem(), k=2, executor=executor)) == []
+    # The broken candidate never reached the executor
+    assert all(code != broken for code, _ in executor.runs)
+
+
+def test_select_buggy_code_prefers_verified_variants():
+    chosen = select_buggy_code(problem(buggyCodeVariants={"python": ["v1"]}, buggyCode={"python": "stored"}))
+
+    assert chosen == "v1"
+
+
+def test_select_buggy_code_falls_back_to_stored_then_generated(monkeypatch):
+    monkeypatch.setattr(bug_variants, "generate_buggy_code", lambda code, language: f"bugged {code}")
+
+    assert select_buggy_code(problem(buggyCodeVariants={"python": []}, buggyCode={"python": "stored"})) == "stored"
+    assert select_buggy_code(problem()) == f"bugged {REFERENCE}"
+    assert select_buggy_code({"starterCode": {"python": "starter"}}) == "bugged starter"
+    assert select_buggy_code({"title": "Empty"}) is None
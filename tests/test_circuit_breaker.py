@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.services import llm_client as client_module
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from app.services.llm_client import LLMClient, LLMError, StubBackend
+
+
+def test_opens_after_consecutive_failures_and_refuses_calls():
+    breaker = CircuitBreaker("gen", failure_threshold=2, cooldown_seconds=10)
+
+    breaker.record_failure(now=0)
+    breaker.record_success()
+    breaker.record_failure(now=1)
+    assert breaker.state == CLOSED
+    breaker.record_failure(now=2)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(now=5)
+    assert breaker.stats(now=5)["rejected_calls"] == 1
+    assert breaker.stats(now=5)["probe_in"] == 7.0
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker("gen", failure_threshold=1, cooldown_seconds=10)
+    breaker.record_failure(now=0)
+
+    breaker.before_call(now=10)
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(now=10)
+
+    breaker.record_failure(now=11)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(now=20)
+
+    breaker.before_call(now=21)
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.times_opened == 2
+
+
+def test_client_short_circuits_to_fallback_while_open(monkeypatch):
+    monkeypatch.setattr(client_module, "RETRY_BASE_SECONDS", 0.001)
+    backend = StubBackend([RuntimeError("quota")] * 4)
+    client = LLMClient(
+        backend,
+        requests_per_second=1000,
+        max_retries=1,
+        breaker=CircuitBreaker("gen", failure_threshold=2, cooldown_seconds=60)
+    )
+
+    async def calls():
+        for _ in range(2):
+            with pytest.raises(LLMError):
+                await client.generate("p", model="m")
+        with pytest.raises(CircuitOpenError):
+            await client.generate("p", model="m")
+
+    asyncio.run(calls())
+
+    # Two calls of two attempts each; the third never reached the backend
+    assert len(backend.calls) == 4
+    stats = client.stats()
+    assert stats["breaker"]["state"] == OPEN
+    assert stats["calls"]["short_circuited"] == 1
+    assert stats["calls"]["failed"] == 2
+
+
+def test_problem_generator_reports_fallbacks(monkeypatch):
+    from app.services import problem_generator
+
+    client = LLMClient(StubBackend(["not json"]), requests_per_second=1000)
+    monkeypatch.setattr(problem_generator, "llm_client", client)
+
+    problem = asyncio.run(problem_generator.generate_competitive_problem("easy"))
+
+    assert problem["testCases"]
+    assert problem["fallback"] is True
+    assert client.stats()["outcomes"]["problem"] == {"generated": 0, "fallback": 1, "fallback_rate": 1.0}
@@ -0,0 +1,63 @@
+import random
+from collections import Counter
+
+from app.services.fallback_catalog import FallbackCatalog, ShuffleBag
+
+
+def problem(title, difficulty, python="print(1)"):
+    return {"title": title, "difficulty": difficulty, "testCases": [{"input": "1", "expected": "1"}],
+            "referenceCode": {"python": python, "cpp": "", "java": ""}}
+
+
+def test_shuffle_bag_draws_every_item_once_per_pass():
+    bag = ShuffleBag(5, random.Random(1))
+
+    for _ in range(4):
+        assert sorted(bag.draw() for _ in range(5)) == [0, 1, 2, 3, 4]
+
+
+def test_shuffle_bag_never_repeats_across_refills():
+    bag = ShuffleBag(3, random.Random(7))
+    draws = [bag.draw() for _ in range(300)]
+
+    assert all(first != second for first, second in zip(draws, draws[1:]))
+
+
+def test_single_item_bag_keeps_drawing_it():
+    bag = ShuffleBag(1)
+
+    assert [bag.draw() for _ in range(3)] == [0, 0, 0]
+
+
+def test_catalog_indexes_by_difficulty_and_mode():
+    catalog = FallbackCatalog({
+        "easy": [problem("A", "easy"), problem("B", "easy", python="")],
+        "hard": [problem("C", "hard")]
+    })
+
+    assert [p["title"] for p in catalog.problems("easy")] == ["A", "B"]
+    assert [p["title"] for p in catalog.problems("easy", "code_shuffle")] == ["A"]
+    assert catalog.problems("medium") == ()
+    # Unknown difficulties are served hard problems, unknown modes standard ones
+    assert catalog.sample("extreme")["title"] == "C"
+    assert catalog.sample("Easy", "test_master")["title"] in {"A", "B"}
+
+
+def test_samples_are_copies():
+    catalog = FallbackCatalog({"easy": [problem("A", "easy")]})
+
+    sampled = catalog.sample("easy")
+    sampled["testCases"].clear()
+
+    assert catalog.sample("easy")["testCases"]
+
+
+def test_bundled_catalog_covers_every_difficulty_and_spreads_repeats():
+    catalog = FallbackCatalog.load()
+    for difficulty in ("easy", "medium", "hard"):
+        problems = catalog.problems(difficulty, "code_shuffle")
+        assert problems
+        assert all(p["difficulty"] == difficulty for p in problems)
+
+        titles = Counter(catalog.sample(difficulty)["title"] for _ in range(len(problems) * 3))
+        assert set(titles.values()) == {3}
@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.services import game_codes as codes_module
+from app.services.game_codes import (
+    CODE_ALPHABET, CODE_BLOCK_SIZE, CODE_LENGTH, CODE_SPACE,
+    GameCodeAllocator, GameCodeUnavailable, encode, permute,
+)
+
+KEY = b"k" * 32
+
+
+def test_permutation_is_injective_and_stays_in_the_code_space():
+    values = [permute(KEY, v) for v in range(5000)]
+
+    assert len(set(values)) == len(values)
+    assert all(0 <= v < CODE_SPACE for v in values)
+    assert permute(KEY, CODE_SPACE - 1) < CODE_SPACE
+
+
+def test_permutation_depends_on_the_key():
+    assert [permute(KEY, v) for v in range(10)] != [permute(b"x" * 32, v) for v in range(10)]
+
+
+def test_encode_is_six_code_characters():
+    assert encode(0) == "A" * CODE_LENGTH
+    assert encode(CODE_SPACE - 1) == "9" * CODE_LENGTH
+    assert set(encode(123456789)) <= set(CODE_ALPHABET)
+
+
+class FakeDB:
+    def __init__(self, taken=()):
+        self.seq = 0
+        self.counter_calls = 0
+        self.taken = set(taken)
+        self.inserted = []
+        self.counters = SimpleNamespace(find_one_and_update=self.find_one_and_update)
+        self.lobbies = SimpleNamespace(insert_one=self.insert_one)
+
+    async def find_one_and_update(self, query, update, upsert, return_document):
+        self.counter_calls += 1
+        self.seq += update["$inc"]["seq"]
+        return {"_id": query["_id"], "seq": self.seq}
+
+    async def insert_one(self, doc):
+        if doc["game_id"] in self.taken:
+            raise DuplicateKeyError("E11000")
+        self.inserted.append(doc["game_id"])
+        doc["_id"] = len(self.inserted)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+
+def test_codes_come_from_reserved_blocks(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(codes_module, "get_database", lambda: db)
+    allocator = GameCodeAllocator(key=KEY)
+
+    async def allocate():
+        return await asyncio.gather(*(allocator.next_code() for _ in range(CODE_BLOCK_SIZE + 1)))
+
+    codes = asyncio.run(allocate())
+
+    assert len(set(codes)) == len(codes)
+    assert db.counter_calls == 2
+
+
+def test_insert_lobby_retries_on_taken_code(monkeypatch):
+    db = FakeDB(taken={encode(permute(KEY, 0))})
+    monkeypatch.setattr(codes_module, "get_database", lambda: db)
+    allocator = GameCodeAllocator(key=KEY)
+    lobby = {"status": "waiting"}
+
+    inserted_id = asyncio.run(allocator.insert_lobby(lobby))
+
+    assert inserted_id == 1
+    assert lobby["game_id"] == encode(permute(KEY, 1))
+
+
+def test_insert_lobby_gives_up(monkeypatch):
+    db = FakeDB()
+    db.taken = type("Everything", (), {"__contains__": lambda self, item: True})()
+    monkeypatch.setattr(codes_module, "get_database", lambda: db)
+
+    with pytest.raises(GameCodeUnavailable):
+        asyncio.run(GameCodeAllocator(key=KEY).insert_lobby({}))
@@ -0,0 +1,96 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.services.grading_context import GradingContextCache
+
+PROBLEM_ID = ObjectId()
+PROBLEM = {
+    "_id": PROBLEM_ID,
+    "title": "Double",
+    "starterCode": {"python": "def solution(n):\n    pass"},
+    "testCases": [
+        {"input": " 2 ", "expected": "4\n"},
+        {"input": "", "expected": ""},
+        {"input": "5", "expected": "10"},
+    ],
+}
+
+
+class FakeProblems:
+    def __init__(self, delay=0):
+        self.calls = 0
+        self.delay = delay
+
+    async def find_one(self, query):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return PROBLEM if query["_id"] == PROBLEM_ID else None
+
+
+class FakeDb:
+    def __init__(self, delay=0):
+        self.problems = FakeProblems(delay)
+
+
+def test_concurrent_submissions_share_one_build():
+    cache = GradingContextCache()
+    db = FakeDb()
+    match = {"_id": ObjectId(), "time_limit_seconds": 600}
+
+    async def run():
+        return await asyncio.gather(*(cache.get(db, match, str(PROBLEM_ID)) for _ in range(5)))
+
+    contexts = asyncio.run(run())
+
+    assert db.problems.calls == 1
+    assert all(context is contexts[0] for context in contexts)
+    context = contexts[0]
+    assert [(tc.input, tc.expected) for tc in context.test_cases] == [("2", "4"), ("5", "10")]
+    assert context.total_test_cases == 3
+    assert context.time_limit_seconds == 600
+    assert context.harness_signature == ("solution", "n")
+    assert context.public_problem()["_id"] == str(PROBLEM_ID)
+
+
+def test_cancelled_submissions_neither_break_nor_strand_the_shared_build():
+    cache = GradingContextCache()
+    db = FakeDb(delay=0.01)
+    match = {"_id": ObjectId()}
+
+    async def run():
+        # A waiter is cancelled: the builder and the other waiter still get the context
+        builder = asyncio.create_task(cache.get(db, match, str(PROBLEM_ID)))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(cache.get(db, match, str(PROBLEM_ID))) for _ in range(2)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        first = await asyncio.gather(builder, waiters[1])
+
+        # The builder is cancelled: its waiter builds instead of hanging
+        cache.evict_match(str(match["_id"]))
+        builder = asyncio.create_task(cache.get(db, match, str(PROBLEM_ID)))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get(db, match, str(PROBLEM_ID)))
+        await asyncio.sleep(0)
+        builder.cancel()
+        second = await asyncio.wait_for(waiter, 1)
+        return first, second, waiters[0].cancelled(), builder.cancelled()
+
+    first, second, waiter_cancelled, builder_cancelled = asyncio.run(run())
+
+    assert first[0] is first[1] is not None
+    assert second.problem_id == str(PROBLEM_ID)
+    assert waiter_cancelled and builder_cancelled
+    assert db.problems.calls == 3
+
+
+def test_contexts_are_evicted_with_their_match():
+    cache = GradingContextCache()
+    db = FakeDb()
+    match = {"_id": ObjectId()}
+
+    asyncio.run(cache.get(db, match, str(PROBLEM_ID)))
+    assert len(cache) == 1
+    assert cache.evict_match(str(match["_id"])) == 1
+    assert len(cache) == 0
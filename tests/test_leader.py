@@ -0,0 +1,38 @@
+import asyncio
+
+from app.services.leader import LeaderLoop
+
+
+class FakeLease:
+    def __init__(self):
+        self.released = False
+
+    async def release(self):
+        self.released = True
+
+
+def test_leader_loop_retries_failures_wakes_early_and_releases_on_stop():
+    lease = FakeLease()
+    steps = []
+
+    async def step():
+        steps.append(len(steps))
+        if len(steps) == 1:
+            raise RuntimeError("database unavailable")
+
+    worker = LeaderLoop(lease, 3600, step, "Test job failed")
+
+    async def run():
+        await worker.start()
+        await asyncio.sleep(0.01)
+        # The failed first step did not end the loop; it is waiting out the interval
+        assert steps == [0]
+        worker.wake()
+        await asyncio.sleep(0.01)
+        assert steps == [0, 1]
+        await worker.stop()
+
+    asyncio.run(run())
+
+    assert lease.released
+    assert worker._task is None
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.services import llm_client as client_module
+from app.services.llm_client import LLMClient, LLMError, StubBackend, TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(client_module, "RETRY_BASE_SECONDS", 0.001)
+
+
+def test_stub_answers_are_returned_and_recorded():
+    backend = StubBackend(["hello"])
+    client = LLMClient(backend, requests_per_second=1000)
+
+    assert asyncio.run(client.generate("prompt", model="m", temperature=0)) == "hello"
+    assert backend.calls == [{"model": "m", "prompt": "prompt", "temperature": 0}]
+
+
+def test_failures_are_retried_then_raised():
+    backend = StubBackend([RuntimeError("quota"), "ok"])
+    client = LLMClient(backend, requests_per_second=1000, max_retries=1)
+    assert asyncio.run(client.generate("p", model="m")) == "ok"
+
+    backend = StubBackend([RuntimeError("quota")] * 2)
+    client = LLMClient(backend, requests_per_second=1000, max_retries=1)
+    with pytest.raises(LLMError, match="after 2 attempt"):
+        asyncio.run(client.generate("p", model="m"))
+
+
+def test_slow_calls_time_out():
+    client = LLMClient(StubBackend(delay=0.2), requests_per_second=1000, max_retries=0)
+
+    with pytest.raises(LLMError, match="timed out"):
+        asyncio.run(client.generate("p", model="m", timeout=0.05))
+
+
+def test_concurrency_is_bounded_and_calls_run_off_the_loop():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def responder(model, prompt):
+        with lock:
+            running.append(prompt)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(prompt)
+        return prompt
+
+    client = LLMClient(StubBackend(responder=responder), max_concurrency=2, requests_per_second=1000, burst=10)
+
+    async def run():
+        started = time.monotonic()
+        results = await asyncio.gather(*(client.generate(str(i), model="m") for i in range(6)))
+        return results, time.monotonic() - started
+
+    results, elapsed = asyncio.run(run())
+
+    assert results == [str(i) for i in range(6)]
+    assert max(peak) == 2
+    # Three rounds of two parallel calls, not six sequential ones
+    assert elapsed < 0.25
+
+
+def test_token_bucket_spaces_calls_after_the_burst():
+    bucket = TokenBucket(rate=20, capacity=2)
+
+    async def take(n):
+        started = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(take(4))
+
+    # Two tokens up front, two more at 20/s
+    assert 0.08 <= elapsed < 0.3
+
+
+def test_quiz_generation_uses_the_client(monkeypatch):
+    from app.services import quiz_generator
+
+    question = {"question": "What prints?", "options": ["a", "b", "c", "d"], "correct_answer": 1, "explanation": "b"}
+    client = LLMClient(StubBackend([json.dumps(question)]), requests_per_second=1000)
+    monkeypatch.setattr(quiz_generator, "llm_client", client)
+
+    generated = asyncio.run(quiz_generator.generate_single_question("python", "easy", "output"))
+
+    assert generated["question"] == "What prints?"
+    assert generated["created_by"] == "ai"
@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.services import lobby_lifecycle as lifecycle_module
+from app.services.lobby_lifecycle import LOBBY_TTL_SECONDS, LobbyLifecycle, lobby_expiry
+from app.services.realtime import RealtimeHub
+
+
+class RecordingLobbies:
+    def __init__(self):
+        self.updates = []
+
+    async def update_one(self, query, update):
+        self.updates.append((query, update))
+
+
+def test_lobby_expiry_is_ttl_from_now():
+    now = datetime(2024, 1, 1)
+    assert lobby_expiry(now) == now + timedelta(seconds=LOBBY_TTL_SECONDS)
+
+
+def test_heartbeats_are_throttled_per_lobby(monkeypatch):
+    lobbies = RecordingLobbies()
+    monkeypatch.setattr(lifecycle_module, "get_database", lambda: SimpleNamespace(lobbies=lobbies))
+    lifecycle = LobbyLifecycle()
+
+    async def beats():
+        await lifecycle.heartbeat("abc123")
+        await lifecycle.heartbeat("ABC123")
+        await lifecycle.heartbeat("XYZ789")
+
+    asyncio.run(beats())
+
+    assert [query for query, _ in lobbies.updates] == [
+        {"game_id": "ABC123", "status": "waiting"},
+        {"game_id": "XYZ789", "status": "waiting"},
+    ]
+    # Heartbeats only move the expiry; they must not bump the version pollers cache on
+    assert all(set(update) == {"$set"} for _, update in lobbies.updates)
+
+
+def test_hub_lists_subscribed_channels_by_prefix():
+    hub = RealtimeHub()
+    hub.subscribe("lobby:ABC123", object())
+    hub.subscribe("match:m1", object())
+
+    assert hub.channels("lobby:") == ["lobby:ABC123"]
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from pymongo.errors import BulkWriteError
+
+from app.services import match_archive as archive_module
+from app.services.match_archive import ARCHIVE_BATCH_SIZE, MatchArchiver, code_digest, compact, restore
+
+
+def finished_match():
+    return {
+        "_id": "m1",
+        "status": "completed",
+        "version": 7,
+        "quiz_questions": [{"question": "q"}],
+        "quiz_total_questions": 1,
+        "changes": [{"version": 7}],
+        "players": [
+            {"user_id": "a", "code": "print(1)", "shuffled_lines": ["x"], "submissions": [{"passed": True}]},
+            {"user_id": "b", "code": "print(1)", "arranged_code": None},
+            {"user_id": "c", "code": ""},
+        ],
+    }
+
+
+def test_compact_strips_question_copies_and_dedupes_code():
+    doc, blobs = compact(finished_match(), datetime(2024, 1, 1))
+
+    assert "quiz_questions" not in doc and "changes" not in doc
+    assert doc["quiz_total_questions"] == 1
+    assert doc["archived_at"] == datetime(2024, 1, 1)
+    digest = code_digest("print(1)")
+    assert blobs == {digest: "print(1)"}
+    assert [p.get("code_sha") for p in doc["players"]] == [digest, digest, None]
+    assert "shuffled_lines" not in doc["players"][0]
+    assert doc["players"][0]["submissions"] == [{"passed": True}]
+
+
+def test_restore_puts_code_back():
+    original = finished_match()
+    doc, blobs = compact(original)
+
+    restored = restore(doc, blobs)
+
+    assert [p["code"] for p in restored["players"]] == ["print(1)", "print(1)", ""]
+    assert restored["players"][1]["arranged_code"] is None
+    assert original["players"][0]["code"] == "print(1)"
+
+
+class FakeCollection:
+    def __init__(self, docs=(), duplicate_ids=()):
+        self.docs = list(docs)
+        self.duplicate_ids = set(duplicate_ids)
+        self.calls = []
+
+    def find(self, query, projection=None):
+        self.calls.append(("find", query))
+        docs = self.docs
+
+        class Cursor:
+            def sort(self, *args):
+                return self
+
+            def limit(self, n):
+                return self
+
+            async def to_list(self, length):
+                return list(docs)
+
+        return Cursor()
+
+    async def bulk_write(self, operations, ordered=True):
+        self.calls.append(("bulk_write", len(operations)))
+
+    async def insert_many(self, docs, ordered=True):
+        self.calls.append(("insert_many", [d["_id"] for d in docs]))
+        duplicates = [d for d in docs if d["_id"] in self.duplicate_ids]
+        if duplicates:
+            raise BulkWriteError({"writeErrors": [{"code": 11000, "index": 0}]})
+
+    async def delete_many(self, query):
+        self.calls.append(("delete_many", query))
+        return SimpleNamespace(deleted_count=len(query["_id"]["$in"]))
+
+
+class FakeDB:
+    def __init__(self, collections):
+        self._collections = collections
+
+    def __getattr__(self, name):
+        return self._collections[name]
+
+    def __getitem__(self, name):
+        return self._collections[name]
+
+
+def test_archive_matches_writes_blobs_and_archive_before_deleting(monkeypatch):
+    log = []
+    matches = FakeCollection([finished_match()])
+    matches_archive = FakeCollection(duplicate_ids={"m1"})
+    code_blobs = FakeCollection()
+    for collection in (matches, matches_archive, code_blobs):
+        collection.calls = log
+    db = {"matches": matches, "matches_archive": matches_archive, "code_blobs": code_blobs}
+    monkeypatch.setattr(archive_module, "get_database", lambda: FakeDB(db))
+    archiver = MatchArchiver(after_hours=24)
+    now = datetime(2024, 1, 2)
+
+    moved = asyncio.run(archiver.archive_matches(now))
+
+    assert moved == 1
+    assert log[0] == ("find", {"status": "completed", "completed_at": {"$lte": now - timedelta(hours=24)}})
+    # A duplicate archive insert (rerun after a crash) still lets the delete go through
+    assert [call[0] for call in log[1:]] == ["bulk_write", "insert_many", "delete_many"]
+    assert log[-1] == ("delete_many", {"_id": {"$in": ["m1"]}})
+
+
+def test_archiver_stops_moving_batches_once_leadership_is_lost():
+    archiver = MatchArchiver(after_hours=1)
+    leads = [True, True, False]
+    batches = []
+
+    class FakeLease:
+        async def acquire(self):
+            return leads.pop(0)
+
+    async def full_batch(now=None):
+        batches.append(now)
+        return ARCHIVE_BATCH_SIZE
+
+    archiver.lease = FakeLease()
+    archiver.archive_once = full_batch
+
+    asyncio.run(archiver._step())
+
+    # Leader for two batches; the third acquire found another leader
+    assert len(batches) == 2
+    assert not leads
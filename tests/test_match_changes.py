@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from app.services.match_changes import MATCH_CHANGE_LOG_SIZE, changes_since, log_change
+
+
+def test_log_change_records_paths_and_small_values_only():
+    submitted_at = datetime(2026, 1, 1)
+    update = log_change({
+        "$set": {
+            "players.2.completed": True,
+            "players.2.score": 80,
+            "players.2.submission_time": submitted_at,
+            "players.2.code": "x = 1",
+            "players.2.quiz_answers": {"0": "a"},
+            "players.2.feedback": "long " * 20
+        },
+        "$push": {"players.2.submissions": {"problem_index": 0, "code": "print(1)"}},
+        "$inc": {"version": 1}
+    })
+
+    entry = update["$push"]["changes"]["$each"][0]
+    assert entry == {
+        "paths": [
+            "players.2.completed", "players.2.score", "players.2.submission_time", "players.2.code",
+            "players.2.quiz_answers", "players.2.feedback", "players.2.submissions"
+        ],
+        "set": {"players.2.completed": True, "players.2.score": 80, "players.2.submission_time": submitted_at}
+    }
+    assert update["$push"]["changes"]["$slice"] == -MATCH_CHANGE_LOG_SIZE
+    assert update["$push"]["players.2.submissions"] == {"problem_index": 0, "code": "print(1)"}
+
+
+def test_changes_since_maps_entries_to_versions():
+    # Version 10 with the last three versions logged (8, 9, 10)
+    log = [{"set": {"a": 8}}, {"set": {"a": 9}}, {"set": {"a": 10}}]
+
+    assert changes_since(10, log, 10) == []
+    assert changes_since(10, log, 8) == [{"version": 9, "set": {"a": 9}}, {"version": 10, "set": {"a": 10}}]
+    assert [c["version"] for c in changes_since(10, log, 7)] == [8, 9, 10]
+    assert changes_since(10, log, 6) is None
+    assert changes_since(4, [], 2) is None
@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services import match_expiry
+from app.services.match_changes import MATCH_CHANGE_LOG_SIZE
+from app.services.match_expiry import DEADLINE_BATCH_SIZE, MatchDeadlineSweeper
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return list(self.docs)
+
+
+class FakeMatches:
+    def __init__(self, overdue):
+        self.overdue = overdue
+        self.reads = 0
+        self.updates = []
+
+    def find(self, query, projection):
+        self.reads += 1
+        return FakeCursor(self.overdue)
+
+    async def update_many(self, query, pipeline):
+        self.updates.append((query, pipeline))
+        return SimpleNamespace(modified_count=0)
+
+
+class FakeLease:
+    async def acquire(self):
+        return True
+
+
+def sweeper_with(monkeypatch, overdue, ended_per_pass):
+    matches = FakeMatches(overdue)
+    monkeypatch.setattr(match_expiry, "get_database", lambda: SimpleNamespace(matches=matches))
+    sweeper = MatchDeadlineSweeper()
+    sweeper.lease = FakeLease()
+    sweeper._backfilled = True
+    passes = list(ended_per_pass)
+
+    async def handler(batch, now):
+        ended = passes.pop(0)
+        del matches.overdue[:ended]
+        return ended
+
+    sweeper.set_handler(handler)
+    return sweeper, matches
+
+
+def test_sweep_stops_when_a_full_batch_only_conflicts(monkeypatch):
+    overdue = [{"_id": i} for i in range(DEADLINE_BATCH_SIZE + 5)]
+    sweeper, matches = sweeper_with(monkeypatch, overdue, [DEADLINE_BATCH_SIZE, 0])
+
+    asyncio.run(sweeper._step())
+
+    # The second pass ended nothing, so the same five were not reread
+    assert matches.reads == 2
+    assert len(matches.overdue) == 5
+
+
+def test_sweep_keeps_going_while_passes_end_matches(monkeypatch):
+    overdue = [{"_id": i} for i in range(3)]
+    sweeper, matches = sweeper_with(monkeypatch, overdue, [2, 1])
+
+    asyncio.run(sweeper._step())
+
+    assert matches.reads == 3
+    assert matches.overdue == []
+
+
+def test_backfill_bumps_version_and_logs_the_deadline(monkeypatch):
+    sweeper, matches = sweeper_with(monkeypatch, [], [])
+
+    asyncio.run(sweeper.backfill())
+
+    (query, pipeline), = matches.updates
+    assert "deadline_at" in pipeline[0]["$set"]
+    logged = pipeline[1]["$set"]
+    assert logged["version"] == {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+    assert logged["changes"]["$slice"][1] == -MATCH_CHANGE_LOG_SIZE
+    entry = logged["changes"]["$slice"][0]["$concatArrays"][1][0]
+    assert entry == {"paths": ["deadline_at"], "set": {"deadline_at": "$deadline_at"}}
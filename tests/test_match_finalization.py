@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+from app.services.match_expiry import match_deadline
+from app.services.match_finalization import (
+    completion_update, duel_outcome, duel_reward_ops, expiry_update, multiplayer_score_key, placement_reward_ops
+)
+from app.services.match_store import HotMatch, HotMatchStore
+
+
+def _players():
+    return [
+        {"user_id": str(ObjectId()), "score": 50, "time_elapsed": 90},
+        {"user_id": "bot", "score": 80, "time_elapsed": 120},
+        {"user_id": str(ObjectId()), "score": 80, "time_elapsed": 60},
+        {"user_id": str(ObjectId()), "score": 10, "time_elapsed": 30},
+    ]
+
+
+def test_completion_update_sets_ranks_and_status_together():
+    players = _players()
+    ranked = sorted(players, key=multiplayer_score_key)
+    now = datetime(2024, 1, 1)
+
+    fields = completion_update(players, ranked, now)["$set"]
+
+    assert [fields[f"players.{i}.rank"] for i in range(4)] == [3, 2, 1, 4]
+    assert fields["status"] == "completed"
+    assert fields["completed_at"] == now
+    assert fields["winners"] == [players[2]["user_id"], "bot", players[0]["user_id"]]
+    assert fields["winner_id"] == players[2]["user_id"]
+
+
+def test_reward_ops_skip_bots():
+    players = _players()
+    ranked = sorted(players, key=multiplayer_score_key)
+
+    ops = placement_reward_ops(ranked)
+
+    assert [op._doc["$inc"] for op in ops] == [{"xp": 100, "rating": 30}, {"xp": 25, "rating": 5}]
+    assert [op._filter["_id"] for op in ops] == [ObjectId(players[2]["user_id"]), ObjectId(players[0]["user_id"])]
+    assert duel_reward_ops(None, "bot", 12, 0) == []
+    assert [op._doc["$inc"] for op in duel_reward_ops(players[0]["user_id"], None, 12, 40)] == [{"rating": 12, "xp": 40}]
+
+
+def test_hot_transition_applies_once():
+    store = HotMatchStore(enabled=True)
+    match_oid = ObjectId()
+    store._hot[str(match_oid)] = HotMatch(str(match_oid), {"_id": match_oid, "status": "active", "version": 4})
+    store._journal_append = lambda *args: None
+
+    async def finalize_twice():
+        update = {"$set": {"status": "completed"}, "$inc": {"version": 1}}
+        return await asyncio.gather(
+            store.transition(match_oid, {"status": "active"}, update),
+            store.transition(match_oid, {"status": "active"}, update)
+        )
+
+    assert sorted(asyncio.run(finalize_twice())) == [False, True]
+    assert store._hot[str(match_oid)].doc["version"] == 5
+
+
+def test_expiry_gives_unfinished_quiz_players_partial_credit():
+    questions = [{"correct_answer": 1, "points": 10}, {"correct_answer": 2, "points": 10}]
+    match = {
+        "game_mode": "code_quiz",
+        "time_limit_seconds": 60,
+        "quiz_questions": questions,
+        "players": [
+            {"user_id": "a", "completed": False, "quiz_answers": {"0": 1, "1": 2}},
+            {"user_id": "b", "completed": True, "quiz_score": 15, "quiz_time_taken": 50},
+            {"user_id": "c", "completed": False},
+        ],
+    }
+
+    update, ranked = expiry_update(match)
+    fields = update["$set"]
+
+    assert [p["user_id"] for p in ranked] == ["a", "b", "c"]
+    assert fields["players.0.quiz_score"] == 20 and fields["players.0.timed_out"] is True
+    assert fields["players.2.quiz_score"] == 0
+    assert "players.1.quiz_score" not in fields
+    assert fields["status"] == "completed" and fields["timed_out"] is True
+
+
+def test_expiry_ranks_coders_by_problems_solved():
+    match = {
+        "game_mode": "standard",
+        "time_limit_seconds": 900,
+        "players": [
+            {"user_id": "a", "completed": False, "problems_solved": 1, "score": 90, "time_elapsed": 100},
+            {"user_id": "b", "completed": False, "problems_solved": 2, "score": 60, "time_elapsed": 300},
+        ],
+    }
+
+    update, ranked = expiry_update(match)
+
+    assert [p["user_id"] for p in ranked] == ["b", "a"]
+    assert update["$set"]["players.0.time_elapsed"] == 900
+
+
+def test_duel_outcome():
+    ahead = {"user_id": "a", "problems_solved": 2, "time_elapsed": 400}
+    behind = {"user_id": "b", "problems_solved": 1, "time_elapsed": 100}
+
+    assert duel_outcome({"player1": behind, "player2": ahead}) == (ahead, behind)
+    assert duel_outcome({"player1": behind, "player2": dict(behind, user_id="c")}) is None
+
+
+def test_match_deadline():
+    started = datetime(2024, 1, 1, 12, 0)
+    assert match_deadline(started, 900) == datetime(2024, 1, 1, 12, 15)
+    assert match_deadline(started, None) is None
+
+
+def test_expiry_ranks_matches_hot_on_this_node_from_their_hot_copy(monkeypatch):
+    from app.routers import competitive
+
+    store = HotMatchStore(enabled=True)
+    store._journal_append = lambda *args: None
+    match_oid = ObjectId()
+    stored = {
+        "_id": match_oid, "status": "active", "version": 7, "game_mode": "code_quiz", "time_limit_seconds": 60,
+        "quiz_questions": [{"correct_answer": 1, "points": 10}],
+        "players": [
+            {"user_id": "a", "completed": False, "quiz_answers": {"0": 0}},
+            {"user_id": "b", "completed": False},
+        ],
+    }
+    # Player b finished in memory after the sweeper read the match from Mongo
+    hot = {**stored, "version": 8, "players": [stored["players"][0], {"user_id": "b", "completed": True, "quiz_score": 10}]}
+    store._hot[str(match_oid)] = HotMatch(str(match_oid), hot)
+
+    async def noop(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(competitive, "match_store", store)
+    monkeypatch.setattr(competitive, "broadcast_match", noop)
+    monkeypatch.setattr(competitive, "release_match_resources", lambda match_id: None)
+    monkeypatch.setattr(competitive, "get_database", lambda: SimpleNamespace(users=SimpleNamespace(bulk_write=noop)))
+
+    assert asyncio.run(competitive.expire_matches([stored], datetime(2024, 1, 1))) == 1
+
+    players = store._hot[str(match_oid)].doc["players"]
+    assert players[1]["completed"] is True and players[1]["quiz_score"] == 10
+    assert players[1]["rank"] == 1 and players[0]["rank"] == 2
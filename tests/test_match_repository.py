@@ -0,0 +1,59 @@
+from app.services.match_repository import (
+    PARTICIPANTS, QUIZ_PROGRESS, SUBMISSION, duel_player_key, player_index, quiz_chunk
+)
+from app.services.match_store import _project
+
+
+def _quiz_match():
+    return {
+        "_id": "m1",
+        "status": "active",
+        "game_mode": "code_quiz",
+        "quiz_total_questions": 5,
+        "quiz_questions": [{"question": f"q{i}"} for i in range(5)],
+        "players": [
+            {"user_id": "u1", "completed": False, "quiz_answers": {"0": 1}, "submissions": [{"code": "x"}]},
+            {"user_id": "u2", "completed": True, "score": 40, "code": "print(1)"},
+        ],
+        "changes": [{"set": {}}],
+    }
+
+
+def test_inclusion_projection_keeps_player_positions():
+    match = _project(_quiz_match(), QUIZ_PROGRESS)
+
+    assert match == {
+        "_id": "m1",
+        "status": "active",
+        "game_mode": "code_quiz",
+        "players": [{"user_id": "u1", "completed": False}, {"user_id": "u2", "completed": True}],
+    }
+    assert player_index(match, "u2") == 1
+    assert player_index(match, "u3") is None
+
+
+def test_quiz_chunk_slices_questions():
+    match = _project(_quiz_match(), quiz_chunk(3, 10))
+
+    assert [q["question"] for q in match["quiz_questions"]] == ["q3", "q4"]
+    assert match["quiz_total_questions"] == 5
+    assert "status" not in match
+
+
+def test_submission_projection_drops_heavy_fields():
+    match = _project(_quiz_match(), SUBMISSION)
+
+    assert "quiz_questions" not in match and "changes" not in match
+    assert match["players"][0] == {"user_id": "u1", "completed": False}
+    assert match["players"][1] == {"user_id": "u2", "completed": True, "score": 40}
+
+
+def test_duel_player_key():
+    match = _project(
+        {"_id": "m2", "status": "active", "player1": {"user_id": "a", "code": "x"}, "player2": {"user_id": "b"}},
+        PARTICIPANTS
+    )
+
+    assert match["player1"] == {"user_id": "a"}
+    assert duel_player_key(match, "b") == "player2"
+    assert duel_player_key(match, "c") is None
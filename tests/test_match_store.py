@@ -0,0 +1,247 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from bson import ObjectId, json_util
+from pymongo.errors import DuplicateKeyError
+
+from app.services import match_store as match_store_module
+from app.services.match_changes import log_change
+from app.services.match_store import HotMatch, HotMatchStore, _project, apply_update, store_channel
+
+
+def test_apply_update_matches_mongo_semantics_for_router_updates():
+    doc = {"_id": "m", "version": 3, "players": [{"score": 0, "submissions": []}, {"score": 5}]}
+
+    apply_update(doc, log_change({
+        "$set": {"players.1.score": 10, "status": "active"},
+        "$push": {"players.0.submissions": {"problem_index": 0}},
+        "$inc": {"version": 1, "players.0.hints_used": 1}
+    }))
+
+    assert doc["version"] == 4
+    assert doc["status"] == "active"
+    assert doc["players"][1]["score"] == 10
+    assert doc["players"][0]["hints_used"] == 1
+    assert doc["players"][0]["submissions"] == [{"problem_index": 0}]
+    assert len(doc["changes"]) == 1
+
+
+def test_apply_update_push_slice_and_unset():
+    doc = {"log": [1, 2, 3], "draft": "x"}
+
+    apply_update(doc, {"$push": {"log": {"$each": [4, 5], "$slice": -3}}, "$unset": {"draft": ""}})
+
+    assert doc == {"log": [3, 4, 5]}
+
+
+def test_project_inclusion_and_exclusion():
+    doc = {"_id": 1, "version": 2, "players": [], "changes": [{}]}
+
+    assert _project(doc, {"version": 1}) == {"_id": 1, "version": 2}
+    assert _project(doc, {"changes": 0}) == {"_id": 1, "version": 2, "players": []}
+    projected = _project(doc, None)
+    projected["players"].append("p")
+    assert doc["players"] == []
+
+
+def test_on_event_marks_hot_copy_stale():
+    store = HotMatchStore(enabled=True)
+    store._hot["abc"] = hot = HotMatch("abc", {})
+
+    store.on_event("match:abc", {})
+    assert not hot.stale
+    store.on_event(store_channel("abc"), {"type": "external_write"})
+    assert hot.stale
+
+
+class FakeResult:
+    def __init__(self, matched_count):
+        self.matched_count = matched_count
+        self.modified_count = matched_count
+
+
+def matches_filter(doc, query):
+    for field, value in query.items():
+        if isinstance(value, dict) and "$in" in value:
+            if doc.get(field) not in value["$in"]:
+                return False
+        elif isinstance(value, dict) and "$ne" in value:
+            if doc.get(field) == value["$ne"]:
+                return False
+        elif doc.get(field) != value:
+            return False
+    return True
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: doc for doc in docs}
+
+    async def find_one(self, query, projection=None):
+        return next((doc for doc in self.docs.values() if matches_filter(doc, query)), None)
+
+    async def update_one(self, query, update):
+        doc = await self.find_one(query)
+        if doc is None:
+            return FakeResult(0)
+        apply_update(doc, update)
+        return FakeResult(1)
+
+    async def update_many(self, query, update):
+        matched = [doc for doc in self.docs.values() if matches_filter(doc, query)]
+        for doc in matched:
+            apply_update(doc, update)
+        return FakeResult(len(matched))
+
+    async def bulk_write(self, operations, ordered=True):
+        matched = 0
+        for operation in operations:
+            matched += (await self.update_one(operation._filter, operation._doc)).matched_count
+        return FakeResult(matched)
+
+    def find(self, query, projection=None):
+        async def docs():
+            for doc in list(self.docs.values()):
+                if matches_filter(doc, query):
+                    yield doc
+        return docs()
+
+    async def find_one_and_update(self, query, update, upsert, return_document):
+        # Only what _acquire_lease needs: ours, expired or missing
+        lease = self.docs.get(query["_id"])
+        if lease and lease["owner"] != update["$set"]["owner"] and lease["expires_at"] >= datetime.utcnow():
+            raise DuplicateKeyError("lease held")
+        self.docs[query["_id"]] = {"_id": query["_id"], **update["$set"]}
+        return self.docs[query["_id"]]
+
+    async def delete_one(self, query):
+        doc = await self.find_one(query)
+        if doc is not None:
+            del self.docs[doc["_id"]]
+
+
+MATCH_OID = ObjectId()
+MATCH_ID = str(MATCH_OID)
+
+
+def hot_store(monkeypatch, tmp_path, version=1, lease_owner=None, lease_expires_in=30):
+    store = HotMatchStore(enabled=True, journal_dir=str(tmp_path))
+    os.makedirs(store.node_journal_dir)
+    db = SimpleNamespace(
+        matches=FakeCollection([{"_id": MATCH_OID, "status": "active", "version": version, "score": 0}]),
+        match_leases=FakeCollection([{
+            "_id": MATCH_ID,
+            "owner": lease_owner or store.node_id,
+            "expires_at": datetime.utcnow() + timedelta(seconds=lease_expires_in)
+        }])
+    )
+    monkeypatch.setattr(match_store_module, "get_database", lambda: db)
+    store._hot[MATCH_ID] = HotMatch(MATCH_ID, {"_id": MATCH_OID, "status": "active", "version": version, "score": 0})
+    return store, db
+
+
+def score_update(points):
+    return {"$inc": {"score": points, "version": 1}}
+
+
+def test_stalled_node_drops_matches_whose_lease_was_taken(monkeypatch, tmp_path):
+    store, db = hot_store(monkeypatch, tmp_path, lease_owner="other-node")
+
+    asyncio.run(store.transition(MATCH_OID, {}, score_update(5)))
+    asyncio.run(store.flush_all())
+
+    assert MATCH_ID not in store._hot
+    assert db.matches.docs[MATCH_OID]["score"] == 0
+    assert not os.listdir(store.node_journal_dir)
+
+
+def test_flush_never_applies_over_a_new_owners_version(monkeypatch, tmp_path):
+    store, db = hot_store(monkeypatch, tmp_path)
+    asyncio.run(store.transition(MATCH_OID, {}, score_update(5)))
+    store._last_renewal = datetime.utcnow()  # Renewal not due: the flush itself finds out
+    # The lease expired and another node took the match over and wrote to it
+    db.match_leases.docs[MATCH_ID]["owner"] = "other-node"
+    asyncio.run(db.matches.update_one({"_id": MATCH_OID}, score_update(1)))
+
+    asyncio.run(store.flush_all())
+
+    assert db.matches.docs[MATCH_OID]["score"] == 1
+    assert db.matches.docs[MATCH_OID]["version"] == 2
+    assert MATCH_ID not in store._hot
+
+
+def test_direct_writes_while_holding_the_lease_are_merged_once(monkeypatch, tmp_path):
+    store, db = hot_store(monkeypatch, tmp_path)
+    asyncio.run(store.transition(MATCH_OID, {}, score_update(5)))
+    asyncio.run(store.transition(MATCH_OID, {}, score_update(7)))
+    # A node without the lease wrote to the match before the flush
+    asyncio.run(db.matches.update_one({"_id": MATCH_OID}, score_update(1)))
+
+    asyncio.run(store.flush_all())
+    asyncio.run(store.flush_all())
+
+    assert db.matches.docs[MATCH_OID]["score"] == 13
+    assert db.matches.docs[MATCH_OID]["version"] == 4
+    assert store._hot[MATCH_ID].stale
+    assert not store._hot[MATCH_ID].pending
+
+
+def test_updates_are_not_merged_into_a_match_completed_elsewhere(monkeypatch, tmp_path):
+    store, db = hot_store(monkeypatch, tmp_path)
+    asyncio.run(store.transition(MATCH_OID, {}, score_update(5)))
+    # The deadline sweeper on another node ended the match before the flush
+    asyncio.run(db.matches.update_one(
+        {"_id": MATCH_OID}, {"$set": {"status": "completed"}, "$inc": {"version": 1}}
+    ))
+
+    asyncio.run(store.flush_all())
+
+    assert db.matches.docs[MATCH_OID]["score"] == 0
+    assert db.matches.docs[MATCH_OID]["version"] == 2
+    assert store._hot[MATCH_ID].stale
+    assert not store._hot[MATCH_ID].pending
+
+
+def test_torn_last_journal_line_is_ignored_on_recovery(monkeypatch, tmp_path):
+    store, db = hot_store(monkeypatch, tmp_path, lease_owner="gone-node", lease_expires_in=-1)
+    os.makedirs(tmp_path / "gone-node")
+    (tmp_path / "gone-node" / f"{MATCH_ID}.jsonl").write_text(
+        json_util.dumps({"version": 2, "update": score_update(3)}) + "\n" + '{"version": 3, "upd'
+    )
+
+    assert asyncio.run(store.recover()) == 1
+    assert db.matches.docs[MATCH_OID]["score"] == 3
+
+
+def test_clean_flush_marks_the_last_applied_update(monkeypatch, tmp_path):
+    store, db = hot_store(monkeypatch, tmp_path)
+    asyncio.run(store.transition(MATCH_OID, {}, score_update(5)))
+
+    asyncio.run(store.flush_all())
+
+    assert db.matches.docs[MATCH_OID]["write_mark"] == f"{store.node_id}:2"
+    assert not store._hot[MATCH_ID].stale
+    assert not os.listdir(store.node_journal_dir)
+
+
+def test_recover_only_replays_journals_of_nodes_that_lost_their_lease(monkeypatch, tmp_path):
+    store, db = hot_store(monkeypatch, tmp_path, lease_owner="live-node")
+    gone_oid = ObjectId()
+    db.matches.docs[gone_oid] = {"_id": gone_oid, "status": "active", "version": 1, "score": 0}
+    db.match_leases.docs[str(gone_oid)] = {
+        "_id": str(gone_oid), "owner": "gone-node", "expires_at": datetime.utcnow() - timedelta(seconds=1)
+    }
+    for node, match_id in (("live-node", MATCH_ID), ("gone-node", str(gone_oid))):
+        os.makedirs(tmp_path / node)
+        (tmp_path / node / f"{match_id}.jsonl").write_text(
+            json_util.dumps({"version": 2, "update": score_update(3)}) + "\n"
+        )
+
+    assert asyncio.run(store.recover()) == 1
+
+    assert db.matches.docs[gone_oid]["score"] == 3
+    assert db.matches.docs[MATCH_OID]["score"] == 0
+    assert (tmp_path / "live-node" / f"{MATCH_ID}.jsonl").exists()
+    assert not (tmp_path / "gone-node").exists()
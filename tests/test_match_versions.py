@@ -0,0 +1,18 @@
+from app.routers.competitive import etag_matches, make_etag, versioned
+
+
+def test_versioned_bumps_version_alongside_other_operators():
+    update = versioned({"$set": {"status": "active"}, "$inc": {"players.0.score": 10}})
+    assert update["$inc"] == {"players.0.score": 10, "version": 1}
+    assert versioned({"$push": {"players": {}}})["$inc"] == {"version": 1}
+
+
+def test_etag_matching():
+    etag = make_etag(7)
+    assert etag == '"7"'
+    assert etag_matches('"7"', etag)
+    assert etag_matches('W/"7", "8"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"6"', etag)
+    assert not etag_matches(None, etag)
+    assert make_etag(3, "user1") == '"3-user1"'
@@ -0,0 +1,121 @@
+import asyncio
+
+from app.services.matchmaking import BOT_FALLBACK_SECONDS, Matchmaker, RatingQueue, Ticket
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _matchmaker(created):
+    matchmaker = Matchmaker()
+
+    async def factory(ticket, opponent):
+        created.append((ticket.user_id, opponent.user_id if opponent else None))
+        return f"match-{len(created)}"
+
+    matchmaker.set_match_factory(factory)
+    return matchmaker
+
+
+def test_pairs_closest_rating_within_window():
+    async def scenario():
+        created = []
+        matchmaker = _matchmaker(created)
+        far = matchmaker.enqueue("far", "Far", 1500, "standard")
+        near = matchmaker.enqueue("near", "Near", 1240, "standard")
+        other_mode = matchmaker.enqueue("quiz", "Quiz", 1200, "bug_hunt")
+        ticket = matchmaker.enqueue("me", "Me", 1200, "standard")
+        await asyncio.sleep(0)
+
+        assert created == [("me", "near")]
+        assert ticket.status == near.status == "matched"
+        assert ticket.match_id == near.match_id == "match-1"
+        assert far.status == other_mode.status == "queued"
+
+    _run(scenario())
+
+
+def test_window_widens_until_pairing_then_bot_fallback():
+    async def scenario():
+        created = []
+        matchmaker = _matchmaker(created)
+        low = matchmaker.enqueue("low", "Low", 1000, "standard")
+        high = matchmaker.enqueue("high", "High", 1300, "standard")
+        assert low.status == high.status == "queued"
+
+        # 300 apart: both windows must have widened past 300
+        matchmaker.sweep(now=low.enqueued_at + 11)
+        await asyncio.sleep(0)
+        assert created == [("low", "high")]
+
+        lonely = matchmaker.enqueue("lonely", "Lonely", 2500, "standard")
+        matchmaker.sweep(now=lonely.enqueued_at + BOT_FALLBACK_SECONDS)
+        await asyncio.sleep(0)
+        assert created[-1] == ("lonely", None)
+        assert lonely.opponent == "bot"
+
+    _run(scenario())
+
+
+def test_enqueue_is_idempotent_and_cancel_leaves_queue():
+    async def scenario():
+        matchmaker = _matchmaker([])
+        ticket = matchmaker.enqueue("me", "Me", 1200, "standard")
+        assert matchmaker.enqueue("me", "Me", 1200, "standard") is ticket
+        assert matchmaker.queued_count("standard") == 1
+
+        assert matchmaker.cancel("me")
+        assert ticket.status == "cancelled"
+        assert matchmaker.queued_count("standard") == 0
+
+        await ticket.wait(1)  # Already resolved: returns immediately
+
+    _run(scenario())
+
+
+def test_lookup_ignores_queue_size():
+    async def scenario():
+        queue = RatingQueue()
+        for i in range(5000):
+            queue.add(Ticket(f"u{i}", "P", 3000 + i, "standard"))
+        ticket = Ticket("me", "Me", 1200, "standard")
+
+        assert queue.find_opponent(ticket) is None
+        queue.add(Ticket("near", "Near", 1260, "standard"))
+        assert queue.find_opponent(ticket).user_id == "near"
+
+    _run(scenario())
+
+
+def test_lookup_scans_past_a_bucket_oldest_unacceptable_ticket():
+    queue = RatingQueue()
+    # Same far bucket (1400-1449): the oldest is out of reach, the newer one is not
+    queue.add(Ticket("oldest", "Oldest", 1449, "standard"))
+    queue.add(Ticket("reachable", "Reachable", 1400, "standard"))
+    ticket = Ticket("me", "Me", 1300, "standard")
+
+    assert queue.find_opponent(ticket).user_id == "reachable"
+
+
+def test_match_creations_are_tracked_and_cancelled_on_stop():
+    async def scenario():
+        matchmaker = Matchmaker()
+        started = asyncio.Event()
+
+        async def slow_factory(ticket, opponent):
+            started.set()
+            await asyncio.sleep(60)
+
+        matchmaker.set_match_factory(slow_factory)
+        matchmaker.enqueue("a", "A", 1200, "standard")
+        matchmaker.enqueue("b", "B", 1210, "standard")
+        await started.wait()
+        (task,) = matchmaker._tasks
+
+        await matchmaker.stop()
+
+        assert task.cancelled()
+        assert not matchmaker._tasks
+
+    _run(scenario())
@@ -0,0 +1,94 @@
+import asyncio
+
+from app.services.bug_generator import generate_mutants
+from app.services.mutation_tester import MutationTester
+
+REFERENCE = """def solution(n):
+    if n > 0:
+        return n + 1
+    return 0
+"""
+
+
+def test_generate_mutants_is_deterministic_and_compiles():
+    first = generate_mutants(REFERENCE, "python", max_mutants=10)
+    second = generate_mutants(REFERENCE, "python", max_mutants=10)
+
+    assert first == second
+    assert first
+    for mutant in first:
+        assert mutant != REFERENCE
+        compile(mutant, "<mutant>", "exec")
+
+
+def test_generate_mutants_unknown_language():
+    assert generate_mutants(REFERENCE, "cobol") == []
+
+
+def test_score_rewards_tests_that_kill_mutants():
+    tester = MutationTester()
+
+    weak = asyncio.run(tester.score_test_cases(
+        "p1", REFERENCE, "python", [{"input": "5", "expected": "6"}]
+    ))
+    strong = asyncio.run(tester.score_test_cases(
+        "p1", REFERENCE, "python",
+        [
+            {"input": "5", "expected": "6"},
+            {"input": "0", "expected": "0"},
+            {"input": "-3", "expected": "0"},
+        ]
+    ))
+
+    assert weak is not None and strong is not None
+    assert strong["killed"] >= weak["killed"]
+    assert strong["score"] > 0
+    assert strong["invalid_tests"] == []
+
+
+def test_tests_disagreeing_with_reference_are_invalid():
+    tester = MutationTester()
+    result = asyncio.run(tester.score_test_cases(
+        "p2", REFERENCE, "python", [{"input": "5", "expected": "7"}]
+    ))
+
+    assert result["invalid_tests"] == [0]
+    assert result["killed"] == 0
+
+
+def test_unsupported_language_falls_back():
+    tester = MutationTester()
+    assert asyncio.run(tester.score_test_cases("p3", REFERENCE, "java", [{"input": "1", "expected": "2"}])) is None
+
+
+EQUIVALENT_PRONE = """def solution(n):
+    if n > 0:
+        return n * 2
+    return 0
+"""
+
+
+def test_mutants_surviving_the_problem_tests_are_dropped_and_cached():
+    tester = MutationTester()
+    problem_tests = [{"input": "3", "expected": "6"}, {"input": "-2", "expected": "0"}]
+    generated = generate_mutants(EQUIVALENT_PRONE, "python", tester.max_mutants)
+
+    mutants = asyncio.run(tester.get_mutants("p4", EQUIVALENT_PRONE, "python", problem_tests))
+
+    # n >= 0 behaves like n > 0 on every input (0 * 2 == 0): no test can kill it
+    assert any("if n >= 0:" in mutant for mutant in generated)
+    assert all("if n >= 0:" not in mutant for mutant in mutants)
+    assert 0 < len(mutants) < len(generated)
+    assert asyncio.run(tester.get_mutants("p4", EQUIVALENT_PRONE, "python")) is mutants
+
+
+def test_tests_killing_every_viable_mutant_score_full_marks():
+    tester = MutationTester()
+    problem_tests = [{"input": "3", "expected": "6"}, {"input": "-2", "expected": "0"}]
+
+    result = asyncio.run(tester.score_test_cases(
+        "p5", EQUIVALENT_PRONE, "python", problem_tests, problem_tests=problem_tests
+    ))
+
+    assert result["score"] == 100
+    assert result["killed"] == result["total_mutants"]
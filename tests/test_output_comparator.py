@@ -0,0 +1,39 @@
+from app.services.output_comparator import get_comparator
+
+
+def check(spec, expected, actual):
+    comparator = get_comparator(spec)
+    return comparator.matches(actual, comparator.normalize(expected))
+
+
+def test_exact_is_the_default():
+    assert check(None, "1 2 3\n", "1 2 3")
+    assert not check(None, "1 2 3", "1 2  3")
+    assert get_comparator("nonsense").mode == "exact"
+
+
+def test_token_ignores_whitespace_layout():
+    assert check("token", "1 2\n3", "1 2   \n3\n\n")
+    assert not check("token", "1 2 3", "1 2")
+    assert not check("token", "1 2", "1 2 3")
+
+
+def test_float_tolerance():
+    assert check("float", "0.333333 yes", "0.3333333333 yes")
+    assert not check("float", "0.5", "0.6")
+    assert not check("float", "1.0", "one")
+    assert check({"mode": "float", "abs_tol": 0.2}, "0.5", "0.6")
+
+
+def test_unordered_lists_and_lines():
+    assert check("unordered", "[1, 2, 3]", "[3, 1, 2]")
+    assert not check("unordered", "[1, 2, 2]", "[1, 2]")
+    assert check("unordered", "a\nb\n", "b\na")
+
+
+def test_comparators_are_shared_and_pass_results():
+    assert get_comparator("token") is get_comparator("token")
+    comparator = get_comparator("token")
+    expected = comparator.normalize("4")
+    assert comparator.passes({"success": True, "output": "4\n"}, expected)
+    assert not comparator.passes({"success": False, "output": "4"}, expected)
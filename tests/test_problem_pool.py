@@ -0,0 +1,302 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.services import problem_pool as pool_module
+from app.services.problem_pool import (
+    GenerationUnavailable, ProblemPool, pool_id, problem_document, validation_errors
+)
+
+
+def generated(**overrides):
+    problem = {
+        "title": "Two Sum",
+        "description": "Find two numbers",
+        "testCases": [{"input": "1 2", "expected": "3"}],
+        "referenceCode": {"python": "print(3)"},
+    }
+    problem.update(overrides)
+    return problem
+
+
+def test_validation_rejects_unusable_problems():
+    assert validation_errors(generated(), "code_shuffle") == []
+    assert validation_errors(generated(testCases=[]), "standard") == ["no test cases"]
+    assert validation_errors(generated(testCases=[{"input": "1"}]), "standard") == ["malformed test case"]
+    assert validation_errors(generated(referenceCode={}), "code_shuffle") == ["no python reference code to shuffle"]
+    assert validation_errors(generated(referenceCode={}), "standard") == []
+
+
+def test_problem_document_marks_custom_match_problems():
+    doc = problem_document(generated(), "hard", "bug_hunt")
+
+    assert doc["difficulty"] == "Hard"
+    assert doc["competitive_mode"] == "bug_hunt"
+    assert doc["match_type"] == "custom_match"
+    assert doc["created_for_competitive"] is True
+
+
+class FakeLease:
+    def __init__(self, renewals=None):
+        self.renewals = renewals  # how many acquires succeed; None for always
+
+    async def acquire(self):
+        if self.renewals is None:
+            return True
+        self.renewals -= 1
+        return self.renewals >= 0
+
+
+class FakePoolCollection:
+    def __init__(self, queues):
+        self.queues = queues
+
+    async def find_one_and_update(self, query, pipeline, projection, return_document):
+        before = list(self.queues.get(query["_id"], []))
+        if query["_id"] not in self.queues:
+            return None
+        start = pipeline[0]["$set"]["problem_ids"]["$slice"][1]
+        self.queues[query["_id"]] = before[start:]
+        return {"_id": query["_id"], "problem_ids": before[:projection["problem_ids"]["$slice"]]}
+
+    def find(self, query, projection):
+        queues = self.queues
+
+        async def docs():
+            for key, ids in queues.items():
+                yield {"_id": key, "size": len(ids)}
+
+        return docs()
+
+    async def update_one(self, query, update, upsert=False):
+        push = update["$push"]["problem_ids"]
+        queue = self.queues.setdefault(query["_id"], [])
+        if isinstance(push, dict):
+            queue[push["$position"]:push["$position"]] = push["$each"]
+        else:
+            queue.append(push)
+
+
+class FakeProblems:
+    def __init__(self, stored=()):
+        self.stored = list(stored)
+
+    def aggregate(self, pipeline):
+        excluded = pipeline[0]["$match"]["_id"]["$nin"]
+        size = pipeline[1]["$sample"]["size"]
+        stored = [problem_id for problem_id in self.stored if problem_id not in excluded][:size]
+
+        async def docs():
+            for problem_id in stored:
+                yield {"_id": problem_id}
+
+        return docs()
+
+
+def with_pool(monkeypatch, queues, stored=()):
+    db = SimpleNamespace(problem_pool=FakePoolCollection(queues), problems=FakeProblems(stored))
+    monkeypatch.setattr(pool_module, "get_database", lambda: db)
+    pool = ProblemPool(target=3, keys=[("hard", "standard")])
+    pool.lease = FakeLease()
+    generated_ids = []
+
+    async def fake_generate(difficulty, competitive_mode, allow_fallback=True):
+        generated_ids.append(f"new{len(generated_ids)}")
+        return generated_ids[-1]
+
+    pool.generate = fake_generate
+    return pool, generated_ids
+
+
+def test_claim_takes_from_the_front_of_the_queue(monkeypatch):
+    queues = {pool_id("hard", "standard"): ["p1", "p2", "p3", "p4", "p5", "p6"]}
+    pool, generated_ids = with_pool(monkeypatch, queues)
+
+    claimed = asyncio.run(pool.claim("hard", "standard"))
+
+    assert claimed == ["p1", "p2", "p3", "p4", "p5"]
+    assert queues[pool_id("hard", "standard")] == ["p6"]
+    assert generated_ids == []
+
+
+def test_claim_generates_the_shortfall(monkeypatch):
+    queues = {pool_id("hard", "standard"): ["p1", "p2"]}
+    pool, generated_ids = with_pool(monkeypatch, queues)
+
+    claimed = asyncio.run(pool.claim("hard", "standard"))
+
+    assert claimed == ["p1", "p2", "new0", "new1", "new2"]
+
+
+def test_refill_tops_up_to_target(monkeypatch):
+    queues = {pool_id("hard", "standard"): ["p1"]}
+    pool, _ = with_pool(monkeypatch, queues)
+
+    added = asyncio.run(pool.refill())
+
+    assert added == 2
+    assert queues[pool_id("hard", "standard")] == ["p1", "new0", "new1"]
+
+
+def test_refill_stops_once_leadership_is_lost(monkeypatch):
+    queues = {pool_id("hard", "standard"): []}
+    pool, generated_ids = with_pool(monkeypatch, queues)
+    pool.lease = FakeLease(renewals=1)
+
+    added = asyncio.run(pool.refill())
+
+    assert added == 1
+    assert queues[pool_id("hard", "standard")] == ["new0"]
+
+
+def test_claim_retries_failed_generations_then_reuses_stored_problems(monkeypatch):
+    stored = [ObjectId(), ObjectId()]
+    queues = {pool_id("hard", "standard"): ["p1"]}
+    pool, _ = with_pool(monkeypatch, queues, stored)
+    outcomes = [ValueError("rejected"), "new0", ValueError("rejected"), ValueError("rejected"),
+                "new0", "new1", ValueError("rejected")]
+
+    async def flaky_generate(difficulty, competitive_mode):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    pool.generate = flaky_generate
+
+    claimed = asyncio.run(pool.claim("hard", "standard"))
+
+    # Round one: 1 of 4 generated; round two: 1 new of 3; the rest are stored problems
+    assert claimed == ["p1", "new0", "new1", str(stored[0]), str(stored[1])]
+    assert not outcomes
+
+
+def test_failed_claim_puts_its_problems_back(monkeypatch):
+    queues = {pool_id("hard", "standard"): ["p1", "p2"]}
+    pool, _ = with_pool(monkeypatch, queues)
+
+    async def slow_generate(difficulty, competitive_mode):
+        await asyncio.sleep(60)
+
+    pool.generate = slow_generate
+
+    async def claim():
+        # Cancelled like a lobby request whose client went away
+        task = asyncio.create_task(pool.claim("hard", "standard"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(claim())
+
+    assert queues[pool_id("hard", "standard")] == ["p1", "p2"]
+
+
+def test_claim_with_nothing_available_fails(monkeypatch):
+    pool, _ = with_pool(monkeypatch, {})
+
+    async def failing_generate(difficulty, competitive_mode):
+        raise ValueError("rejected")
+
+    pool.generate = failing_generate
+
+    with pytest.raises(LookupError):
+        asyncio.run(pool.claim("hard", "standard"))
+
+
+class FakeInserts:
+    def __init__(self):
+        self.docs = []
+
+    async def find_one(self, query, projection):
+        for doc in self.docs:
+            if all(doc.get(field) == value for field, value in query.items()):
+                return {"_id": doc["_id"]}
+        return None
+
+    async def insert_one(self, doc):
+        doc["_id"] = ObjectId()
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+
+def with_generation(monkeypatch, variants, problem=generated, duplicate=None):
+    db = SimpleNamespace(problems=FakeInserts(), problem_pool=FakePoolCollection({}))
+    monkeypatch.setattr(pool_module, "get_database", lambda: db)
+
+    async def fake_problem(difficulty, competitive_mode):
+        return problem()
+
+    async def accept(problem):
+        return SimpleNamespace(accepted=True, problem=dict(problem), dropped_tests=[], dropped_languages=[])
+
+    async def fake_variants(problem):
+        return list(variants)
+
+    async def index(namespace, docs):
+        pass
+
+    monkeypatch.setattr(pool_module, "generate_competitive_problem", fake_problem)
+    monkeypatch.setattr(pool_module, "validate_reference", accept)
+    monkeypatch.setattr(pool_module, "build_verified_variants", fake_variants)
+    monkeypatch.setattr(pool_module.similarity_index, "find_duplicate", lambda namespace, doc: duplicate)
+    monkeypatch.setattr(pool_module.similarity_index, "add", index)
+    pool = ProblemPool(target=0)
+    pool.lease = FakeLease()
+    return pool, db
+
+
+def test_bug_hunt_problems_are_stored_with_verified_variants(monkeypatch):
+    pool, db = with_generation(monkeypatch, ["print(4)"])
+
+    asyncio.run(pool.generate("hard", "bug_hunt"))
+    asyncio.run(pool.generate("hard", "standard"))
+
+    bug_hunt, standard = db.problems.docs
+    assert bug_hunt["buggyCodeVariants"] == {"python": ["print(4)"]}
+    assert bug_hunt["buggyVariantsVerifiedAt"] is not None
+    assert standard["buggyCodeVariants"] == {}
+
+
+def test_bug_hunt_problems_without_verified_variants_are_rejected(monkeypatch):
+    pool, db = with_generation(monkeypatch, [])
+
+    with pytest.raises(ValueError, match="no verified buggy variants"):
+        asyncio.run(pool.generate("hard", "bug_hunt"))
+    assert db.problems.docs == []
+
+
+def test_fallback_problems_skip_dedupe_and_reuse_their_stored_document(monkeypatch):
+    # The similarity index flags everything here; fallbacks are not checked against it
+    pool, db = with_generation(monkeypatch, [], problem=lambda: generated(fallback=True), duplicate=("other", 1.0))
+
+    first = asyncio.run(pool.generate("hard", "standard"))
+    second = asyncio.run(pool.generate("hard", "standard"))
+
+    assert first == second
+    assert len(db.problems.docs) == 1
+    assert db.problems.docs[0]["fallback"] is True
+    assert "ai-generated" not in db.problems.docs[0]["topics"]
+
+
+def test_generated_near_duplicates_are_still_rejected(monkeypatch):
+    pool, db = with_generation(monkeypatch, [], duplicate=("other", 1.0))
+
+    with pytest.raises(ValueError, match="near-duplicate"):
+        asyncio.run(pool.generate("hard", "standard"))
+    assert db.problems.docs == []
+
+
+def test_refill_never_pools_fallback_problems(monkeypatch):
+    pool, db = with_generation(monkeypatch, [], problem=lambda: generated(fallback=True))
+    pool.target = 3
+    pool.keys = [("hard", "standard")]
+
+    with pytest.raises(GenerationUnavailable):
+        asyncio.run(pool.generate("hard", "standard", allow_fallback=False))
+    assert asyncio.run(pool.refill()) == 0
+    assert db.problem_pool.queues == {}
+    assert db.problems.docs == []
@@ -0,0 +1,82 @@
+import asyncio
+
+from app.services.problem_validation import validate_reference
+
+DOUBLE = "n = int(input())\nprint(n * 2)\n"
+
+
+def problem(tests, **reference):
+    return {
+        "title": "Double",
+        "testCases": [{"input": i, "expected": e} for i, e in tests],
+        "referenceCode": {"python": DOUBLE, **reference},
+    }
+
+
+class FakeExecutor:
+    """Runs 'references' that are python callables of the input"""
+
+    supported_languages = ("python", "cpp")
+
+    def __init__(self, programs):
+        self.programs = programs
+        self.in_flight = 0
+        self.peak = 0
+
+    async def execute_code(self, code, language, test_input):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        output = self.programs[code](test_input)
+        if output is None:
+            return {"success": False, "output": "", "error": "boom", "execution_time": 0.01}
+        return {"success": True, "output": output, "error": "", "execution_time": 0.02}
+
+
+def test_real_reference_run_records_timings():
+    validation = asyncio.run(validate_reference(problem([("2", "4"), ("5", "10"), ("0", "0")])))
+
+    assert validation.accepted, validation.reason
+    assert set(validation.problem["reference_timings"]) == {"python"}
+    assert validation.problem["reference_timings"]["python"]["max"] > 0
+    assert validation.problem["validated_at"] is not None
+
+
+def test_wrong_expected_outputs_are_dropped_when_enough_tests_remain():
+    tests = [("1", "2"), ("2", "4"), ("3", "6"), ("4", "9")]
+    executor = FakeExecutor({DOUBLE: lambda x: str(int(x) * 2)})
+
+    validation = asyncio.run(validate_reference(problem(tests), executor=executor, concurrency=2))
+
+    assert validation.accepted
+    assert validation.dropped_tests == [3]
+    assert [tc["input"] for tc in validation.problem["testCases"]] == ["1", "2", "3"]
+    assert executor.peak == 2
+
+
+def test_problem_is_rejected_when_reference_disagrees_too_often_or_crashes():
+    executor = FakeExecutor({DOUBLE: lambda x: str(int(x) * 2)})
+    disagreeing = asyncio.run(validate_reference(problem([("1", "2"), ("2", "5"), ("3", "7")]), executor=executor))
+    assert not disagreeing.accepted
+    assert "2/3" in disagreeing.reason
+
+    crashing = FakeExecutor({DOUBLE: lambda x: None if x == "3" else str(int(x) * 2)})
+    crashed = asyncio.run(validate_reference(problem([("1", "2"), ("2", "4"), ("3", "6")]), executor=crashing))
+    assert not crashed.accepted
+    assert "fails to run" in crashed.reason
+
+
+def test_failing_secondary_language_is_blanked():
+    executor = FakeExecutor({DOUBLE: lambda x: str(int(x) * 2), "cpp": lambda x: "0"})
+
+    validation = asyncio.run(validate_reference(
+        problem([("1", "2"), ("2", "4")], cpp="cpp", java="ignored: not runnable here"),
+        executor=executor
+    ))
+
+    assert validation.accepted
+    assert validation.dropped_languages == ["cpp"]
+    assert validation.problem["referenceCode"]["cpp"] == ""
+    assert validation.problem["referenceCode"]["java"].startswith("ignored")
+    assert set(validation.problem["reference_timings"]) == {"python"}
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+from app.services.event_bus import InProcessEventBus, MongoEventBus
+from app.services.realtime import RealtimeHub, lobby_channel, match_channel
+
+
+class FakeWebSocket:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.sent = []
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection closed")
+        self.sent.append(json.loads(text))
+
+
+def test_publish_fans_out_to_channel_subscribers():
+    hub = RealtimeHub()
+    a, b, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    hub.subscribe(match_channel("m1"), a)
+    hub.subscribe(match_channel("m1"), b)
+    hub.subscribe(match_channel("m2"), other)
+
+    sent = asyncio.run(hub.publish(match_channel("m1"), {"type": "submission"}))
+
+    assert sent == 2
+    assert a.sent == b.sent == [{"type": "submission"}]
+    assert other.sent == []
+
+
+def test_dead_connections_are_dropped():
+    hub = RealtimeHub()
+    alive, dead = FakeWebSocket(), FakeWebSocket(fail=True)
+    channel = lobby_channel("abc123")
+    hub.subscribe(channel, alive)
+    hub.subscribe(channel, dead)
+
+    asyncio.run(hub.publish(channel, {"type": "player_joined"}))
+
+    assert hub.subscriber_count(channel) == 1
+    hub.unsubscribe(channel, alive)
+    assert not hub.has_subscribers(channel)
+    assert channel == "lobby:ABC123"
+
+
+class FakeCollection:
+    def __init__(self):
+        self.inserted = []
+
+    async def insert_one(self, doc):
+        self.inserted.append(doc)
+
+
+def test_mongo_bus_delivers_locally_and_shares_event_once():
+    hub = RealtimeHub()
+    local = FakeWebSocket()
+    hub.subscribe(match_channel("m1"), local)
+    bus = MongoEventBus(hub=hub)
+    bus._collection = FakeCollection()
+
+    asyncio.run(bus.publish(match_channel("m1"), {"type": "submission"}))
+
+    assert local.sent == [{"type": "submission"}]
+    assert len(bus._collection.inserted) == 1
+    assert bus._collection.inserted[0]["origin"] == bus.node_id
+    assert bus.has_listeners(match_channel("nobody-here-yet"))
+
+
+def test_in_process_bus_closes_channel():
+    hub = RealtimeHub()
+    bus = InProcessEventBus(hub=hub)
+    channel = lobby_channel("abc123")
+
+    class ClosableWebSocket(FakeWebSocket):
+        closed = False
+
+        async def close(self, code=1000):
+            self.closed = True
+
+    ws = ClosableWebSocket()
+    hub.subscribe(channel, ws)
+    asyncio.run(bus.publish(channel, {"type": "lobby_closed", "lobby": None}, close=True))
+
+    assert ws.sent == [{"type": "lobby_closed", "lobby": None}]
+    assert ws.closed
+    assert not bus.has_listeners(channel)
@@ -0,0 +1,63 @@
+import asyncio
+
+from app.services.scheduler import TIMER_MAX_ATTEMPTS, TimerScheduler
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.calls = []
+
+    async def delete_one(self, query):
+        self.calls.append(("delete", query))
+
+    async def update_one(self, query, update):
+        self.calls.append(("update", query, update))
+
+
+class LocalScheduler(TimerScheduler):
+    def __init__(self):
+        super().__init__()
+        self.recorded = RecordingCollection()
+
+    @property
+    def collection(self):
+        return self.recorded
+
+
+def test_finished_timer_is_deleted_only_if_still_ours():
+    scheduler = LocalScheduler()
+    ran = []
+
+    async def handler(payload):
+        ran.append(payload)
+
+    scheduler.register("bot_completion", handler)
+    timer = {"_id": "bot_completion:m1", "kind": "bot_completion", "payload": {"match_id": "m1"}, "attempts": 1}
+    asyncio.run(scheduler._run(timer))
+
+    assert ran == [{"match_id": "m1"}]
+    assert scheduler.recorded.calls == [
+        ("delete", {"_id": "bot_completion:m1", "owner": scheduler.node_id, "attempts": 1})
+    ]
+
+
+def test_failing_timer_backs_off_then_is_dropped():
+    scheduler = LocalScheduler()
+
+    async def handler(payload):
+        raise RuntimeError("boom")
+
+    scheduler.register("match_deadline", handler)
+    timer = {"_id": "t1", "kind": "match_deadline", "payload": {}, "attempts": 1}
+    asyncio.run(scheduler._run(timer))
+    kind, query, update = scheduler.recorded.calls[-1]
+    assert kind == "update" and update["$set"]["owner"] is None
+
+    asyncio.run(scheduler._run({**timer, "attempts": TIMER_MAX_ATTEMPTS}))
+    assert scheduler.recorded.calls[-1] == ("delete", {"_id": "t1", "owner": scheduler.node_id})
+
+
+def test_unknown_kind_is_retried_like_a_failure():
+    scheduler = LocalScheduler()
+    asyncio.run(scheduler._run({"_id": "t2", "kind": "nope", "payload": {}, "attempts": 1}))
+    assert scheduler.recorded.calls[-1][0] == "update"
@@ -0,0 +1,91 @@
+import asyncio
+import random
+import time
+from array import array
+from types import SimpleNamespace
+
+from app.services import similarity_index as index_module
+from app.services.similarity_index import NUM_PERM, SimilarityIndex, code_shingles, problem_signature, similarity
+
+PROBLEM = {
+    "title": "Longest Increasing Run",
+    "description": "Given a list of integers, print the length of the longest strictly increasing "
+                   "contiguous run. The first line holds n, the second line the n integers.",
+    "referenceCode": {"python": "n = int(input())\na = list(map(int, input().split()))\nbest = cur = 1\n"
+                                "for i in range(1, n):\n    cur = cur + 1 if a[i] > a[i - 1] else 1\n"
+                                "    best = max(best, cur)\nprint(best)\n"},
+}
+
+
+def reworded(problem):
+    return {
+        **problem,
+        "title": "Longest Increasing Run!",
+        "description": problem["description"].replace("print", "output"),
+        "referenceCode": {"python": "# solution\n" + problem["referenceCode"]["python"].replace("    ", "  ")},
+    }
+
+
+def other_problem():
+    return {
+        "title": "Balanced Brackets",
+        "description": "Read a string of brackets and print YES when every bracket is closed in order, otherwise NO.",
+        "referenceCode": {"python": "s = input()\nstack = []\nprint('YES' if not stack else 'NO')\n"},
+    }
+
+
+class FakeCollection:
+    def __init__(self):
+        self.writes = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.writes.extend(operations)
+
+
+def test_code_shingles_ignore_comments_and_whitespace():
+    assert code_shingles("x = f(a)  # note\n") == code_shingles("x=f(a)")
+
+
+def test_reworded_problem_is_a_near_duplicate_and_a_new_one_is_not(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(index_module, "get_database", lambda: SimpleNamespace(similarity_index=collection))
+    index = SimilarityIndex()
+
+    asyncio.run(index.add("problems", [{**PROBLEM, "_id": "p1"}]))
+
+    duplicate = index.find_duplicate("problems", reworded(PROBLEM))
+    assert duplicate is not None and duplicate[0] == "p1"
+    assert index.find_duplicate("problems", other_problem()) is None
+    assert len(collection.writes) == 1
+
+
+def test_remove_duplicates_within_a_batch():
+    index = SimilarityIndex()
+    question = {"question": "What is the output?", "code": "x = [1, 2, 3]\nprint(len(x))", "options": ["1", "2", "3", "Error"]}
+    other = {"question": "What is the output?", "code": "print(type({}))", "options": ["dict", "set", "<class 'dict'>", "Error"]}
+
+    unique = index.remove_duplicates("quiz_questions", [question, dict(question), other])
+
+    assert unique == [question, other]
+
+
+def test_signature_similarity_estimates_jaccard():
+    first = problem_signature(PROBLEM)
+    assert similarity(first, first) == 1.0
+    assert similarity(first, problem_signature(other_problem())) < 0.2
+
+
+def test_lookups_stay_fast_with_many_items():
+    index = SimilarityIndex()
+    rng = random.Random(1)
+    namespace = index.namespaces["problems"]
+    for i in range(20000):
+        namespace.add(str(i), array("I", (rng.getrandbits(32) for _ in range(NUM_PERM))))
+    probe = problem_signature(PROBLEM)
+
+    started = time.perf_counter()
+    for _ in range(200):
+        namespace.nearest(probe, index.threshold)
+    per_lookup = (time.perf_counter() - started) / 200
+
+    assert per_lookup < 0.001
@@ -0,0 +1,124 @@
+import asyncio
+import json
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.routers.competitive import SPECTATOR_EXCLUDE, invalidate_snapshots, match_to_public
+from app.services.snapshot_cache import Snapshot, SnapshotCache
+
+
+def test_concurrent_readers_share_one_build_and_revalidate_by_version():
+    cache = SnapshotCache(fresh_seconds=0)
+    state = {"version": 1, "builds": 0, "version_reads": 0}
+
+    async def load_version():
+        state["version_reads"] += 1
+        return state["version"]
+
+    async def build():
+        state["builds"] += 1
+        await asyncio.sleep(0)
+        return Snapshot(state["version"], json.dumps({"v": state["version"]}).encode())
+
+    async def run():
+        first = await asyncio.gather(*(cache.get(("match", "m1"), load_version, build) for _ in range(50)))
+        unchanged = await cache.get(("match", "m1"), load_version, build)
+        state["version"] = 2
+        changed = await cache.get(("match", "m1"), load_version, build)
+        return first, unchanged, changed
+
+    first, unchanged, changed = asyncio.run(run())
+
+    assert state["builds"] == 2
+    assert all(snapshot is first[0] for snapshot in first)
+    assert unchanged is first[0]
+    assert changed.version == 2
+
+
+def test_cancelled_readers_neither_break_nor_strand_the_shared_build():
+    cache = SnapshotCache()
+    state = {"builds": 0}
+
+    async def load_version():
+        return 1
+
+    async def build():
+        state["builds"] += 1
+        await asyncio.sleep(0.01)
+        return Snapshot(1, b"{}")
+
+    async def run():
+        key = ("match", "m1")
+        # A waiter is cancelled: the builder and the other waiter still get the snapshot
+        builder = asyncio.create_task(cache.get(key, load_version, build))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(cache.get(key, load_version, build)) for _ in range(2)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        first = await asyncio.gather(builder, waiters[1])
+
+        # The builder is cancelled: its waiter builds instead of hanging
+        cache.invalidate(key)
+        builder = asyncio.create_task(cache.get(key, load_version, build))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get(key, load_version, build))
+        await asyncio.sleep(0)
+        builder.cancel()
+        second = await asyncio.wait_for(waiter, 1)
+        return first, second, waiters[0].cancelled(), builder.cancelled()
+
+    first, second, waiter_cancelled, builder_cancelled = asyncio.run(run())
+
+    assert first[0] is first[1]
+    assert second.version == 1
+    assert waiter_cancelled and builder_cancelled
+    assert state["builds"] == 3
+
+
+def test_fresh_snapshots_skip_the_database_until_invalidated():
+    cache = SnapshotCache(fresh_seconds=60)
+    calls = []
+
+    async def load_version():
+        calls.append("version")
+        return 1
+
+    async def build():
+        calls.append("build")
+        return Snapshot(1, b"{}")
+
+    async def run():
+        for _ in range(10):
+            await cache.get(("lobby", "ABC123"), load_version, build)
+        cache.invalidate(("lobby", "ABC123"))
+        await cache.get(("lobby", "ABC123"), load_version, build)
+
+    asyncio.run(run())
+    assert calls == ["build", "build"]
+
+
+def test_spectator_view_hides_code_and_answers():
+    match = {
+        "_id": ObjectId(),
+        "time_limit_seconds": 900,
+        "created_at": datetime.utcnow(),
+        "buggy_code": "def f(): return 1",
+        "quiz_questions": [{"question": "?", "correct_answer": 1}],
+        "players": [{"user_id": "u1", "username": "a", "code": "secret", "score": 50, "quiz_answers": {0: 1}}],
+    }
+    view = json.loads(match_to_public(match).model_dump_json(exclude=SPECTATOR_EXCLUDE))
+
+    assert "buggy_code" not in view and "quiz_questions" not in view
+    assert view["players"][0]["score"] == 50
+    assert "code" not in view["players"][0] and "quiz_answers" not in view["players"][0]
+
+
+def test_match_events_invalidate_both_views():
+    from app.routers.competitive import snapshot_cache
+
+    snapshot_cache.put(("match", "m9"), Snapshot(1, b"{}"))
+    snapshot_cache.put(("match_spectator", "m9"), Snapshot(1, b"{}"))
+    invalidate_snapshots("match:m9:spectators", {})
+    assert snapshot_cache._snapshots.get(("match", "m9")) is None
+    assert snapshot_cache._snapshots.get(("match_spectator", "m9")) is None
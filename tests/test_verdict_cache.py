@@ -0,0 +1,43 @@
+from app.services.verdict_cache import ShuffleVerdictCache, matches_reference_order
+
+REFERENCE = "def solution(n):\\n    total = n * 2\\n    return total"
+
+
+def test_reference_order_short_circuit():
+    lines = ["def solution(n):", "    total = n * 2", "    return total"]
+    assert matches_reference_order(REFERENCE, lines)
+    assert matches_reference_order(REFERENCE, lines + ["   "])
+    assert not matches_reference_order(REFERENCE, [lines[0], lines[2], lines[1]])
+
+
+def test_verdicts_are_shared_per_problem():
+    cache = ShuffleVerdictCache()
+    key = cache.arrangement_key("python", "print(1)")
+    verdict = {"all_passed": True, "passed_count": 3, "failed_test": None}
+
+    assert cache.put("p1", key, verdict)
+    assert cache.get("p1", key) == verdict
+    assert cache.get("p2", key) is None
+
+
+def test_transient_failures_are_not_cached():
+    cache = ShuffleVerdictCache()
+    key = cache.arrangement_key("python", "while True: pass")
+    verdict = {
+        "all_passed": False,
+        "passed_count": 0,
+        "failed_test": {"error": "Execution timed out after 10 seconds"}
+    }
+
+    assert not cache.put("p1", key, verdict)
+    assert cache.get("p1", key) is None
+
+
+def test_bounded_per_problem():
+    cache = ShuffleVerdictCache(max_arrangements_per_problem=2)
+    keys = [cache.arrangement_key("python", str(i)) for i in range(3)]
+    for key in keys:
+        cache.put("p1", key, {"all_passed": True, "passed_count": 1, "failed_test": None})
+
+    assert cache.get("p1", keys[0]) is None
+    assert cache.get("p1", keys[2]) is not None